@@ -0,0 +1,50 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+raccoon: 让数据更干净，让价值更清晰
+各函数按功能分布在子模块中（check、sql、excel、stats、text、jobs），import raccoon时不导入任何子模块，
+首次访问某个函数时才导入相应的子模块，pandas、numpy也在首次使用时才导入，
+例如 raccoon.count_line 只需导入text子模块，不导入pandas
+"""
+
+import importlib
+
+_EXPORTS = {
+    'check': ['check_blank', 'drop_blank', 'check_upper_letter', 'lower_str', 'check_or_pattern',
+              'check_bracket_pattern', 'check_escape_pattern', 'str_replace', 'check_regex', 'benchmark_regex'],
+    'sql': ['func_where_sql', 'sql_where_expression', 'join_sql_where_expression', 'create_sql', 'save_to_file',
+            'create_matching_sql', 'create_matching_sql_batches'],
+    'excel': ['df_to_excels', 'left_fill_value', 'clean_excel_sample', 'expand_reason', 'iter_excel', 'iter_excels',
+              'excel_to_df', 'excels_to_df', 'data_masking', 'excels_masking', 'company_file_rule_check'],
+    'stats': ['type_decode', 'format_adjust', 'format_explode', 'year_month_to_date', 'year_week_to_date',
+              'statistic_monthly', 'statistic_weekly', 'get_quarter', 'get_period', 'statistic_merge',
+              'AggregateStore'],
+    'text': ['count_line', 'line_sample', 'merchant_split', 'industry_merchant_clean', 'optimize_rules',
+             'merchant_rule_dry_run', 'sort_file', 'partition_file', 'text_masking', 'texts_masking', 'text_decode'],
+    'jobs': ['load_job_spec', 'run_jobs'],
+    '_common': ['RuleSet'],
+}  # {子模块: 对外提供的函数及类}
+_LOCATION = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_LOCATION)
+
+
+def __getattr__(name):
+    """
+    首次访问函数时导入相应的子模块，之后直接从包中读取
+    :param name: str, 函数名或类名
+    :return: 相应的函数或类
+    """
+    module = _LOCATION.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
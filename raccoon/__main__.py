@@ -0,0 +1,10 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+命令行入口：python -m raccoon jobs.json [--workers 4] [--memory 8000] [--retries 1] [--path-log d:/logs/]
+"""
+
+from .jobs import _main
+
+if __name__ == '__main__':
+    raise SystemExit(_main())
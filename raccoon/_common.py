@@ -0,0 +1,968 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+各子模块共用的内部工具：延迟导入、文件读写、正则匹配、规则集及分块处理
+"""
+
+import bz2
+import codecs
+import collections
+import functools
+import gzip
+import hashlib
+import importlib
+import locale
+import lzma
+import os
+import pickle
+import queue
+import re
+import tempfile
+import threading
+import time
+import warnings
+
+
+class _LazyModule(object):
+    """
+    延迟导入的模块代理，首次访问属性时才导入相应的模块，如pandas、numpy，仅使用纯字节功能时不必导入
+    """
+
+    def __init__(self, name):
+        """
+        :param name: str, 模块名
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+
+
+def _quiet(func):
+    """
+    在函数调用期间忽略警告（如pandas的FutureWarning、SettingWithCopyWarning及openpyxl的样式警告），不影响调用之外的警告设置
+    :param func: 函数
+    :return: 函数
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return func(*args, **kwargs)
+    return wrapper
+
+
+_STRICT = False  # 批量作业中为True：参数或输入有误时抛出异常而非打印提示后返回，作业判为失败
+
+
+def _input_error(message):
+    """
+    提示参数或输入有误，调用方随后跳过处理；批量作业（_STRICT为True）中改为抛出ValueError，使作业判为失败并按设置重试
+    :param message: str, 提示信息
+    :return: None
+    """
+    if _STRICT:
+        raise ValueError(message.strip())
+    print(message)
+
+
+_MASKING_SUFFIX = {10: '(十位脱敏)', 100: '(百位脱敏)', 1000: '(千位脱敏)', 10000: '(万位脱敏)', 100000: '(十万位脱敏)',
+                   1000000: '(百万位脱敏)', 10000000: '(千万位脱敏)', 100000000: '(亿位脱敏)', 1000000000: '(十亿位脱敏)', }
+
+
+def _mask_values(values, levels):
+    """
+    对多列数值一次性按各自的数量级四舍五入（向量化处理）
+    :param values: ndarray, 二维数值数组，每列对应一个待脱敏列
+    :param levels: list(int), 各列的脱敏数量级
+    :return: ndarray
+    """
+    levels = np.asarray(levels, dtype=float)
+    return levels * np.round(values / levels)
+
+
+_COMPRESSION_SUFFIX = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}  # 支持的压缩格式及相应的文件后缀
+
+
+def _open_input(file):
+    """
+    以二进制方式打开待读取的文件，gzip/bz2/xz压缩文件根据文件后缀或文件头自动识别并流式解压
+    :param file: str, 文件名，含路径及后缀
+    :return: 二进制文件对象
+    """
+    with open(file, 'rb') as f:
+        head = f.read(6)
+    if file.endswith('.gz') or head[:2] == b'\x1f\x8b':
+        return gzip.open(file, 'rb')
+    if file.endswith('.bz2') or head[:3] == b'BZh':
+        return bz2.open(file, 'rb')
+    if file.endswith('.xz') or head == b'\xfd7zXZ\x00':
+        return lzma.open(file, 'rb')
+    return open(file, 'rb')
+
+
+def _open_output(file, compression=None, compresslevel=None, binary=False):
+    """
+    以追加方式打开输出文件，可选压缩写入
+    :param file: str, 文件名，含路径及后缀
+    :param compression: str, 压缩格式，可选'gzip'、'bz2'、'xz'，默认不压缩
+    :param compresslevel: int, 压缩级别，gzip及bz2为1-9，xz为0-9，默认gzip及bz2取6（兼顾速度与压缩率），xz取lzma默认预设
+    :param binary: bool, 是否以二进制方式打开，默认以utf-8编码的文本方式打开
+    :return: 文件对象
+    """
+    if binary:
+        kwargs = dict()
+        mode = 'ab'
+    else:
+        kwargs = dict(encoding='utf-8', newline='')
+        mode = 'at'
+    if compression == 'gzip':
+        return gzip.open(file, mode, compresslevel=6 if compresslevel is None else compresslevel, **kwargs)
+    if compression == 'bz2':
+        return bz2.open(file, mode, compresslevel=6 if compresslevel is None else compresslevel, **kwargs)
+    if compression == 'xz':
+        return lzma.open(file, mode, preset=compresslevel, **kwargs)
+    return open(file, mode, **kwargs)
+
+
+def _output_suffix(output_format='csv', compression=None):
+    """
+    检查输出格式及压缩格式，生成输出文件的后缀
+    :param output_format: str, 输出格式，'csv'为无表头的逗号分隔文本，'parquet'为列式存储的Parquet文件
+    :param compression: str, 压缩格式，csv可选'gzip'、'bz2'、'xz'，parquet可选pyarrow支持的格式如'snappy'、'zstd'
+    :return: str, 输出文件的后缀，参数不合法时返回None
+    """
+    if output_format == 'parquet':
+        return '.parquet'
+    if output_format != 'csv':
+        _input_error("\n不支持的输出格式%s，可选['csv', 'parquet']" % output_format)
+        return None
+    if compression and compression not in _COMPRESSION_SUFFIX:
+        _input_error("\n不支持的压缩格式%s，可选%s" % (compression, list(_COMPRESSION_SUFFIX.keys())))
+        return None
+    return '.txt' + _COMPRESSION_SUFFIX.get(compression, '')
+
+
+def _iter_read(file, encoding=None, m=20, decode=True, sizer=None):
+    """
+    分块读取文本文件，每次读入约m兆数据（压缩文件按解压后的数据量计算），并解码成字符串
+    :param file: str, 文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param encoding: str, 编码方式
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param decode: bool, 是否解码，为False时直接产出bytes数据块
+    :param sizer: _ChunkSizer, 自适应数据块大小，设置时每次读入的数据量取sizer.size，m不再生效
+    :return: generator, 每次产出一个数据块
+    """
+    f = _open_input(file)
+    # 增量解码，多字节字符被数据块截断时留待下一块解码
+    decoder = codecs.getincrementaldecoder(encoding or locale.getpreferredencoding(False))() if decode else None
+    try:
+        while True:
+            read = f.read(sizer.size if sizer else 1024 * 1024 * m)  # 每次读入m M
+            if not read:
+                break
+            chunk = decoder.decode(read) if decode else read
+            if chunk:
+                yield chunk
+        if decode:
+            chunk = decoder.decode(b'', final=True)
+            if chunk:
+                yield chunk
+    finally:
+        f.close()
+
+
+def _iter_lines(chunks):
+    """
+    将分块读入的数据切分成完整的行，跨块被截断的行并入下一块，str及bytes数据块均适用
+    :param chunks: iterable, 分块读入的数据，如_iter_read的结果
+    :return: generator, 每次产出一个数据块内的完整行列表
+    """
+    tail = ''  # 分块残留数据尾部
+    for read in chunks:
+        chunk = tail + read if tail else read
+        lines = chunk.splitlines()
+        if chunk.endswith(b'\n' if isinstance(chunk, bytes) else '\n'):  # 数据块最后一行是否完整切断
+            tail = ''
+        else:
+            tail = lines.pop()
+        if lines:
+            yield lines
+    if tail:  # 文件末尾没有换行符时，最后一行同样需要输出
+        yield [tail]
+
+
+_REGEX = dict()  # 编译后的正则表达式，{(正则, 标志, 引擎): 编译结果}，跨数据块、文件及调用复用
+_REGEX_BACKENDS = ('re', 'regex', 're2')  # 可选的正则引擎：标准库re、第三方regex模块、线性时间的RE2（google-re2）
+_REGEX_MODULES = dict()  # 已导入的正则引擎模块，未安装时为None
+
+
+def _regex_module(backend):
+    """
+    导入正则引擎模块，未安装时提示并返回None（改用re）
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: 模块或None
+    """
+    if backend not in _REGEX_MODULES:
+        if backend not in _REGEX_BACKENDS:
+            raise ValueError("不支持的正则引擎%s，可选%s" % (backend, list(_REGEX_BACKENDS)))
+        try:
+            _REGEX_MODULES[backend] = importlib.import_module(backend)
+        except ImportError:
+            print("\n未安装%s，改用re进行正则匹配" % ('google-re2' if backend == 're2' else backend))
+            _REGEX_MODULES[backend] = None
+    return _REGEX_MODULES[backend]
+
+
+def _translate_pattern(pattern, backend='re'):
+    """
+    将规则表中按Hive rlike（Java正则）编写的正则转换成相应引擎支持的写法：
+    \\Q...\\E转义成普通字符，\\z转成\\Z，(?<name>...)转成(?P<name>...)；RE2不支持原子组及占有量词，分别转成(?:...)及普通量词。
+    引擎不支持、无法等价转换的写法（RE2的零宽断言及反向引用，re的\\p{...}，各引擎的字符类交集&&）抛出ValueError
+    :param pattern: str or bytes, 正则表达式，bytes按ASCII处理
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: (str or bytes, list(str)), 转换后的正则（与输入类型一致）及转换说明
+    """
+    if isinstance(pattern, bytes):
+        translated, notes = _translate_pattern(pattern.decode('ascii'), backend)
+        return translated.encode('ascii'), notes
+    out = []
+    notes = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        nxt = pattern[i + 1] if i + 1 < len(pattern) else ''
+        if c == '\\':
+            if nxt == 'Q':
+                end = pattern.find('\\E', i + 2)
+                end = len(pattern) if end < 0 else end
+                out.append(re.escape(pattern[i + 2:end]))
+                notes.append('\\Q...\\E转义')
+                i = end + 2
+                continue
+            if nxt == 'z' and backend != 're2':
+                out.append('\\Z')
+                notes.append('\\z转成\\Z')
+            elif nxt in 'pP' and backend == 're':
+                raise ValueError("re不支持Unicode属性\\%s{...}" % nxt)
+            elif nxt.isdigit() and nxt != '0' and not in_class and backend == 're2':
+                raise ValueError("RE2不支持反向引用\\%s" % nxt)
+            else:
+                out.append(c + nxt)
+            i += 2
+            continue
+        if in_class:
+            if c == '&' and nxt == '&':
+                raise ValueError("不支持字符类交集&&")
+            if c == ']':
+                in_class = False
+            out.append(c)
+            i += 1
+            continue
+        if c == '[':
+            in_class = True
+            out.append(c)
+            # 紧跟在[或[^之后的]是普通字符
+            j = i + 1
+            if pattern[j:j + 1] == '^':
+                out.append('^')
+                j += 1
+            if pattern[j:j + 1] == ']':
+                out.append(']')
+                j += 1
+            i = j
+            continue
+        if c == '(' and nxt == '?':
+            head = pattern[i:i + 4]
+            if head.startswith('(?>') and backend == 're2':
+                out.append('(?:')
+                notes.append('原子组转成非捕获组')
+                i += 3
+                continue
+            if head.startswith(('(?=', '(?!', '(?<=', '(?<!')) and backend == 're2':
+                raise ValueError("RE2不支持零宽断言%s" % (head if head[2] == '<' else head[:3]))
+            if head.startswith('(?<') and head not in ('(?<=', '(?<!') and backend == 're':
+                out.append('(?P<')
+                notes.append('(?<name>转成(?P<name>')
+                i += 3
+                continue
+        if c == '+' and i > 0 and pattern[i - 1] in '*+?}' and backend == 're2' and \
+                (i < 2 or pattern[i - 2] != '\\'):
+            notes.append('占有量词转成普通量词')
+            i += 1
+            continue
+        out.append(c)
+        i += 1
+    return ''.join(out), notes
+
+
+def _backend_compile(pattern, flags, backend, module):
+    """
+    按_translate_pattern转换后用相应引擎编译正则，不登记、不回退
+    :param pattern: str or bytes, 正则表达式
+    :param flags: int, 正则表达式标志，仅支持IGNORECASE
+    :param backend: str, 正则引擎，可选'regex'、're2'
+    :param module: 已导入的引擎模块
+    :return: (编译后的正则表达式, list(str) 转换说明)，引擎不支持时抛出ValueError或module.error
+    """
+    translated, notes = _translate_pattern(pattern, backend)
+    if backend == 're2':
+        options = module.Options()
+        options.case_sensitive = not flags & re.IGNORECASE
+        options.log_errors = False
+        return module.compile(translated, options), notes
+    return module.compile(translated, flags), notes
+
+
+def _compile(pattern, flags=re.IGNORECASE, backend='re'):
+    """
+    编译正则表达式并登记到_REGEX中，已编译的直接返回（不受re模块内部缓存个数的限制）。
+    正则先按_translate_pattern转换成相应引擎的写法，引擎未安装或不支持该正则时改用re；
+    re无法转换的正则按原样编译，与不转换时的结果一致
+    :param pattern: str or bytes, 正则表达式
+    :param flags: int, 正则表达式标志，仅支持IGNORECASE
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: 编译后的正则表达式，均提供search方法
+    """
+    key = (pattern, flags, backend)
+    regex = _REGEX.get(key)
+    if regex is not None:
+        return regex
+    module = _regex_module(backend) if backend != 're' else re
+    if module is None:
+        regex = _compile(pattern, flags)
+    elif backend == 're':
+        try:
+            translated = _translate_pattern(pattern, backend)[0]
+        except ValueError:
+            translated = pattern
+        regex = re.compile(translated, flags)
+    else:
+        try:
+            regex = _backend_compile(pattern, flags, backend, module)[0]
+        except (ValueError, module.error) as e:
+            print("\n正则%s不被%s支持（%s），改用re匹配" % (pattern, backend, e))
+            regex = _compile(pattern, flags)
+    _REGEX[key] = regex
+    return regex
+
+
+class _MatchCache(object):
+    """
+    正则匹配结果的LRU缓存，按正则表达式分别记录 取值→是否命中，跨数据块复用，每个正则最多缓存maxsize个取值
+    """
+
+    def __init__(self, maxsize=10000):
+        """
+        :param maxsize: int, 每个正则表达式最多缓存的取值个数
+        """
+        self.maxsize = maxsize
+        self.results = dict()
+
+    def search(self, regex, values):
+        """
+        对各取值执行正则匹配，已缓存的取值直接返回结果
+        :param regex: 编译后的正则表达式
+        :param values: iterable, 待匹配的取值（str或bytes，与正则类型一致）
+        :return: list(bool)
+        """
+        table = self.results.setdefault((regex.pattern, getattr(regex, 'flags', None), type(regex).__module__),
+                                        collections.OrderedDict())
+        hits = list()
+        for v in values:
+            hit = table.get(v)
+            if hit is None:
+                hit = regex.search(v) is not None
+                table[v] = hit
+                if len(table) > self.maxsize:
+                    table.popitem(last=False)
+            else:
+                table.move_to_end(v)
+            hits.append(hit)
+        return hits
+
+
+def _match_unique(s, pattern, flags=re.IGNORECASE, na=False, encoding=None, cache=None, backend='re'):
+    """
+    在列的去重取值上执行正则匹配，再按factorize的编码将结果广播回各行，与str.contains结果一致。
+    城市代码、MCC等取值高度重复的列，正则只需执行（去重后的取值个数）次
+    :param s: Series, 待匹配的列，取值为str或bytes，非字符串取值（如数值、空值）按空值处理
+    :param pattern: str or bytes, 正则表达式，bytes正则直接匹配bytes取值
+    :param flags: int, 正则表达式标志
+    :param na: bool, 空值的匹配结果
+    :param encoding: str, 设置时bytes取值先解码再匹配（仅解码去重后的取值）
+    :param cache: _MatchCache, 跨数据块复用的匹配结果缓存，默认不缓存
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: ndarray, 布尔索引
+    """
+    codes, uniques = pd.factorize(s)
+    if len(uniques) == 0:
+        return np.full(len(s), na, dtype=bool)
+    uniques = np.asarray(uniques, dtype=object)
+    valid = np.array([isinstance(v, (str, bytes)) for v in uniques], dtype=bool)
+    values = uniques[valid]
+    regex = _compile(pattern, flags, backend=backend)
+    if encoding:
+        values = [v.decode(encoding) if isinstance(v, bytes) else v for v in values]
+    result = np.full(len(uniques), na, dtype=bool)
+    if cache is None:
+        result[valid] = [regex.search(v) is not None for v in values]
+    else:
+        result[valid] = cache.search(regex, values)
+    return np.where(codes >= 0, result[codes], na)
+
+
+def _bytes_contains(s, pattern, encoding, flags=re.IGNORECASE, na=False, cache=None, backend='re'):
+    """
+    字节模式下的正则匹配：ASCII正则直接在bytes取值上执行，含非ASCII字符的正则则先解码取值再匹配。
+    bytes上的正则按字节匹配，因此仅适用于取值为ASCII字符的列，如城市代码、MCC
+    :param s: Series, 取值为bytes的列
+    :param pattern: str, 正则表达式
+    :param encoding: str, 文件编码方式
+    :param flags: int, 正则表达式标志
+    :param na: bool, 空值的匹配结果
+    :param cache: _MatchCache, 跨数据块复用的匹配结果缓存
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: ndarray, 布尔索引
+    """
+    try:
+        pattern_bytes = pattern.encode('ascii')
+    except UnicodeEncodeError:
+        return _match_unique(s, pattern, flags=flags, na=na, encoding=encoding, cache=cache, backend=backend)
+    return _match_unique(s, pattern_bytes, flags=flags, na=na, cache=cache, backend=backend)
+
+
+def _append_fields(lines, df, encoding):
+    """
+    字节模式下在原始行末尾追加字段，如keywords、drop_reason，空值追加为空字段
+    :param lines: Series, 取值为bytes的原始行
+    :param df: DataFrame, 需要追加的字段，索引与lines一致
+    :param encoding: str, 追加字段的编码方式，与原文件一致
+    :return: Series
+    """
+    lines = lines[df.index]
+    for col in df.columns:
+        lines = lines + b',' + df[col].fillna('').astype(str).str.encode(encoding)
+    return lines
+
+
+def _str_contains(s, pattern, byte_mode=False, encoding=None, cache=None, backend='re'):
+    """
+    对列执行正则匹配（忽略大小写，仅对去重后的取值执行），空值视为不匹配
+    :param s: Series, 待匹配的列
+    :param pattern: str, 正则表达式
+    :param byte_mode: bool, 列取值是否为bytes，是则在bytes上直接匹配（仅适用于ASCII字段）
+    :param encoding: str, 字节模式下的文件编码方式
+    :param cache: _MatchCache, 跨数据块复用的匹配结果缓存
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: ndarray, 布尔索引
+    """
+    if byte_mode:
+        return _bytes_contains(s, pattern, encoding, cache=cache, backend=backend)
+    return _match_unique(s, pattern, cache=cache, backend=backend)
+
+
+def _anchored(pattern):
+    """
+    判断正则的每个顶层分支是否都以^开头，且不含反向引用、命名组、零宽断言及内联标志（仅允许(?:...)），
+    满足时多个这样的正则可以合并成一个分支结构：只在开头位置匹配，按分支顺序返回第一个命中的正则
+    :param pattern: str, 正则表达式
+    :return: bool
+    """
+    if not isinstance(pattern, str) or not pattern:
+        return False
+    alternatives = [[]]
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if pattern[i + 1:i + 2].isdigit():
+                return False
+            alternatives[-1].append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            if pattern[i + 1:i + 2] == '?' and pattern[i + 2:i + 3] != ':':
+                return False
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            alternatives.append([])
+            i += 1
+            continue
+        alternatives[-1].append(c)
+        i += 1
+    return all(alt and alt[0] == '^' for alt in alternatives)
+
+
+def _rule_plan(df_rule, optimize=False):
+    """
+    商户清洗规则的执行计划。不优化时每条规则依次执行一次城市白名单匹配，并在归属于该规则的行上执行商户名称及MCC匹配；
+    优化时（结果与不优化时一致）：
+    1. 城市白名单与前面某条规则相同的规则不会命中任何行（命中的行已归属于前面的规则），不再执行；
+    2. 相邻的、各分支均以^开头的城市白名单合并成一个分支结构，在开头位置按规则顺序返回第一个命中的规则，与逐条执行一致；
+    3. name_white、name_black、mcc_white均相同的规则，在它们归属的全部行上只执行一次匹配（各行的结果只取决于行取值及正则）
+    :param df_rule: DataFrame, 按执行顺序排列的清洗规则表，需含citycode_white、name_white、name_black、mcc_white列
+    :param optimize: bool, 是否优化
+    :return: dict, city: [(正则, [规则位置])]，check: [((name_white, name_black, mcc_white), [规则位置])]
+    """
+    city = df_rule['citycode_white'].values
+    checks = list(zip(df_rule['name_white'].values, df_rule['name_black'].values, df_rule['mcc_white'].values))
+    if not optimize:
+        return dict(city=[(pattern, [k]) for k, pattern in enumerate(city)],
+                    check=[(patterns, [k]) for k, patterns in enumerate(checks)])
+    seen = set()
+    steps = list()
+    for k, pattern in enumerate(city):
+        if isinstance(pattern, str):
+            if pattern in seen:
+                continue
+            seen.add(pattern)
+        if steps and _anchored(pattern) and all(_anchored(city[j]) for j in steps[-1][1]):
+            steps[-1][1].append(k)
+        else:
+            steps.append((pattern, [k]))
+    plan_city = list()
+    for pattern, positions in steps:
+        if len(positions) > 1:
+            pattern = '|'.join('(?P<_r%d>%s)' % (j, city[j]) for j in positions)
+        plan_city.append((pattern, positions))
+    groups = dict()
+    for k in sorted(k for _, positions in plan_city for k in positions):  # 跳过的规则不会有归属的行
+        patterns = checks[k]
+        groups.setdefault(tuple(str(x) for x in patterns), (patterns, list()))[1].append(k)
+    return dict(city=plan_city, check=list(groups.values()))
+
+
+def _match_first(s, pattern, byte_mode=False, encoding=None, backend='re'):
+    """
+    对列执行由_rule_plan合并的城市白名单（仅对去重后的取值执行），返回各行命中的第一条规则
+    :param s: Series, 待匹配的列
+    :param pattern: str, 合并后的正则，各规则为命名组_r<规则位置>
+    :param byte_mode: bool, 列取值是否为bytes，是则ASCII正则直接在bytes上匹配
+    :param encoding: str, 字节模式下的文件编码方式
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: ndarray, 各行命中的规则位置，未命中为-1
+    """
+    codes, uniques = pd.factorize(s)
+    if byte_mode:
+        try:
+            pattern = pattern.encode('ascii')
+        except UnicodeEncodeError:
+            uniques = [value.decode(encoding) for value in uniques]
+    regex = _compile(pattern, backend=backend)
+    first = np.full(len(uniques) + 1, -1)  # 最后一个位置对应空值
+    for j, value in enumerate(uniques):
+        match = regex.search(value)
+        if match is not None:
+            name = match.lastgroup
+            first[j] = int((name.decode('ascii') if isinstance(name, bytes) else name)[2:])
+    return first[codes]
+
+
+def _merchant_labels(df, df_rule, byte_mode=False, encoding=None, cache=None, backend='re', plan=None):
+    """
+    计算商户数据块中每一行的清洗标签。每一行归属于第一条城市白名单命中的规则（按df_rule的顺序），
+    与逐条规则剔除的清洗算法结果一致；各规则的城市正则仅在尚未归属的行上执行，
+    商户名称及MCC规则仅在归属于该规则的行上执行
+    :param df: DataFrame, 商户数据块，需含city_cd、mchnt_name、mcc列
+    :param df_rule: DataFrame, 清洗规则表，需含citycode_white、name_white、name_black、mcc_white列
+    :param byte_mode: bool, 数据块取值是否为bytes，是则城市代码及MCC直接在bytes上匹配，商户名称解码后匹配
+    :param encoding: str, 字节模式下的文件编码方式
+    :param cache: _MatchCache, 跨数据块复用的匹配结果缓存
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :param plan: dict, _rule_plan生成的执行计划，默认逐条规则执行
+    :return: (ndarray, ndarray), 各行命中的规则位置（未命中为-1）及清洗结果代码：
+             0为白名单，1为不在name_white内，2为命中name_black，3为MCC不在范围内
+    """
+    plan = plan or _rule_plan(df_rule)
+    rule_pos = np.full(len(df), -1)
+    status = np.zeros(len(df), dtype='int8')
+    city = df['city_cd']
+    unassigned = np.arange(len(df))
+    for pattern, positions in plan['city']:
+        if len(unassigned) == 0:
+            break
+        if len(positions) > 1:
+            first = _match_first(city.iloc[unassigned], pattern, byte_mode=byte_mode, encoding=encoding,
+                                 backend=backend)
+            hit = first >= 0
+            rule_pos[unassigned[hit]] = first[hit]
+        else:
+            hit = _str_contains(city.iloc[unassigned], pattern, byte_mode=byte_mode, encoding=encoding, cache=cache,
+                                backend=backend)
+            rule_pos[unassigned[hit]] = positions[0]
+        unassigned = unassigned[~hit]
+    for (name_white, name_black, mcc_white), positions in plan['check']:
+        rows = np.flatnonzero(np.isin(rule_pos, positions))
+        if len(rows) == 0:
+            continue
+        name = df['mchnt_name'].iloc[rows]
+        name_encoding = encoding if byte_mode else None  # 字节模式下仅解码归属于当前规则的商户名称（去重后）
+        s_white = _match_unique(name, name_white, encoding=name_encoding, cache=cache, backend=backend)
+        s_black = np.zeros(len(rows), dtype=bool)
+        s_black[s_white] = _match_unique(name[s_white], name_black, encoding=name_encoding, cache=cache,
+                                         backend=backend)
+        s_mcc = np.zeros(len(rows), dtype=bool)
+        s_pass = s_white & ~s_black
+        s_mcc[s_pass] = _str_contains(df['mcc'].iloc[rows[s_pass]], mcc_white, byte_mode=byte_mode,
+                                      encoding=encoding, cache=cache, backend=backend)
+        status[rows] = np.select([~s_white, s_black, ~s_mcc], [1, 2, 3], 0)
+    return rule_pos, status
+
+
+def _read_rule(file):
+    """
+    读取规则表文件，所有列按字符串读入
+    :param file: str, 规则表文件，xlsx/xls或csv
+    :return: DataFrame
+    """
+    if file.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(file, dtype=str)
+    return pd.read_csv(file, dtype=str)
+
+
+class RuleSet(object):
+    """
+    编译后的清洗规则集：由规则表一次性构建，按keys分组（如 文件，或 excel-sheet），组内规则按地区排列（地区内保持原有顺序），
+    各规则列的正则预先编译，可在多次调用及多个进程间复用；industry_merchant_clean的df_rule及clean_excel_sample的df
+    均可直接传入RuleSet。RuleSet.cached按规则表内容的哈希值缓存到本地（pickle），相同规则表再次构建时直接读取
+    """
+
+    def __init__(self, df_rule, keys=('file_name',), patterns=('citycode_white', 'name_white', 'name_black',
+                                                                 'mcc_white'), district='district', backend='re'):
+        """
+        :param df_rule: DataFrame, 清洗规则表
+        :param keys: list(str), 分组的列名，industry_merchant_clean为['file_name']，
+                     clean_excel_sample为[primary['excel'], primary['sheet']]
+        :param patterns: list(str), 正则规则所在的列名，不在规则表中的列忽略
+        :param district: str, 地区列名，组内规则按地区首次出现的顺序排列，为None或不在规则表中时保持原有顺序；
+                         clean_excel_sample按规则表顺序执行规则，须设为None
+        :param backend: str, 预先编译所用的正则引擎，可选're'、'regex'、're2'，须与清洗函数的regex_backend一致
+        """
+        self.keys = list(keys)
+        self.patterns = [col for col in patterns if col in df_rule.columns]
+        self.groups = dict()
+        for key, df_group in df_rule.groupby(self.keys[0] if len(self.keys) == 1 else self.keys, sort=False):
+            if district in df_group.columns:
+                codes = pd.factorize(df_group[district])[0]
+                df_group = df_group.iloc[np.argsort(codes, kind='stable')]
+            self.groups[key if isinstance(key, tuple) else (key,)] = df_group
+        # 预先编译各规则列的正则，ASCII正则同时编译bytes版本供字节模式使用
+        self.regex = dict()
+        for pattern in pd.unique(df_rule[self.patterns].values.ravel()):
+            if not isinstance(pattern, str):
+                continue
+            self.regex[(pattern, re.IGNORECASE, backend)] = _compile(pattern, backend=backend)
+            try:
+                pattern_bytes = pattern.encode('ascii')
+            except UnicodeEncodeError:
+                continue
+            self.regex[(pattern_bytes, re.IGNORECASE, backend)] = _compile(pattern_bytes, backend=backend)
+        self.hash = None
+
+    def __setstate__(self, state):
+        # 从缓存文件或其他进程载入时，将编译结果登记到当前进程
+        self.__dict__.update(state)
+        _REGEX.update(self.regex)
+
+    def get(self, *key):
+        """
+        :param key: 分组键的取值，如文件名，或excel名、sheet名
+        :return: DataFrame, 相应的规则（按地区排列），没有规则时为None
+        """
+        return self.groups.get(key)
+
+    def has(self, *key):
+        """
+        :param key: 分组键取值的前缀，如excel名
+        :return: bool, 是否存在以key开头的分组
+        """
+        return any(group[:len(key)] == key for group in self.groups)
+
+    def save(self, file):
+        """
+        保存到本地文件（pickle）
+        :param file: str, 文件名，含路径及后缀
+        :return: None
+        """
+        with open(file, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file):
+        """
+        :param file: str, RuleSet.save保存的文件
+        :return: RuleSet
+        """
+        with open(file, 'rb') as f:
+            return pickle.load(f)
+
+    @classmethod
+    def cached(cls, rule, path_cache=None, **kwargs):
+        """
+        构建规则集并按规则表的哈希值缓存到本地，缓存存在时直接读取，不再读入规则表及编译正则
+        :param rule: str or DataFrame, 规则表文件（xlsx/xls或csv，哈希值按文件内容计算）或规则表
+        :param path_cache: str, 缓存路径，默认为规则表文件所在路径，传入DataFrame时默认为系统临时目录
+        :param kwargs: RuleSet的其余参数，如keys、patterns
+        :return: RuleSet
+        """
+        md5 = hashlib.md5(repr(sorted(kwargs.items())).encode('utf-8'))
+        if isinstance(rule, str):
+            with open(rule, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    md5.update(block)
+            path_cache = path_cache or os.path.dirname(os.path.abspath(rule)) + '/'
+        else:
+            md5.update(repr(list(rule.columns)).encode('utf-8'))
+            md5.update(pd.util.hash_pandas_object(rule, index=False).values.tobytes())
+            path_cache = path_cache or tempfile.gettempdir() + '/'
+        file = path_cache + 'ruleset_%s.pkl' % md5.hexdigest()
+        if os.path.exists(file):
+            return cls.load(file)
+        rules = cls(_read_rule(rule) if isinstance(rule, str) else rule, **kwargs)
+        rules.hash = md5.hexdigest()
+        if not os.path.exists(path_cache):
+            os.makedirs(path_cache, exist_ok=True)
+        rules.save(file)
+        return rules
+
+
+class _ChunkSizer(object):
+    """
+    自适应数据块大小：在前几个数据块上测量内存膨胀倍数（数据块DataFrame的内存 / 原始数据量）及处理速度，
+    探测阶段数据块逐块加倍，之后的数据块在内存预算内取处理速度最快的大小
+    """
+
+    def __init__(self, memory_limit, m=20, probes=3, in_flight=0, show=True):
+        """
+        :param memory_limit: int, 内存预算，单位为兆
+        :param m: int, 初始数据块大小，单位为兆，不超过内存预算的1/32（按约10倍膨胀保守估计）
+        :param probes: int, 用于测量的数据块个数
+        :param in_flight: int, 后台读写队列中同时驻留的数据块个数，计入内存预算
+        :param show: bool, 是否打印测量结果
+        """
+        self.limit = 1024 * 1024 * memory_limit
+        self.size = max(min(1024 * 1024 * m, self.limit // 32), 1024 * 1024)
+        self.probes = probes
+        self.headroom = 2 + in_flight  # 字段切分时的中间结果约占一个数据块的内存
+        self.show = show
+        self.ratio = 0
+        self.history = list()  # [(数据量, 处理速度)]
+        self.last = time.perf_counter()
+
+    def update(self, lines, df):
+        """
+        记录一个数据块的处理结果，探测结束后确定之后的数据块大小
+        :param lines: list(str or bytes), 数据块的原始行，按字符数计算数据量（多字节编码时偏保守）
+        :param df: DataFrame, 数据块切分后的DataFrame
+        :return: None
+        """
+        now = time.perf_counter()
+        seconds = max(now - self.last, 1e-6)  # 两次调用的间隔，包括读入及处理时间
+        self.last = now
+        if len(self.history) >= self.probes or not lines:
+            return
+        n = sum(map(len, lines)) + len(lines)
+        self.ratio = max(self.ratio, df.memory_usage(deep=True).sum() / n)
+        self.history.append((n, n / seconds))
+        cap = max(int(self.limit / (self.ratio * self.headroom)), 1024 * 1024)
+        if len(self.history) < self.probes:
+            self.size = min(self.size * 2, cap)
+            return
+        best_size, best_speed = max(self.history, key=lambda x: x[1])
+        if self.history[-1][1] >= 0.95 * best_speed:  # 数据块越大处理越快，取内存预算允许的最大值
+            self.size = cap
+        else:
+            self.size = min(best_size, cap)
+        if self.show:
+            print("\t自适应数据块大小：内存膨胀约%.1f倍，之后每次读入%.1fM" % (self.ratio, self.size / 1024 / 1024))
+
+
+def _background_iter(iterable, queue_size=2):
+    """
+    在后台线程中执行迭代（如读取文件），通过有界队列将结果传递给主线程，使文件读入与数据处理重叠进行
+    :param iterable: iterable, 需要在后台执行的迭代对象
+    :param queue_size: int, 队列深度，即最多预读的数据块个数，内存占用约为 queue_size × 数据块大小
+    :return: generator
+    """
+    q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    break
+            else:
+                put((end, None))
+        except Exception as e:  # 后台线程的异常交由主线程抛出
+            put((end, e))
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = q.get()
+            if error is not None:
+                raise error
+            if item is end:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class _ChunkWriter(object):
+    """
+    分块结果输出器，将各数据块的处理结果追加写入本地文件，各输出文件在首次写入时打开并保持到close；
+    csv格式追加写入无表头文本，parquet格式每个数据块写成一个row group；
+    background为True时在后台线程中写入，通过有界队列与主线程衔接，写入与数据处理重叠进行
+    """
+
+    def __init__(self, background=False, queue_size=2, compression=None, compresslevel=None, output_format='csv',
+                 dictionary=('drop_reason', 'keywords')):
+        """
+        :param background: bool, 是否在后台线程中写入
+        :param queue_size: int, 队列深度，即最多积压的待写入数据块个数
+        :param compression: str, 输出文件的压缩格式，csv默认不压缩，parquet默认snappy
+        :param compresslevel: int, 压缩级别
+        :param output_format: str, 输出格式，可选'csv'、'parquet'
+        :param dictionary: tuple(str), parquet格式中采用字典编码的列名，其余列均按字符串存储
+        """
+        self.background = background
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.output_format = output_format
+        self.dictionary = dictionary
+        self.handles = dict()
+        self.schemas = dict()
+        self.files = list()  # 已写入的输出文件
+        self.error = None
+        if background:
+            self.queue = queue.Queue(maxsize=queue_size)
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _write(self, df, file):
+        if self.output_format == 'parquet':
+            self._write_parquet(df, file)
+            return
+        if file not in self.handles:
+            self.handles[file] = _open_output(file, compression=self.compression, compresslevel=self.compresslevel)
+            self.files.append(file)
+        df.to_csv(self.handles[file], index=False, header=False)  # 追加写入
+
+    def _write_parquet(self, df, file):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if file not in self.handles:  # 以首个数据块的列确定文件结构
+            schema = pa.schema([pa.field(str(col), pa.dictionary(pa.int32(), pa.string()) if col in self.dictionary
+                                         else pa.string()) for col in df.columns])
+            self.handles[file] = pq.ParquetWriter(file, schema, compression=self.compression or 'snappy',
+                                                  compression_level=self.compresslevel)
+            self.schemas[file] = (list(df.columns), schema)
+            self.files.append(file)
+        columns, schema = self.schemas[file]
+        extra = [col for col in df.columns if col not in columns]
+        if extra:
+            raise ValueError("%s: 数据列%s不在首个数据块的列%s中" % (file, extra, columns))
+        df = df.reindex(columns=columns)  # 缺少的列以空值补齐
+        arrays = []
+        for col, field in zip(columns, schema):
+            array = pa.array(df[col], type=pa.string(), from_pandas=True)
+            if col in self.dictionary:
+                array = array.dictionary_encode()
+            arrays.append(array)
+        table = pa.Table.from_arrays(arrays, schema=schema)
+        self.handles[file].write_table(table, row_group_size=max(len(table), 1))  # 一个数据块对应一个row group
+
+    def _write_lines(self, lines, file):
+        if file not in self.handles:
+            self.handles[file] = _open_output(file, compression=self.compression, compresslevel=self.compresslevel,
+                                              binary=True)
+            self.files.append(file)
+        self.handles[file].write(b'\n'.join(lines) + b'\n')  # 追加写入
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                break
+            if self.error is None:  # 出错后不再写入，仅消费队列避免主线程阻塞
+                try:
+                    task[0](*task[1:])
+                except Exception as e:
+                    self.error = e
+
+    def _submit(self, func, data, file):
+        if self.error is not None:
+            raise self.error
+        if self.background:
+            self.queue.put((func, data, file))
+        else:
+            func(data, file)
+
+    def write(self, df, file):
+        """
+        追加写入一个数据块的结果。后台写入时df放入队列后不应再被修改
+        :param df: DataFrame, 待写入的数据
+        :param file: str, 输出文件名，含路径及后缀
+        :return: None
+        """
+        self._submit(self._write, df, file)
+
+    def write_lines(self, lines, file):
+        """
+        字节模式下追加写入原始行，不做解码及重新编码，仅支持csv格式
+        :param lines: iterable(bytes), 待写入的行，不含换行符
+        :param file: str, 输出文件名，含路径及后缀
+        :return: None
+        """
+        self._submit(self._write_lines, lines, file)
+
+    def close(self):
+        """
+        等待所有数据写入完毕并关闭输出文件
+        :return: None
+        """
+        if self.background:
+            self.queue.put(None)
+            self.thread.join()
+        for handle in self.handles.values():
+            handle.close()
+        self.handles = dict()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,290 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+数据表及规则表检查：空格、大写字母、或条件、括号及转义字符，以及正则在各引擎下的兼容性与性能
+"""
+
+import re
+import time
+
+from ._common import pd, _REGEX_BACKENDS, _regex_module, _translate_pattern, _backend_compile
+
+
+def check_blank(df, columns, primary=None):
+    """
+    检查数据表指定列的取值中是否存在空格
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要执行空格检查的列名
+    :param primary: list, 具有唯一标识性的列名, 输出时用来区分各行的“主键”, 默认为空
+    :return: None
+    """
+    df_bool = df[columns].applymap(lambda x: True if re.search('\s', str(x)) else False)
+    if df_bool.sum().sum() > 0:
+        print("\n下列数据取值存在空白字符")
+        if primary:
+            print(df[primary + columns][df_bool.sum(1) > 0])
+        else:
+            print(df[columns][df_bool.sum(1) > 0])
+    else:
+        print("\n检查完毕，没有发现空格")
+
+
+def drop_blank(df, columns, inplace=False):
+    """
+    剔除数据表指定列的取值中的空格，注意有多个空格时需要多次执行
+    :param df: DataFrame
+    :param columns: list, 需要删除空格的列名
+    :param inplace: boolean, 是否替换原来的数据表, 默认不替换
+    :return: DataFrame
+    """
+    if inplace:
+        df[columns] = df[columns].applymap(lambda x: str(x).replace(" ", ""))
+    else:
+        df2 = df.copy()
+        df2[columns] = df2[columns].applymap(lambda x: str(x).replace(" ", ""))
+        return df2
+
+
+def check_upper_letter(df, columns, primary=None):
+    """
+    检查数据表指定列的取值中是否存在大写字母
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要执行正则表达式检查的列名
+    :param primary: list, 具有唯一标识性的列名, 输出时用来区分各行的“主键”, 默认为空
+    :return: None
+    """
+    df_bool = df[columns].applymap(lambda x: True if re.search('[A-Z]', str(x)) else False)
+    if df_bool.sum().sum() > 0:
+        print("\n下列规则的正则表达式存在大写字母")
+        if primary:
+            print(df[primary + columns][df_bool.sum(1) > 0])
+        else:
+            print(df[columns][df_bool.sum(1) > 0])
+    else:
+        print("\n检查完毕，没有发现大写字母")
+
+
+def lower_str(df, columns, inplace=False):
+    """
+    将数据表指定列的取值（字母）全部转成小写
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要转成小写的列名
+    :param inplace: bool, 是否替换原来的数据表, 默认不替换
+    :return: DataFrame
+    """
+    if inplace:
+        df[columns] = df[columns].applymap(lambda x: str(x).lower())
+    else:
+        df2 = df.copy()
+        df2[columns] = df2[columns].applymap(lambda x: str(x).lower())
+        return df2
+
+
+def check_or_pattern(df, columns, primary=None, single=False):
+    """
+    检查数据表指定列的取值中是否存在多余的"|"(“或”正则表达式字符），包括开头、结尾、或重复等情况
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要执行正则表达式检查的列名
+    :param primary: list, 具有唯一标识性的列名, 输出时用来区分各行的“主键”, 默认为空
+    :param single, bool, 是否检查取值仅为单个"|"的情况， 默认忽略
+    :return: None
+    """
+    if not primary:
+        primary = []
+    if single:
+        def single_or_pattern_filter(x):
+            x = str(x)
+            if re.search('^\|.+', x) or re.search('.+\|$', x) or re.search('\|\|', x) or re.search('\|\n\|', x) or \
+                    re.search('^\|$', x):
+                return True
+            else:
+                return False
+        df_bool = df[primary + columns].applymap(single_or_pattern_filter)
+    else:
+        def or_pattern_filter(x):
+            x = str(x)
+            if re.search('^\|.+', x) or re.search('.+\|$', x) or re.search('\|\|', x) or re.search('\|\n\|', x):
+                return True
+            else:
+                return False
+        df_bool = df[primary + columns].applymap(or_pattern_filter)
+    if df_bool.sum().sum() > 0:
+        print("\n下列规则的正则表达式可能存在多余的'|':\n")
+        print(df[primary + columns][df_bool.sum(1) > 0])
+    else:
+        print("\n检查完毕，没有发现多余的'|'\n")
+
+
+def check_bracket_pattern(df, columns, primary=None):
+    """
+    检查数据表指定列的取值中是否存在中文括号
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要执行正则表达式检查的列名
+    :param primary: list, 具有唯一标识性的列名, 输出时用来区分各行的“主键”, 默认为空
+    :return: None
+    """
+    if not primary:
+        primary = []
+
+    def bracket_pattern_filter(x):
+        x = str(x)
+        if re.search('）', x) or re.search('（', x):
+            return True
+        else:
+            return False
+    df_bool = df[columns].applymap(bracket_pattern_filter)
+    if df_bool.sum().sum() > 0:
+        print("\n下列规则的正则表达式可能存在中文括号:\n")
+        print(df[primary + columns][df_bool.sum(1) > 0])
+    else:
+        print("\n检查完毕，没有发现中文括号。\n")
+
+
+def check_escape_pattern(df, columns):
+    """
+    检查数据表指定列的取值中带有转义字符的正则表达式（结果去重）
+    :param df: DataFrame, 待检查的数据表名称
+    :param columns: list, 需要执行正则表达式检查的列名
+    :return: set
+    """
+    dic_escape = dict()
+    set_escape = set()
+    for col in columns:
+        s_escape = df[col].astype(str).str.findall(r"\\.{1}")[df[col].astype(str).str.contains(r"\\.{1}")]
+        dic_escape[col] = []
+        for i in s_escape:
+            dic_escape[col] = dic_escape[col] + i
+        dic_escape[col] = list(set(dic_escape[col]))
+        set_escape = set_escape | set(dic_escape[col])
+    print("各字段中含有的转义字符分别为:\n\t%s" % dic_escape)
+    print("所有字段含有的转义字符（去重）为:\n\t%s" % set_escape)
+
+
+def str_replace(df, columns, str_raw="(", str_rep="\\\\("):
+    """
+    替换指定列中的指定字符
+    :param df: DataFrame
+    :param columns: list, 可能含有需要替换字符的列名
+    :param str_raw: str, 需要被替换的原始字符
+    :param str_rep: 需要替换成的目标字符
+    :return: DataFrame
+    """
+    for col in columns:
+        df[col] = df[col].apply(lambda x: x.replace(str_raw, str_rep))
+    return df
+
+
+def _rule_patterns(df, columns, primary=None):
+    """
+    提取规则表指定列中的正则（去掉空值，同一列内去重）
+    :param df: DataFrame, 规则表
+    :param columns: list, 正则所在的列名
+    :param primary: list, 具有唯一标识性的列名，保留各正则首次出现所在行的取值
+    :return: list(dict), 每个正则一条记录：primary各列、column、pattern
+    """
+    records = []
+    for col in columns:
+        seen = set()
+        for _, row in df[(primary or []) + [col]].iterrows():
+            pattern = row[col]
+            if pd.isnull(pattern) or str(pattern) in seen:
+                continue
+            seen.add(str(pattern))
+            record = {key: row[key] for key in primary or []}
+            record.update(column=col, pattern=str(pattern))
+            records.append(record)
+    return records
+
+
+def check_regex(df, columns, primary=None, backend='re2'):
+    """
+    检查规则表中的正则能否被指定的正则引擎直接执行：按Hive rlike（Java正则）编写的\\Q...\\E、\\z、(?<name>...)、
+    原子组及占有量词等会被转换（ok/translated），引擎不支持的零宽断言、反向引用、\\p{...}及字符类交集&&等无法执行（rejected），
+    清洗时rejected的正则改用re匹配
+    :param df: DataFrame, 规则表
+    :param columns: list, 需要执行正则兼容性检查的列名
+    :param primary: list, 具有唯一标识性的列名, 输出时用来区分各行的“主键”, 默认为空
+    :param backend: str, 正则引擎，可选're'、'regex'、're2'
+    :return: DataFrame, 各正则的检查结果：primary各列、column、pattern、status、translated、notes
+    """
+    module = _regex_module(backend) if backend != 're' else re
+    if module is None:
+        return
+    errors = (ValueError, re.error) if backend == 're' else (ValueError, module.error)
+    records = _rule_patterns(df, columns, primary=primary)
+    for record in records:
+        pattern = record['pattern']
+        try:
+            translated, notes = _translate_pattern(pattern, backend)
+            if backend == 're':
+                re.compile(translated, re.IGNORECASE)
+            else:
+                _backend_compile(pattern, re.IGNORECASE, backend, module)
+            record.update(status='translated' if notes else 'ok', translated=translated, notes='；'.join(notes))
+        except errors as e:
+            record.update(status='rejected', translated=None, notes=str(e))
+    df_check = pd.DataFrame(records, columns=(primary or []) + ['column', 'pattern', 'status', 'translated', 'notes'])
+    df_abnormal = df_check[df_check['status'] != 'ok']
+    if len(df_abnormal) > 0:
+        print("\n下列正则需转换或不被%s支持（rejected的正则将改用re匹配）:\n" % backend)
+        print(df_abnormal)
+    else:
+        print("\n检查完毕，所有正则均可直接被%s执行" % backend)
+    return df_check
+
+
+def benchmark_regex(df, columns, values, backends=_REGEX_BACKENDS, repeat=3):
+    """
+    在样本取值上比较各正则引擎执行规则表的编译耗时、匹配耗时及结果一致性（以re为基准）。
+    引擎不支持的正则改用re编译（计入fallback），未安装的引擎跳过
+    :param df: DataFrame, 规则表
+    :param columns: list, 正则所在的列名
+    :param values: list or dict, 样本取值，为dict时按 列名→取值列表 分别匹配，否则所有列使用同一组取值
+    :param backends: tuple(str), 参与比较的正则引擎
+    :param repeat: int, 匹配的重复次数，取最短耗时
+    :return: DataFrame, 各引擎的patterns、fallback、compile_ms、search_ms、speedup（相对re）、mismatch（与re结果不一致的正则个数）
+    """
+    records = _rule_patterns(df, columns)
+    samples = {col: list(set(str(v) for v in (values[col] if isinstance(values, dict) else values) if pd.notnull(v)))
+               for col in columns}
+    result = dict()
+    baseline = None
+    for backend in ['re'] + [b for b in backends if b != 're']:
+        module = _regex_module(backend) if backend != 're' else re
+        if module is None:
+            continue
+        fallback = 0
+        re.purge()  # 不计re模块内部缓存
+        start = time.perf_counter()
+        compiled = []
+        for record in records:
+            try:
+                if backend == 're':
+                    regex = re.compile(record['pattern'], re.IGNORECASE)
+                else:
+                    regex = _backend_compile(record['pattern'], re.IGNORECASE, backend, module)[0]
+            except (ValueError, module.error):
+                regex = re.compile(record['pattern'], re.IGNORECASE)
+                fallback += 1
+            compiled.append((record['column'], regex))
+        compile_ms = (time.perf_counter() - start) * 1000
+        search_ms = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            matched = [[regex.search(v) is not None for v in samples[col]] for col, regex in compiled]
+            elapsed = (time.perf_counter() - start) * 1000
+            search_ms = elapsed if search_ms is None else min(search_ms, elapsed)
+        if baseline is None:
+            baseline = matched
+        result[backend] = {'patterns': len(records), 'fallback': fallback, 'compile_ms': round(compile_ms, 2),
+                           'search_ms': round(search_ms, 2),
+                           'mismatch': sum(a != b for a, b in zip(matched, baseline))}
+    df_benchmark = pd.DataFrame.from_dict(result, orient='index')
+    if backends and 're' not in backends:
+        df_benchmark = df_benchmark.drop('re')
+    df_benchmark['speedup'] = (result['re']['search_ms'] / df_benchmark['search_ms']).round(2)
+    print(df_benchmark)
+    return df_benchmark
@@ -0,0 +1,634 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+Excel文件的读取、拆分、样本清洗及脱敏
+"""
+
+import datetime as dt
+import os
+import time
+import traceback
+
+from ._common import (np, pd, _MASKING_SUFFIX, _mask_values, _MatchCache, _match_unique, RuleSet, _quiet,
+                      _input_error)
+
+
+@_quiet
+def df_to_excels(df, excel_name, sheet_name=None, path_output=None, show=True):
+    """
+    基于指定的列值将数据拆分保存成excel，或拆分excel及sheet, 各列的取值将作为拆分后的excel或sheet名称
+    :param df: DataFrame, 待拆分的数据表名称
+    :param excel_name: str, 需要按取值拆分成不同excel的列名
+    :param sheet_name: str, 需要按取值拆分成不同sheet的列名
+    :param path_output: str, 生成的excel保存的路径
+    :param show: boolean, 是否打印拆分过程
+    :return: 本地excel文件
+    """
+    if not path_output:
+        path_output = './output/'  # 没有指定输出路径时，输出至默认路径下的output文件夹
+    if not os.path.exists(path_output):
+        os.mkdir(path_output)  # 输出路径不存在时直接创建确保路径存在
+
+    # 两层循环，第一层循环拆分生成excel工作簿
+    for comp in df[excel_name].drop_duplicates():
+        output_file = path_output + str(comp) + '.xlsx'
+        pd.DataFrame().to_excel(output_file, index=False)
+        writer = pd.ExcelWriter(output_file)
+        df_excel = df[df[excel_name] == comp]
+        if show:
+            print(comp)
+        if sheet_name:
+            # 第二层循环拆分生成sheet工作表，保存到相应公司的工作簿中
+            for bran in df_excel[sheet_name].drop_duplicates():
+                df_sheet = df_excel[df_excel[sheet_name] == bran]
+                df_sheet.to_excel(writer, index=False, sheet_name=str(bran))
+                if show:
+                    print('\t', bran)
+        else:
+            df_excel.to_excel(writer, index=False, sheet_name=str(comp))
+        writer.save()
+        writer.close()
+    if show:
+        print('\n拆分完成！')
+
+
+def left_fill_value(df, fill, inplace=True):
+    """
+    将数据表指定的列向左用指定的字符进行填充, 该函数主要针对0开头的数字字符，如'0016', 在数据读入时被转化成数值16,因此需要用0进行填充还原。
+    :param df: DataFrame, 数据表名称
+    :param fill: {str:(int, str)}, 填充方式说明，{需要填充的列名： (最终要填充达到的位数, 用来填充的字符)}
+    :param inplace: bool, 是否替换原来的数据表
+    :return: DataFrame
+    """
+    if inplace:
+        for col in fill.keys():
+            df[col] = df[col].apply(lambda x: str(x).rjust(fill[col][0], fill[col][1]))
+    else:
+        df2 = df.copy()
+        for col in fill.keys():
+            df2[col] = df2[col].apply(lambda x: str(x).rjust(fill[col][0], fill[col][1]))
+        return df2
+
+
+@_quiet
+def clean_excel_sample(df, path, primary, white, black=None, lower=None, upper=None, dtypes=None, keep_na=None,
+                       inplace=True, fill=None, path_white=None, path_black=None, show=True, reason=True,
+                       default=True, sort=None, ascending=True, match_cache=None, engine=None,
+                       regex_backend='re', reason_format='wide'):
+    """
+    样本清洗筛选函数。基于规则表对相应的本地excel文件中的各个sheet表的数据进行清洗筛选
+    :param df: DataFrame or RuleSet, 清洗规则表，或按[primary['excel'], primary['sheet']]分组、district=None
+               （保持规则表顺序）的RuleSet
+    :param path: str, 待清洗筛选的本地excel文件路径
+    :param primary: dict('excel': str, 'sheet': str), {'excel': 规则表中相应的列名, 'sheet': 规则表中相应的列名}
+    :param white: dict(str: str), {需要执行白规则的sheet列名：规则表中相应的白规则列名}
+    :param black: dict(str: str), {需要执行黑规则的sheet列名：规则表中相应的黑规则列名}
+    :param lower: list(str), 需要先将取值转成小写再执行清洗的字段名，默认为空
+    :param upper: list(str), 需要先将取值转成大写再执行清洗的字段名，默认为空
+    :param dtypes: dict(str: str), 读入excel时各字段的数据类型设置，同read_excle中的dtype
+    :param keep_na: list(str), 取值为空时输出到白名单的列名，如果不在keep_na中，则默认输出到黑名单
+    :param inplace: bool, 是否覆盖原始数据。清洗过程中需要对列取值进行字符化处理，默认处理结果直接覆盖原始值
+    :param fill: dict(str: (int, str)), 字符化填充说明，{需要填充的列名： (最终要填充达到的位数, 用来填充的字符)}
+    :param path_white: str, 白名单输出路径
+    :param path_black: str, 黑名单输出路径
+    :param show: bool, 是否打印清洗进度
+    :param reason: bool, 输出的黑名单是否添加剔除原因
+    :param default: bool, 黑白规则均无命中情况时是否默认判定为黑名单
+    :param sort: list(str), 输出黑白名单时的排序字段
+    :param ascending: bool or list of bool, 是否升序
+    :param match_cache: int, 跨sheet及excel缓存各规则匹配结果的取值个数上限（每个正则），默认仅在各列的去重取值上匹配
+    :param engine: str, excel读取引擎，可选'calamine'（需安装python-calamine）及pandas支持的引擎，默认为pandas默认引擎
+    :param regex_backend: str, 正则引擎，可选're'（默认）、'regex'、're2'（线性时间，需安装google-re2），未安装或不支持的正则改用re
+    :param reason_format: str, 剔除原因的输出格式，'wide'为每个黑规则一列（<列名>_black）及default_black列，
+                          'bitmask'为单个整数列drop_reason（第i位为black中第i个规则列，最高位为default_black），
+                          'code'为单个整数列drop_reason（规则行与命中情况的组合代码）；
+                          后两者的图例保存在黑名单路径下的reason_legend.csv，可用expand_reason还原成'wide'格式
+    :return: 清洗完的本地excel文件（黑白名单）
+    """
+    if not white and not black:
+        _input_error('请设置相应的清洗规则')
+        return
+    if reason_format not in ('wide', 'bitmask', 'code'):
+        _input_error("\n不支持的剔除原因格式%s，可选'wide'、'bitmask'、'code'" % reason_format)
+        return
+    if not black:
+        black = dict()
+    if not keep_na:
+        keep_na = list()
+    # 输出路径准备，用于存放清洗结果
+    if path_white:
+        if not os.path.exists(path_white):
+            os.mkdir(path_white)
+    else:
+        path_white = path + 'white/'
+        if not os.path.exists(path_white):
+            os.mkdir(path_white)
+    if path_black:
+        if not os.path.exists(path_black):
+            os.mkdir(path_black)
+    else:
+        path_black = path + 'black/'
+        if not os.path.exists(path_black):
+            os.mkdir(path_black)
+    # 三层循环，第一层遍历excel，第二层遍历excel中的每一个sheet，第三层遍历执行每个sheet相应的清洗规则
+    excel_files = [f[:-5] for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)) and (f[-4:] == 'xlsx')]
+    # 规则按 excel-sheet 分组并预先编译正则
+    rule_set = df if isinstance(df, RuleSet) else RuleSet(df, keys=[primary['excel'], primary['sheet']],
+                                                            patterns=list(white.values()) + list(black.values()),
+                                                            district=None, backend=regex_backend)
+    cache = _MatchCache(maxsize=match_cache) if match_cache else None
+    # 剔除原因的位：black中第i个规则列为第i位，默认判为黑名单为最高位；code格式按 (excel, sheet, 规则, 位掩码) 依次编号
+    reason_columns = [key + '_black' for key in black.keys()] + ['default_black']
+    reason_bits = 2 ** np.arange(len(black))
+    reason_codes = dict()
+    # 第一层循环, 遍历excel
+    for excel in excel_files:
+        # 检查待清洗的excel是否存在相应的清洗规则，若无规则则跳过清洗下一个excel
+        if not rule_set.has(excel):
+            if show:
+                print("\n%s\t不在清洗规则表中, 清洗跳过" % excel)
+            continue
+        if show:  # 打印清洗进度
+            print("\n%s\t%s" % (excel, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())))
+
+        # 输出文件初始化
+        file_white = path_white + excel + '_white.xlsx'
+        file_black = path_black + excel + '_black.xlsx'
+        writer_white = pd.ExcelWriter(file_white)
+        writer_black = pd.ExcelWriter(file_black)
+
+        reader_raw = _ExcelReader(path + excel + '.xlsx', engine=engine, cache=True)
+
+        sheet_files = reader_raw.sheet_names  # 待清洗的sheet明细
+
+        # 第二层循环, 遍历sheet
+        for sheet in sheet_files:
+            # 检查待清洗的sheet是否存在相应的清洗规则，若无规则则跳过清洗下一个sheet
+            df_rule_sheet = rule_set.get(excel, sheet)  # sheet相应的清洗规则表
+            if df_rule_sheet is None:
+                if show:
+                    print("\t%s %s: 不在清洗规则表中, 清洗跳过" % (excel, sheet))
+                continue
+
+            # 先只读入执行清洗规则及需要填充的列，完整的行在输出时再读入
+            rule_columns = list(set(list(white.keys()) + list(black.keys())))
+            df_key = reader_raw.parse(sheet, usecols=list(dict.fromkeys(rule_columns + list(fill.keys() if fill else []))),
+                                      dtype=dtypes)
+
+            # 数据预处理：对指定的列进行填充补齐，缺失的地方默认仍保持缺失
+            if fill:
+                for col in fill.keys():
+                    df_key[col] = df_key[col].apply(lambda x: np.nan if str(x) == 'nan' else str(x).rjust(fill[col][0], fill[col][1]))
+            # 提取需要执行清洗规则的列并转成object型
+            df_raw_str = df_key[rule_columns].astype('object')
+            if upper and lower:
+                up_low = set(upper) & set(lower)
+                if len(up_low) > 0:
+                    print("\t%s同时出现在大小写转换要求中，将按小写转换处理" % up_low)
+            if upper:
+                for col in upper:
+                    df_raw_str[col] = df_raw_str[col].str.upper()
+            if lower:
+                for col in lower:
+                    df_raw_str[col] = df_raw_str[col].str.lower()
+
+            # 输出数据表初始化准备，各规则命中的行先记录行索引，输出时再从完整数据中提取
+            white_index = []
+            black_index = []  # [(行索引, 剔除原因或None)]
+
+            # 第三层循环，遍历执行相应的清洗规则
+            for j in range(len(df_rule_sheet)):
+                # 清洗算法：
+                # 第一步：基于规则black、white参数生成相应的布尔索引，基于keep_na参数对原始数据的na导致的布尔索引中的na进行填充,
+                #        在keep_na的填True, 不在则默认填False
+                # 第二步：合成布尔索引逻辑，确定命中的名单，对于每个样本，所有black为False且所有的white为True判为白名单，
+                #        至少一个black为True判为黑，否则判为灰
+                # 第三步：对于黑名单，基于reason参数确定是否在输出的数据表后追加命中原因（用0-1矩阵表示各规则命中情况）。
+                # 第四步：判断灰名单是否非空 且 还有规则未执行，是 则基于灰名单继续执行下一轮循环（第一至第四步），否 则执行下一步
+                # 第五步：判断灰名单是否非空，是则执行第六步，否则执行第七步
+                # 第六步：基于unknown参数判断灰名单是否应纳入白名单，默认纳入黑名单，黑名单则基于reason参数确定在输出的数据表后
+                #        追加命中原因（规则原因记为'unmatch',取值为1)
+                # 第七步：输出黑白名单
+                rules = df_rule_sheet.iloc[j]
+                df_bool_white = pd.DataFrame(index=df_raw_str.index)
+                for key in white.keys():
+                    # na需要保留时等价于命中白名单；正则仅在去重后的取值上执行
+                    df_bool_white[key + '_white'] = _match_unique(df_raw_str[key], rules[white[key]],
+                                                                  na=key in keep_na, cache=cache,
+                                                                  backend=regex_backend)
+                s_bool_white = df_bool_white.mean(1) == 1  # 合并索引，所有white均为True时才判定为白
+                if black:
+                    df_bool_black = pd.DataFrame(index=df_raw_str.index)
+                    for key in black.keys():
+                        # na需要保留时等价于没有命中黑名单
+                        df_bool_black[key + '_black'] = _match_unique(df_raw_str[key], rules[black[key]],
+                                                                      na=key not in keep_na, cache=cache,
+                                                                      backend=regex_backend)
+                    s_bool_white = np.logical_and(s_bool_white, df_bool_black.sum(1) == 0)
+                    # 合并索引，所有black均为False时才判定为白
+                    s_bool_black = df_bool_black.sum(1) > 0  # 合并索引，有一个black为True时则判定为黑
+
+                    if s_bool_black.sum() > 0:
+                        index_black = s_bool_black[s_bool_black].index  # 当前清洗规则所命中的黑名单
+                        # 是否增加被判为黑的原因
+                        df_reason = df_bool_black[s_bool_black].astype(int) if reason else None
+                        if reason and reason_format != 'wide':
+                            df_reason = _reason_encode(df_reason.values @ reason_bits, df_reason.index, reason_codes,
+                                                       (excel, sheet, df_rule_sheet.index[j]), reason_format)
+                        black_index.append((index_black, df_reason))
+                        df_raw_str.drop(index_black, inplace=True)  # 剔除黑名单，剩下的为灰名单
+
+                if s_bool_white.sum() > 0:
+                    index_white = s_bool_white[s_bool_white].index  # 当前清洗规则所命中的白名单
+                    white_index.append(index_white)  # 累计命中的白名单
+                    df_raw_str.drop(index_white, inplace=True)  # 剔除白名单，剩下的为灰名单
+
+                if len(df_raw_str) != 0 and (j < len(df_rule_sheet) - 1):  # 判断是否还有灰名单需要清洗 且 还有清洗规则未执行
+                    continue
+                elif len(df_raw_str) != 0:
+                    if default:  # 判断是否将灰名单纳入白名单
+                        white_index.append(df_raw_str.index)
+                    else:  # 默认判为黑名单
+                        df_reason = pd.DataFrame({'default_black': 1}, index=df_raw_str.index) if reason else None
+                        if reason and reason_format != 'wide':
+                            df_reason = _reason_encode(np.full(len(df_raw_str), 2 ** len(black)), df_raw_str.index,
+                                                       reason_codes, (excel, sheet, None), reason_format)
+                        black_index.append((df_raw_str.index, df_reason))
+                else:
+                    pass
+
+            # 读入完整的数据，按命中顺序提取黑白名单
+            df_raw = reader_raw.parse(sheet, dtype=dtypes)
+            if inplace and fill:
+                df_raw[list(fill.keys())] = df_key[list(fill.keys())]
+            df_white = pd.concat([df_raw.loc[index] for index in white_index]) if white_index else pd.DataFrame()
+            black_pieces = []
+            for index, df_reason in black_index:
+                df_black_tmp = df_raw.loc[index]
+                if df_reason is not None:
+                    df_black_tmp[df_reason.columns] = df_reason
+                black_pieces.append(df_black_tmp)
+            df_black = pd.concat(black_pieces) if black_pieces else pd.DataFrame()
+
+            if show:
+                count_raw = len(df_raw)
+                count_white = len(df_white)
+                count_black = len(df_black)
+                print("\t%s:共%d行，其中white:black = %.1f%% : %.1f%% = %d : %d" %
+                      (sheet, count_raw, (100*count_white/count_raw), (100*count_black/count_raw),
+                       count_white, count_black))
+
+            if len(df_white) > 0:
+                if sort:
+                    df_white.sort_values(by=sort, inplace=True, ascending=ascending)
+                df_white.to_excel(writer_white, sheet_name=sheet, index=None)
+            if len(df_black) > 0:
+                if sort:
+                    df_black.sort_values(by=sort, inplace=True, ascending=ascending)
+                df_black.to_excel(writer_black, sheet_name=sheet, index=None)
+        try:
+            writer_white.save()
+            writer_white.close()
+            writer_black.save()
+            writer_black.close()
+        except Exception:
+            print('--------------出错了----------------')
+            print('traceback.print_exc():')
+            print(traceback.print_exc())
+    if reason and reason_format != 'wide':
+        _reason_code_legend(reason_columns, reason_codes, reason_format).to_csv(path_black + 'reason_legend.csv',
+                                                                                index=False)
+
+
+def _reason_encode(mask, index, reason_codes, rule, reason_format):
+    """
+    将各行命中的黑规则位掩码编码成单个整数列
+    :param mask: array, 各行的位掩码
+    :param index: Index, 相应的行索引
+    :param reason_codes: dict, {(excel, sheet, 规则索引, 位掩码): 代码}，code格式时新出现的组合依次编号
+    :param rule: tuple, (excel, sheet, 规则在规则表中的索引)，默认判为黑名单时规则索引为None
+    :param reason_format: str, 'bitmask'或'code'
+    :return: DataFrame, drop_reason列
+    """
+    if reason_format == 'code':
+        codes = dict()
+        for value in np.unique(mask):
+            codes[value] = reason_codes.setdefault(rule + (int(value),), len(reason_codes) + 1)
+        mask = pd.Series(mask).map(codes).values
+    return pd.DataFrame({'drop_reason': mask}, index=index)
+
+
+def _reason_code_legend(reason_columns, reason_codes, reason_format):
+    """
+    剔除原因的图例
+    :param reason_columns: list(str), 各位相应的剔除原因列名，最后一列为default_black
+    :param reason_codes: dict, {(excel, sheet, 规则索引, 位掩码): 代码}
+    :param reason_format: str, 'bitmask'或'code'
+    :return: DataFrame, bitmask格式为位、取值及列名，code格式为代码、excel、sheet、规则及各剔除原因列（与'wide'格式一致）
+    """
+    if reason_format == 'bitmask':
+        return pd.DataFrame({'bit': range(len(reason_columns)), 'value': 2 ** np.arange(len(reason_columns)),
+                             'column': reason_columns})
+    records = list()
+    for (excel, sheet, rule, mask), code in reason_codes.items():
+        record = dict(code=code, excel=excel, sheet=sheet, rule=rule)
+        for bit, col in enumerate(reason_columns):
+            if rule is None:  # 默认判为黑名单的行只有default_black列
+                record[col] = 1 if col == 'default_black' else np.nan
+            else:
+                record[col] = np.nan if col == 'default_black' else (mask >> bit) & 1
+        records.append(record)
+    return pd.DataFrame(records, columns=['code', 'excel', 'sheet', 'rule'] + reason_columns)
+
+
+def expand_reason(df, legend, column='drop_reason'):
+    """
+    按图例将整数编码的剔除原因还原：clean_excel_sample的bitmask/code格式还原成'wide'格式的各剔除原因列，
+    industry_merchant_clean的code格式还原成剔除原因文本
+    :param df: DataFrame, 黑名单数据
+    :param legend: DataFrame or str, 图例或图例文件（reason_legend.csv、file_name_reason_legend.txt）
+    :param column: str, 剔除原因代码列名
+    :return: DataFrame, 代码列替换成还原后的列
+    """
+    if isinstance(legend, str):
+        legend = pd.read_csv(legend)
+    values = df[column].values.astype('int64')
+    df2 = df.drop(columns=column)
+    if 'bit' in legend.columns:
+        legend = legend.sort_values('bit')
+        default = (values & int(legend['value'].iloc[-1])) > 0
+        for bit, value, col in legend[['bit', 'value', 'column']].itertuples(index=False):
+            if col == 'default_black':
+                if default.any():
+                    df2[col] = 1 if default.all() else np.where(default, 1, np.nan)
+            elif not default.all():
+                hit = ((values & int(value)) > 0).astype(int)
+                df2[col] = np.where(default, np.nan, hit) if default.any() else hit
+        return df2
+    # 代码格式：还原图例中除代码及规则信息外的各列，与'wide'格式一致时去掉全为空的列
+    restore = [col for col in legend.columns if col not in ('code', 'excel', 'sheet', 'rule', 'district') and
+               not col.startswith('rule_')]
+    df_restore = legend.set_index('code')[restore].reindex(values)
+    df_restore = df_restore.dropna(axis=1, how='all')
+    for col in df_restore.columns:
+        df2[col] = df_restore[col].values
+    return df2
+
+
+def _excel_cell(value):
+    """
+    将python-calamine读取的单元格取值转换成与pandas读取结果一致的类型
+    :param value: 单元格取值
+    :return: 转换后的取值，空单元格为NaN，整数值的浮点数转成int，日期转成datetime
+    """
+    if value == '':
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        return dt.datetime.combine(value, dt.time())
+    return value
+
+
+class _ExcelReader(object):
+    """
+    excel读取器，按sheet读取数据表，支持只读取部分列（usecols）；
+    engine为'calamine'时使用python-calamine读取（需安装，未安装时使用pandas默认引擎），sheet整体解码一次，
+    单元格取值的类型转换及DataFrame构建只针对读取的列；
+    cache为True时缓存最近读取的sheet：pandas引擎下缓存已读取的列，再次读取时只解析尚未读取的列，
+    python-calamine下缓存解码后的数据行
+    """
+
+    def __init__(self, excel, engine=None, cache=False):
+        """
+        :param excel: str, 含有绝对路径及文件后缀的Excel文件，如d:/folder_name/file_name.xlsx
+        :param engine: str, 读取引擎，可选'calamine'及pandas支持的引擎，默认为pandas默认引擎
+        :param cache: bool, 是否缓存最近读取的sheet
+        """
+        self.cache = cache
+        self.cached = (None, None)
+        self.book = None
+        self.file = None
+        if engine == 'calamine':
+            try:
+                from python_calamine import CalamineWorkbook
+                self.book = CalamineWorkbook.from_path(excel)
+                self.sheet_names = self.book.sheet_names
+                return
+            except ImportError:
+                print("\n未安装python-calamine，使用pandas默认引擎读取excel")
+                engine = None
+        self.file = pd.ExcelFile(excel, engine=engine)
+        self.sheet_names = self.file.sheet_names
+
+    def _rows(self, sheet):
+        """
+        读取sheet的表头及数据行（剔除空行），表头规则与pandas一致
+        :param sheet: str, sheet名
+        :return: (list, list(list)), 表头及数据行
+        """
+        if self.cached[0] == sheet:
+            return self.cached[1]
+        rows = self.book.get_sheet_by_name(sheet).to_python()
+        header = []
+        seen = dict()
+        for j, cell in enumerate(rows[0] if rows else []):
+            col = 'Unnamed: %d' % j if cell == '' else _excel_cell(cell)
+            if col in seen:  # 重复列名依次加上.1、.2后缀
+                seen[col] += 1
+                col = '%s.%d' % (col, seen[col])
+            else:
+                seen[col] = 0
+            header.append(col)
+        rows = [row for row in rows[1:] if any(cell != '' for cell in row)]
+        if self.cache:
+            self.cached = (sheet, (header, rows))
+        return header, rows
+
+    @_quiet
+    def parse(self, sheet, usecols=None, dtype=None):
+        """
+        读取sheet数据表
+        :param sheet: str, sheet名
+        :param usecols: list, 读取的列名，默认读取所有列
+        :param dtype: str or dict, 各字段数据类型，同read_excel中的dtype
+        :return: DataFrame
+        """
+        if self.book is None:
+            if not self.cache:
+                return self.file.parse(sheet, usecols=usecols, dtype=dtype)
+            if self.cached[0] != sheet:  # 只读表头，数据列按需解析
+                self.cached = (sheet, (list(self.file.parse(sheet, nrows=0).columns), pd.DataFrame()))
+            header, df_read = self.cached[1]
+            columns = header if usecols is None else list(usecols)
+            missing = [col for col in columns if col not in header]
+            if missing:
+                raise ValueError("%s: 列%s不在sheet的列%s中" % (sheet, missing, header))
+            new = [col for col in header if col in columns and col not in df_read.columns]
+            if new:
+                # 按位置读取，重复列名加后缀后仍能对应
+                df_new = self.file.parse(sheet, usecols=[header.index(col) for col in new], dtype=dtype)
+                df_new.columns = new
+                if len(df_read.columns) == 0:
+                    df_read = df_new
+                elif len(df_new) == len(df_read):
+                    df_read = pd.concat([df_read, df_new], axis=1)
+                else:  # 行数对不上（如末尾空行的处理不同）时重新完整解析
+                    df_read = self.file.parse(sheet, dtype=dtype)
+                    df_read.columns = header
+                self.cached = (sheet, (header, df_read))
+            return df_read[columns].copy()
+
+        header, rows = self._rows(sheet)
+        columns = header if usecols is None else list(usecols)
+        missing = [col for col in columns if col not in header]
+        if missing:
+            raise ValueError("%s: 列%s不在sheet的列%s中" % (sheet, missing, header))
+        data = dict()
+        for col in columns:
+            j = header.index(col)
+            values = [_excel_cell(row[j]) for row in rows]
+            col_type = dtype.get(col) if isinstance(dtype, dict) else dtype
+            if col_type in ('str', str):
+                data[col] = pd.Series([value if value is np.nan else str(value) for value in values], dtype=object)
+            elif col_type in ('object', object):
+                data[col] = pd.Series(values, dtype=object)
+            else:
+                data[col] = pd.Series(values, dtype=object)
+                try:  # 与pandas一致，数字形式的文本同样转成数值
+                    data[col] = pd.to_numeric(data[col])
+                except (ValueError, TypeError):
+                    data[col] = data[col].infer_objects()
+                if col_type is not None:
+                    data[col] = data[col].astype(col_type)
+        return pd.DataFrame(data, columns=columns)
+
+
+def iter_excel(excel, col_type='str', usecols=None, engine=None, show=True):
+    """
+    逐个sheet读取excel文件，每次产出一个sheet的数据表，不在内存中累积
+    :param excel: str, 含有绝对路径及文件后缀的Excel文件，如d:/folder_name/file_name.xlsx
+    :param col_type: str or dict, 各字段数据类型
+    :param usecols: list, 读取的列名，默认读取所有列
+    :param engine: str, excel读取引擎，可选'calamine'（需安装python-calamine）及pandas支持的引擎，默认为pandas默认引擎
+    :param show: bool, 是否打印过程
+    :return: generator, 每次产出(sheet名, DataFrame)
+    """
+    reader = _ExcelReader(excel, engine=engine)
+    for sheet in reader.sheet_names:
+        df = reader.parse(sheet, usecols=usecols, dtype=col_type)
+        if show:
+            print('\t', sheet)
+        yield sheet, df
+
+
+def iter_excels(path, col_type='str', usecols=None, engine=None, show=True):
+    """
+    逐个sheet读取路径中所有excel文件，每次产出一个sheet的数据表，不在内存中累积
+    :param path: str, Excel文件所在路径，如d:/folder_name/
+    :param col_type: str or dict, 各字段数据类型
+    :param usecols: list, 读取的列名，默认读取所有列
+    :param engine: str, excel读取引擎，可选'calamine'（需安装python-calamine）及pandas支持的引擎，默认为pandas默认引擎
+    :param show: boolean, 是否打印过程
+    :return: generator, 每次产出(excel文件名, sheet名, DataFrame)
+    """
+    excels = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)) and (f[-4:] == 'xlsx')]
+    for excel in excels:
+        if show:
+            print(excel)
+        for sheet, df in iter_excel(path + excel, col_type=col_type, usecols=usecols, engine=engine, show=show):
+            yield excel, sheet, df
+
+
+def excel_to_df(excel, col_type='str', show=True, usecols=None, engine=None):
+    """
+    将excel文件中的所有sheet工作表合并成一个DataFrame
+    :param excel: str, 含有绝对路径及文件后缀的Excel文件，如d:/folder_name/file_name.xlsx
+    :param col_type: str or dict, 各字段数据类型
+    :param show: bool, 是否打印过程
+    :param usecols: list, 读取的列名，默认读取所有列
+    :param engine: str, excel读取引擎，可选'calamine'（需安装python-calamine）及pandas支持的引擎，默认为pandas默认引擎
+    :return: DataFrame
+    """
+    dfs = [df for _, df in iter_excel(excel, col_type=col_type, usecols=usecols, engine=engine, show=show)]
+    return pd.concat(dfs) if dfs else pd.DataFrame()
+
+
+def excels_to_df(path, col_type='str', show=True, usecols=None, engine=None):
+    """
+    将路径中所有excel文件的所有sheet工作表合并成一个DataFrame
+    :param path: str, Excel文件所在路径，如d:/folder_name/
+    :param col_type: str or dict, 各字段数据类型
+    :param show: boolean, 是否打印过程
+    :param usecols: list, 读取的列名，默认读取所有列
+    :param engine: str, excel读取引擎，可选'calamine'（需安装python-calamine）及pandas支持的引擎，默认为pandas默认引擎
+    :return: DataFrame
+    """
+    dfs = [df for _, _, df in iter_excels(path, col_type=col_type, usecols=usecols, engine=engine, show=show)]
+    return pd.concat(dfs) if dfs else pd.DataFrame()
+
+
+def data_masking(df, masking):
+    """
+    对数据表指定列进行相应数量级的脱敏处理，脱敏列保持原有位置，列名加上脱敏数量级后缀
+    :param df: DataFrame, 待脱敏的数据表
+    :param masking: dic(str: int), {待脱敏的列名: 相应的脱颖数量级}
+    :return: DataFrame
+    """
+    columns = list(masking.keys())
+    levels = list(masking.values())
+    df_masking = df.copy()
+    df_masking[columns] = _mask_values(df[columns].to_numpy(dtype=float), levels)
+    df_masking.rename(columns={column: column + _MASKING_SUFFIX[level] for column, level in masking.items()},
+                      inplace=True)
+    return df_masking
+
+
+@_quiet
+def excels_masking(path, masking, path_output=None, show=True, dtype='object'):
+    """
+    将路径中所有excel文件的所有sheet工作表的指定列进行相应数量级的数据脱敏
+    :param path: str, 含有绝对路径及文件后缀的Excel文件，如d:/folder_name/file_name.xlsx
+    :param masking: dic, 待脱敏的列名及相应的脱颖数量级
+    :param path_output: str, 脱敏数据输出保存路径
+    :param show: boolean, 是否打印过程
+    :param dtype: str or dict, 导入数据表字段数据类型说明
+    :return 本地excel文件
+    """
+    # 两层循环，第一层遍历Excel工作簿，第二层遍历工作簿里面的sheet, 对数据表进行脱敏
+    if not path_output:
+        path_output = path + 'output/'
+    if not os.path.exists(path_output):
+        os.mkdir(path_output)
+    excels = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)) and (f[-4:] == 'xlsx')]
+    for excel in excels:
+        if show:
+            print(excel)
+        reader = pd.ExcelFile(path + excel)
+        writer = pd.ExcelWriter(path_output + excel)
+        sheet_names = reader.sheet_names
+        for sheet in sheet_names:
+            if show:
+                print('\t', sheet)
+            df_masking = data_masking(pd.read_excel(reader, sheet_name=sheet, dtype=dtype), masking=masking)
+            df_masking.to_excel(writer, index=False, sheet_name=sheet)
+        writer.save()
+        writer.close()
+
+
+def company_file_rule_check(rule, path):
+    """
+    检查是否有公司缺少清洗规则
+    :param rule: DataFrame, 清洗规则表
+    :param path: str, 以公司名称命名的Excel文件所在路径
+    :return: (print)
+    """
+    excel_files = pd.Series([f[:-5] for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)) and (f[-4:] == 'xlsx')])
+    check = excel_files[~excel_files.isin(rule['company'].unique())]
+    if len(check) > 0:
+        print("\n注意！下列Excel文件名与清洗规则表的公司名未匹配上\n", check)
+    else:
+        print("检查完毕，待清洗的公司文档集合中未发现有公司缺清洗规则")
@@ -0,0 +1,244 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+批量作业调度及命令行入口
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import datetime as dt
+import glob
+import importlib
+import inspect
+import json
+import os
+import time
+import traceback
+
+from . import _common
+from ._common import np, pd, _read_rule, RuleSet, _COMPRESSION_SUFFIX
+
+
+_RULE_PARAM = {'industry_merchant_clean': 'df_rule', 'clean_excel_sample': 'df'}  # 各函数接收规则表的参数名
+_INPUT_PARAM = {'clean_excel_sample': 'path'}  # 输入不是第一个参数的函数接收输入的参数名
+_EXPANSION = 10  # 文本数据块切分成DataFrame后的内存膨胀倍数，与_ChunkSizer的保守估计一致
+_EXCEL_EXPANSION = 30  # excel整表读入后的内存膨胀倍数（xlsx为压缩格式，解压后再转成DataFrame）
+
+
+def _input_size(file, largest=False):
+    """
+    计算作业输入的数据量，目录按其中所有文件的大小之和计算
+    :param file: str, 文件名或目录
+    :param largest: bool, 为True时目录取其中最大文件的大小
+    :return: int, 字节数，输入不存在时为0（作业执行时报错）
+    """
+    if not os.path.exists(file):
+        return 0
+    if os.path.isdir(file):
+        sizes = [os.path.getsize(os.path.join(file, f)) for f in os.listdir(file)
+                 if os.path.isfile(os.path.join(file, f))]
+        return max(sizes, default=0) if largest else sum(sizes)
+    return os.path.getsize(file)
+
+
+def _estimate_memory(job):
+    """
+    估计单个作业占用的内存：参数中设置了memory_limit的取其值；分块读取的函数（含参数m）按数据块大小（不超过输入文件大小，
+    压缩文件按m计）× 膨胀倍数 × 同时驻留的数据块个数估计；其余整表读入的函数（如excel清洗）按输入中最大的文件 × 膨胀倍数估计
+    :param job: dict, 作业说明，见load_job_spec
+    :return: int, 预计占用的内存，单位为兆，至少为1
+    """
+    params = job['params']
+    if params.get('memory_limit'):
+        return int(params['memory_limit'])
+    func = getattr(importlib.import_module(__package__), job['function'], None)
+    try:
+        signature = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        signature = dict()
+    largest = _input_size(job['input'], largest=True) / 1024 / 1024
+    if 'm' in signature:
+        m = params.get('m', signature['m'].default)
+        chunk = m if job['input'].endswith(tuple(_COMPRESSION_SUFFIX.values())) else min(largest, m)
+        in_flight = 2 * params.get('queue_size', 2) if params.get('parallel_io') else 0
+        return max(int(np.ceil(chunk * _EXPANSION * (2 + in_flight))), 1)
+    return max(int(np.ceil(largest * _EXCEL_EXPANSION)), 1)
+
+
+def load_job_spec(file):
+    """
+    读取批量作业说明文件（JSON或YAML，YAML需安装pyyaml），展开为作业列表。格式如下：
+    {"workers": 4, "memory": 8000, "retries": 1, "path_log": "d:/logs/",
+     "jobs": [{"function": "industry_merchant_clean", "input": "d:/data/*.txt", "rule": "d:/rule.xlsx",
+               "memory": 2000, "params": {"columns": [...], "m": 20}}]}
+    其中input可为文件名、通配符或列表，每个输入文件展开为一个作业；rule为规则表文件（xlsx或csv，按字符串读入），
+    传给函数中相应的规则表参数（rule_param，默认按函数确定）；memory为单个作业预计占用的内存，单位为兆，
+    默认按输入数据量估计（见_estimate_memory）
+    :param file: str, 作业说明文件，含路径及后缀（.json、.yaml、.yml）
+    :return: (list(dict), dict), 作业列表及全局设置（workers、memory、retries、path_log）
+    """
+    with open(file, encoding='utf-8') as f:
+        if file.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                print("\n未安装pyyaml，无法读取YAML作业说明，请改用JSON格式")
+                return [], dict()
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    jobs = []
+    for job in spec.get('jobs', []):
+        inputs = job['input'] if isinstance(job['input'], list) else [job['input']]
+        files = []
+        for pattern in inputs:
+            files.extend(sorted(glob.glob(pattern)) or [pattern])
+        for input_file in files:
+            jobs.append(dict(function=job['function'], input=input_file, rule=job.get('rule'),
+                             rule_param=job.get('rule_param', _RULE_PARAM.get(job['function'])),
+                             memory=job.get('memory'), params=job.get('params', dict())))
+    settings = {key: spec[key] for key in ['workers', 'memory', 'retries', 'path_log'] if key in spec}
+    return jobs, settings
+
+
+def _run_job(job, log_file):
+    """
+    执行单个作业，函数的打印输出及报错信息追加写入作业日志；参数或输入有误（如找不到清洗规则）时函数抛出异常，作业判为失败
+    :param job: dict, 作业说明，见load_job_spec
+    :param log_file: str, 作业日志文件
+    :return: (bool, str), 是否成功及报错信息
+    """
+    with open(log_file, 'a', encoding='utf-8') as log, contextlib.redirect_stdout(log), \
+            contextlib.redirect_stderr(log):
+        print("======%s\t%s(%s)======" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), job['function'],
+                                         job['input']))
+        try:
+            _common._STRICT = True  # 作业进程中参数或输入有误时抛出异常
+            func = getattr(importlib.import_module(__package__), job['function'], None)
+            if job['function'].startswith('_') or not callable(func):
+                raise ValueError("函数%s不存在" % job['function'])
+            params = dict(job['params'])
+            if job.get('rule') and job['function'] == 'clean_excel_sample':  # 规则集按规则表哈希值缓存，各作业直接读取
+                params[job['rule_param']] = RuleSet.cached(
+                    job['rule'], keys=[params['primary']['excel'], params['primary']['sheet']],
+                    patterns=list(params['white'].values()) + list((params.get('black') or dict()).values()),
+                    district=None, backend=params.get('regex_backend', 're'))
+            elif job.get('rule') and job['function'] == 'industry_merchant_clean':
+                params[job['rule_param']] = RuleSet.cached(job['rule'], backend=params.get('regex_backend', 're'))
+            elif job.get('rule'):
+                params[job['rule_param']] = _read_rule(job['rule'])
+            if job['function'] in _INPUT_PARAM:
+                params[_INPUT_PARAM[job['function']]] = job['input']
+                func(**params)
+            else:
+                func(job['input'], **params)
+            return True, ''
+        except Exception as e:
+            traceback.print_exc()
+            return False, '%s: %s' % (type(e).__name__, e)
+
+
+def run_jobs(jobs, workers=1, memory=None, retries=0, path_log=None, show=True):
+    """
+    批量作业调度：作业按输入数据量从大到小提交到有界的进程池，同时运行的作业数不超过workers，
+    且预计占用的内存之和不超过memory（作业未设置memory时按输入数据量估计，单个作业超过预算时单独运行）；
+    失败的作业重新提交，最多重试retries次
+    :param jobs: list(dict), 作业列表，见load_job_spec
+    :param workers: int, 同时运行的最大作业数
+    :param memory: int, 内存预算，单位为兆，默认不限制
+    :param retries: int, 失败作业的最大重试次数
+    :param path_log: str, 作业日志的输出路径，默认为当前路径下的log文件夹
+    :param show: bool, 是否打印调度过程
+    :return: DataFrame, 作业汇总表（状态、尝试次数、耗时及日志文件），同时保存为本地文件
+    """
+    if not path_log:
+        path_log = 'log/'
+    if not os.path.exists(path_log):
+        os.makedirs(path_log, exist_ok=True)
+    for j, job in enumerate(jobs):
+        job['id'] = j
+        job['size'] = _input_size(job['input'])
+        job['memory'] = job.get('memory') or _estimate_memory(job)
+        job['log'] = os.path.join(path_log, '%03d_%s_%s.log' % (j, job['function'],
+                                                                 os.path.basename(job['input'].rstrip('/'))))
+        job['attempts'] = 0
+        job['seconds'] = 0.0
+        job['status'] = 'pending'
+        job['error'] = ''
+    # 大文件优先，缩短整体耗时
+    pending = sorted(jobs, key=lambda x: x['size'], reverse=True)
+    running = dict()  # {future: (作业, 开始时间)}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while pending or running:
+            # 在并发数及内存预算内依次提交作业，跳过暂时放不下的作业
+            used = sum(job['memory'] for job, _ in running.values())
+            for job in list(pending):
+                if len(running) >= max(workers, 1):
+                    break
+                need = job['memory']
+                if running and memory and used + need > memory:
+                    continue
+                pending.remove(job)
+                job['attempts'] += 1
+                running[executor.submit(_run_job, job, job['log'])] = (job, time.time())
+                used += need
+                if show:
+                    print("%s\t开始作业%d: %s(%s)，约%.1fM，预计内存%dM，第%d次" % (
+                        dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), job['id'], job['function'], job['input'],
+                        job['size'] / 1024 / 1024, job['memory'], job['attempts']))
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                job, start = running.pop(future)
+                job['seconds'] += time.time() - start
+                try:
+                    success, error = future.result()
+                except Exception as e:  # 进程异常退出等
+                    success, error = False, '%s: %s' % (type(e).__name__, e)
+                job['status'] = 'success' if success else 'failed'
+                job['error'] = error
+                if not success and job['attempts'] <= retries:
+                    pending.insert(0, job)  # 重试的作业优先提交
+                if show:
+                    print("%s\t作业%d%s%s" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), job['id'],
+                                             '完成' if success else '失败：', error))
+
+    df_summary = pd.DataFrame([{'job': job['id'], 'function': job['function'], 'input': job['input'],
+                                'size(M)': round(job['size'] / 1024 / 1024, 1), 'memory(M)': job['memory'],
+                                'status': job['status'],
+                                'attempts': job['attempts'], 'seconds': round(job['seconds'], 1),
+                                'error': job['error'], 'log': job['log']} for job in jobs])
+    df_summary.to_csv(os.path.join(path_log, 'summary.txt'), index=False, encoding='utf-8')
+    if show:
+        print("\n======作业汇总：共%d个，成功%d个，失败%d个======" % (
+            len(df_summary), (df_summary['status'] == 'success').sum(), (df_summary['status'] != 'success').sum()))
+        print(df_summary[['job', 'function', 'input', 'size(M)', 'status', 'attempts', 'seconds']].to_string(index=False))
+    return df_summary
+
+
+def _main(argv=None):
+    """
+    命令行入口：python -m raccoon jobs.json [--workers 4] [--memory 8000] [--retries 1] [--path-log d:/logs/]，
+    命令行参数优先于作业说明文件中的全局设置
+    :param argv: list(str), 命令行参数，默认取sys.argv
+    :return: int, 退出码，所有作业成功时为0
+    """
+    parser = argparse.ArgumentParser(description='raccoon批量作业')
+    parser.add_argument('spec', help='作业说明文件（JSON或YAML）')
+    parser.add_argument('--workers', type=int, help='同时运行的最大作业数')
+    parser.add_argument('--memory', type=int, help='内存预算，单位为兆')
+    parser.add_argument('--retries', type=int, help='失败作业的最大重试次数')
+    parser.add_argument('--path-log', help='作业日志的输出路径')
+    args = parser.parse_args(argv)
+    jobs, settings = load_job_spec(args.spec)
+    if not jobs:
+        print("\n作业说明中没有作业")
+        return 1
+    for key in ['workers', 'memory', 'retries', 'path_log']:
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    df_summary = run_jobs(jobs, **settings)
+    return 0 if (df_summary['status'] == 'success').all() else 1
@@ -0,0 +1,320 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+基于规则表生成SQL语句
+"""
+
+import os
+
+from ._common import np, pd
+
+
+def func_where_sql(df, white, black=None, lower=None, upper=None):
+    """
+    基于各字段的黑白清洗/筛选规则（正则表达式）生成相应的HQL筛选条件
+    :param df: 清洗/筛选规则表，采用python表达式语法描述各样本相应字段需要满足的清洗/筛选规则
+    :param white: {str: str}, {数据库字段名：规则表相应的白名单字段名}
+    :param black: {str: str}, {数据库字段名：规则字表相应的黑名单字段名}
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :return: str, where部分的HiveSQL语句
+    """
+    if not lower:
+        lower = list()
+    if not upper:
+        upper = list()
+    condition = list()
+    if white:
+        for col in white.keys():
+            if str(df[white[col]]) in ['|', "nan", 'None', ""]:
+                continue
+            elif col in lower and len(lower) > 0:
+                condition.append("lower(" + col + ") rlike \"" + df[white[col]] + "\"")
+            elif col in upper and len(upper) > 0:
+                condition.append("upper(" + col + ") rlike \"" + df[white[col]] + "\"")
+            else:
+                condition.append(col + " rlike \"" + str(df[white[col]]) + "\"")
+    if black:
+        for col in black.keys():
+            if str(df[black[col]]) in ['/', "nan", 'None', ""]:
+                continue
+            elif col in lower and len(lower) > 0:
+                condition.append("lower(" + col + ") not rlike \"" + df[black[col]] + "\"")
+            elif col in lower and len(upper) > 0:
+                condition.append("upper(" + col + ") not rlike \"" + df[black[col]] + "\"")
+            else:
+                condition.append(col + " not rlike \"" + str(df[black[col]]) + "\"")
+    if condition:
+        return "(" + " and ".join(condition) + ")"
+    else:
+        return ""
+
+
+def _join_series(parts, sep):
+    """
+    逐行拼接多个字符串Series，跳过空字符串
+    :param parts: list(Series), 待拼接的字符串Series，索引一致
+    :param sep: str, 分隔符
+    :return: Series
+    """
+    joined = None
+    for part in parts:
+        if joined is None:
+            joined = part
+            continue
+        joined = pd.Series(np.where(joined == '', part, np.where(part == '', joined, joined + sep + part)),
+                           index=part.index)
+    return joined
+
+
+def _where_series(df, white, black=None, lower=None, upper=None):
+    """
+    按列拼接字符串，生成各规则的HQL筛选条件，结果与逐行执行func_where_sql一致
+    :param df: DataFrame, 含有各字段白/黑规则（正则表达式）的规则表
+    :param white: {str: str}, {数据库字段名：规则表相应的白名单字段名}
+    :param black: {str: str}, {数据库字段名：规则表相应的黑名单字段名}
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :return: Series
+    """
+    lower = lower or list()
+    upper = upper or list()
+    parts = [pd.Series('', index=df.index)]
+    for rules, op, skip in [(white or dict(), " rlike \"", '|'), (black or dict(), " not rlike \"", '/')]:
+        for col, rule_col in rules.items():
+            s = df[rule_col].astype(str)
+            if col in lower:
+                expr = "lower(" + col + ")"
+            elif col in upper and op == " rlike \"":  # 黑名单仅支持lower，与func_where_sql一致
+                expr = "upper(" + col + ")"
+            else:
+                expr = col
+            parts.append((expr + op + s + "\"").where(~s.isin([skip, 'nan', 'None', '']), ''))
+    condition = _join_series(parts, " and ")
+    return ("(" + condition + ")").where(condition != '', '')
+
+
+def _matching_subqueries(df, from_table, limit=None, name=None, equal=None, white=None, black=None, lower=None,
+                         upper=None):
+    """
+    按列拼接字符串，生成各规则相应的标签匹配子查询
+    :param df: DataFrame, 匹配规则表
+    :param from_table: str, 数据库用来匹配标签的原始表名称
+    :param limit: int, 各子查询的limit取值
+    :param name: {str: str}, 数据库新增的标签字段名：规则表相应的标签值字段名
+    :param equal: {str: str}, 数据库执行相等规则字段名：规则表相应的相等规则字段名
+    :param white: {str: str}, 数据库执行白名单规则字段名：规则表相应的白名单规则字段名
+    :param black: {str: str}, 数据库执行黑名单规则字段名：规则表相应的黑名单规则字段名
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :return: Series, 各规则的子查询语句
+    """
+    # 生成别名
+    as_sql = _join_series([pd.Series('', index=df.index)] + [
+        "\"" + df[name[col]].astype(str) + "\" as " + str(col) + "," for col in (name or dict()).keys()], " ")
+    # 基于取值相等进行筛选
+    where_hql = _join_series([pd.Series('', index=df.index)] + [
+        str(col) + "= \"" + df[equal[col]].astype(str) + "\"" for col in (equal or dict()).keys()], "and ")
+    # 基于黑白规则正则表达式进行筛选
+    if white or black:
+        where_hql2 = _where_series(df, white=white, black=black, lower=lower, upper=upper)
+        where_hql = where_hql + " and " + where_hql2 if equal else where_hql2
+    sub_table = "select " + as_sql + " * from " + from_table + " where " + where_hql
+    if limit:
+        sub_table = sub_table + " limit " + str(int(limit))
+    return sub_table
+
+
+def sql_where_expression(df, white, black=None, lower=None, upper=None):
+    """
+    基于各字段的黑白规则生成相应的HQL筛选条件(where语句)
+    :param df: DataFrame, 含有各字段白/黑规则（正则表达式）的规则表
+    :param white: {str: str}, {数据库字段名：关键字表相应的白名单字段名}
+    :param black: {str: str}, {数据库字段名：关键字表相应的黑名单字段名}
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :return: Series
+    """
+    return _where_series(df, white=white, black=black, lower=lower, upper=upper)
+
+
+def join_sql_where_expression(condition, how="or"):
+    """
+
+    :param condition: Series, SQL逻辑表达式
+    :param how: str, SQL逻辑表达式的连接方法，如'and'或'or'
+    :return: str
+    """
+    sql = "\n\t(\n\t\t" + (" \n\t\t" + how + " ").join(condition) + "\n\t)"
+    return sql
+
+
+def create_sql(select, from_table, head="", create_table=None, location=None, where=None, group_by=None, order_by=None,
+               limit=None):
+    """
+    生成HQL
+    :param select: str, select语句中的字段名
+    :param from_table: str, from语句中的表名
+    :param head: str, 系统设置语句
+    :param create_table, str, create语句中的表名
+    :param location: str, create语句中的存储位置
+    :param where: str, where语句中的表达式
+    :param group_by: str, group by语句中的字段名
+    :param order_by: str, order by语句中的字段名
+    :param limit: int, limit语句中的行数
+    :return: str, hql语句
+    """
+    if create_table:
+        drop_sql = "\ndrop table if exists " + create_table + ";"
+        if location:
+            create = "\ncreate table " + create_table + " stored as orcfile location '" + location + "' as\n"
+        else:
+            create = "\ncreate table " + create_table + " stored as orcfile as\n"
+    else:
+        drop_sql, create = "", ""
+    select_sql = "select\n\t" + select
+    from_sql = "\n\tfrom " + from_table
+    if where:
+        where_sql = "\n\twhere " + where
+    else:
+        where_sql = ""
+    if group_by:
+        group_by_sql = "\n\tgroup by " + group_by
+    else:
+        group_by_sql = ""
+    if order_by:
+        order_by_sql = "\n\torder by " + order_by
+    else:
+        order_by_sql = ""
+    if limit:
+        limit_sql = "\n\tlimit " + str(int(limit))
+    else:
+        limit_sql = ""
+    sql = head + drop_sql + create + select_sql + from_sql + where_sql + group_by_sql + order_by_sql + limit_sql
+    return sql + "\n\t;\n"
+
+
+def save_to_file(file, contents, mode='w', encoding='utf-8'):
+    """
+    保存到本地文件
+    :param file: str, 本地文件名
+    :param contents: str, 待保存的对象
+    :param mode: str, 打开文件的模式, 'w'为新建或覆盖, 'a'为新建或追加
+    :param encoding: str, 编码方式
+    :return: 本地file文件
+    """
+    fh = open(file, mode=mode, encoding=encoding)
+    fh.write(contents)
+    fh.close()
+
+
+def create_matching_sql(df, create_table, from_table, location=None, limit=None, head="", name=None, equal=None,
+                        white=None, black=None, lower=None, upper=None):
+    """
+    基于规则表生成标签匹配HiveSQL
+    :param df: DataFrame, 匹配规则表
+    :param create_table: str, 数据库新建表名称，用于存放查询结果
+    :param location: str, 数据库新建表的存储路径
+    :param from_table: str, 数据库用来匹配标签的原始表名称
+    :param limit: int, HiveSQL脚本中的limit取值
+    :param head: str, 系统设置语句
+    :param name: {str: str}, 数据库新增的标签字段名：规则表相应的标签值字段名
+    :param equal: {str: str}, 数据库执行相等规则字段名：规则表相应的相等规则字段名
+    :param white: {str: str}, 数据库执行白名单规则字段名：规则表相应的白名单规则字段名
+    :param black: {str: str}, 数据库执行黑名单规则字段名：规则表相应的黑名单规则字段名
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :return: str, HiveSQL脚本
+    """
+    sub_table = _matching_subqueries(df, from_table, limit=limit, name=name, equal=equal, white=white, black=black,
+                                     lower=lower, upper=upper)
+    drop_sql = "\ndrop table if exists " + create_table + ";\n"
+    if location:
+        create_select_sql = "create table " + create_table + " stored as orcfile location '" + location \
+                            + "' as\nselect distinct a.*"
+    else:
+        create_select_sql = "create table " + create_table + " stored as orcfile as\nselect distinct a.*"
+    from_sql = "\nfrom\n\t(\n\t" + " union all\n\t".join(sub_table) + "\n\t) a;\n"
+
+    sql = head + drop_sql + create_select_sql + from_sql
+    return sql
+
+
+def create_matching_sql_batches(df, create_table, from_table, location=None, limit=None, head="", name=None,
+                                equal=None, white=None, black=None, lower=None, upper=None, max_rules=500,
+                                max_bytes=1 << 20, dedup=True, path_output=None):
+    """
+    基于规则表分批生成标签匹配HiveSQL：规则按顺序切分成若干批，每批的规则数不超过max_rules、脚本大小不超过max_bytes，
+    先由建表脚本创建共享的目标表，再由各批脚本insert into写入，各批脚本之间相互独立，可并行提交。
+    distinct仅在批内去重，同一条数据命中不同批次的规则时会重复写入，dedup为True时最后由去重脚本对目标表整体去重，
+    结果与create_matching_sql一致
+    :param df: DataFrame, 匹配规则表
+    :param create_table: str, 数据库新建表名称，各批查询结果共同写入该表
+    :param from_table: str, 数据库用来匹配标签的原始表名称
+    :param location: str, 数据库新建表的存储路径
+    :param limit: int, 各子查询的limit取值
+    :param head: str, 系统设置语句，添加在每个脚本开头
+    :param name: {str: str}, 数据库新增的标签字段名：规则表相应的标签值字段名
+    :param equal: {str: str}, 数据库执行相等规则字段名：规则表相应的相等规则字段名
+    :param white: {str: str}, 数据库执行白名单规则字段名：规则表相应的白名单规则字段名
+    :param black: {str: str}, 数据库执行黑名单规则字段名：规则表相应的黑名单规则字段名
+    :param lower: list, 执行SQL时需要先将取值转成小写再执行规则的字段名，默认为空
+    :param upper: list, 执行SQL需要先将取值转成大写再执行规则的字段名，默认为空
+    :param max_rules: int, 每批的规则数上限（即union all的子查询个数）
+    :param max_bytes: int, 每批脚本的字节数上限，单条规则超过上限时单独成批
+    :param dedup: bool, 是否在各批插入完成后对目标表整体去重（insert overwrite ... select distinct），仅有一批时无需去重
+    :param path_output: str, 脚本的保存路径，设置时保存为create_table_create.sql、create_table_001.sql等
+                        及create_table_dedup.sql
+    :return: list(str), HiveSQL脚本，第一个为建表脚本，其后为各批的插入脚本，去重时最后一个为去重脚本（须在各批完成后执行）
+    """
+    sub_table = _matching_subqueries(df, from_table, limit=limit, name=name, equal=equal, white=white, black=black,
+                                     lower=lower, upper=upper)
+    if len(sub_table) == 0:
+        print("\n规则表为空，无需生成SQL")
+        return []
+    # 建表：以第一条规则的查询结构建空表
+    if location:
+        create_sql = "create table " + create_table + " stored as orcfile location '" + location + "' as\n"
+    else:
+        create_sql = "create table " + create_table + " stored as orcfile as\n"
+    scripts = [head + "\ndrop table if exists " + create_table + ";\n" + create_sql + "select a.*\nfrom\n\t(\n\t" +
+               sub_table.iloc[0] + "\n\t) a\nwhere 1 = 0;\n"]
+
+    # 按规则数及字节数切分批次
+    insert_sql = head + "\ninsert into table " + create_table + "\nselect distinct a.*\nfrom\n\t(\n\t"
+    tail_sql = "\n\t) a;\n"
+    sep = " union all\n\t"
+    fixed = len((insert_sql + tail_sql).encode('utf-8'))
+    sizes = sub_table.str.encode('utf-8').str.len().to_numpy() + len(sep)
+    bounds = [0]
+    size = fixed
+    for i, n in enumerate(sizes):
+        if i > bounds[-1] and (i - bounds[-1] >= max_rules or (max_bytes and size + n > max_bytes)):
+            bounds.append(i)
+            size = fixed
+        size += n
+    bounds.append(len(sizes))
+    values = sub_table.tolist()
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        scripts.append(insert_sql + sep.join(values[start:end]) + tail_sql)
+    n_batches = len(scripts) - 1
+    dedup = dedup and n_batches > 1
+    if dedup:  # 跨批次的重复数据整体去重
+        scripts.append(head + "\ninsert overwrite table " + create_table + "\nselect distinct a.*\nfrom " +
+                       create_table + " a;\n")
+
+    if path_output:
+        if not os.path.exists(path_output):
+            os.makedirs(path_output)
+        save_to_file(os.path.join(path_output, create_table + "_create.sql"), scripts[0])
+        for i, script in enumerate(scripts[1:n_batches + 1], 1):
+            save_to_file(os.path.join(path_output, "%s_%03d.sql" % (create_table, i)), script)
+        if dedup:
+            save_to_file(os.path.join(path_output, create_table + "_dedup.sql"), scripts[-1])
+    print("\n%d条规则分成%d批，每批最多%d条规则，最大脚本%.1fKB%s" % (
+        len(values), n_batches, max(np.diff(bounds)),
+        max(len(x.encode('utf-8')) for x in scripts[1:n_batches + 1]) / 1024, "，各批完成后执行去重脚本" if dedup else ""))
+    return scripts
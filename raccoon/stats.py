@@ -0,0 +1,450 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+数据表的解码、转置及流水统计
+"""
+
+import datetime as dt
+import pickle
+
+from ._common import np, pd, _quiet
+
+
+def type_decode(df, coding, code, decode):
+    """
+    对列值进行解码，即把取值为代码的列解码成相应的实际名称，解码结果以新的列追加到原表末尾
+    :param df: DataFrame, 含有待解码列的数据表
+    :param coding: DataFrame, 编码-解码表
+    :param code: list, 需要解码的列名
+    :param decode: dict, 编码-解码表中的对应关系，{编码字段名：相应解码字段名}
+    :return: DataFrame
+    """
+    if len(code) != len(decode):
+        print("\n编码与解码字段个数不匹配，请重新输入\n")
+        return df
+    decode_key = list(decode.keys())
+    decode_value = list(decode.values())
+    # 检查唯一性
+    coding_tmp = coding[decode_key + decode_value].drop_duplicates()
+
+    check_code = coding_tmp.groupby(decode_key)[decode_value].count().reset_index()
+    check_code = check_code[check_code[decode_value].sum(1) > len(decode_value)]
+    if len(check_code) > 0:
+        print("\n编码与解码为一对多，不满住唯一性，请检查:\n")
+        print(check_code)
+
+    check_decode = coding_tmp.groupby(decode_value)[decode_key].count().reset_index()
+    check_decode = check_decode[check_decode[decode_key].sum(1) > len(decode_key)]
+    if len(check_decode) > 0:
+        print("\n解码与编码值为一对多，不满住唯一性，请检查:\n")
+        print(check_decode)
+
+    # 开始解码
+    coding_tmp.columns = code + decode_value
+    df2 = df.merge(coding_tmp, how='left', on=code)
+    df_check = df2[code + decode_value].drop_duplicates()
+    df_check = df_check[df_check.isna().sum(1) > 0]
+    if len(df_check) > 0:
+        print("\n注意，存在解码失败，请检查：\n")
+        print(df_check)
+    return df2
+
+
+def _join_groups(codes, values, n_groups, sep="|", unique=False, sort=False):
+    """
+    按分组编号将取值用分隔符连接起来（向量化实现，避免逐组调用Python函数）
+    :param codes: ndarray, 各行的分组编号，-1表示不参与分组
+    :param values: Series, 需要连接的取值
+    :param n_groups: int, 分组个数
+    :param sep: str, 连接的分隔符
+    :param unique: bool, 是否对组内取值去重（保留首次出现的顺序）
+    :param sort: bool, 是否对组内取值排序
+    :return: list, 各组连接后的字符串，组内无有效取值时为NaN
+    """
+    keep = (codes >= 0) & values.notna().to_numpy()
+    df_value = pd.DataFrame({'code': codes[keep], 'value': values[keep].astype(str).to_numpy()})
+    if unique:
+        df_value = df_value.drop_duplicates()
+    df_value = df_value.sort_values(['code', 'value'] if sort else 'code', kind='mergesort')
+    value_list = df_value['value'].tolist()
+    bounds = np.searchsorted(df_value['code'].to_numpy(), np.arange(n_groups + 1))
+    return [sep.join(value_list[a:b]) if b > a else np.nan for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def format_adjust(df, base, transpose, sep="|", name=None, unique=False, sort=False):
+    """
+    列装置（针对一对多情况）
+    :param df: DataFrame, 数据表
+    :param base: list, 基础列列名
+    :param transpose: str or list, 需要转置列的列名，可同时转置多列
+    :param sep : str, 转置后用于连接的分隔符
+    :param name : str or list, 装置后的列名，与transpose一一对应
+    :param unique: bool, 是否对连接的取值去重（保留首次出现的顺序）
+    :param sort: bool, 是否对连接的取值排序，默认按原表中的顺序连接
+    :return: DataFrame
+    """
+    transpose = [transpose] if isinstance(transpose, str) else list(transpose)
+    if name:
+        name = [name] if isinstance(name, str) else list(name)
+    else:
+        name = transpose
+    # 分组编号按基础列排序，基础列含空值的行不参与分组
+    codes = df.groupby(base, sort=True).ngroup().to_numpy()
+    groups, first = np.unique(codes, return_index=True)
+    first = first[groups >= 0]
+    df2 = df[base].iloc[first].reset_index(drop=True)
+    for col, col_name in zip(transpose, name):
+        df2[col_name] = _join_groups(codes, df[col], len(first), sep=sep, unique=unique, sort=sort)
+    return df2
+
+
+def format_explode(df, columns, sep="|", zipped=True, chunksize=None):
+    """
+    列展开，format_adjust的逆操作：将用分隔符连接的单元格拆分成多行
+    :param df: DataFrame, 数据表
+    :param columns: str or list, 需要展开列的列名
+    :param sep: str, 连接的分隔符
+    :param zipped: bool, 多列展开时，True表示各列按位置一一对应展开（同一行各列的取值个数须相同），False表示各列依次展开（笛卡尔积）
+    :param chunksize: int, 分块展开的行数，设置时返回逐块输出的生成器，避免一次性展开占用大量内存
+    :return: DataFrame or generator
+    """
+    columns = [columns] if isinstance(columns, str) else list(columns)
+
+    def explode(df_chunk):
+        df_chunk = df_chunk.copy()
+        for col in columns:
+            df_chunk[col] = df_chunk[col].str.split(sep, regex=False)
+        if not zipped or len(columns) == 1:
+            for col in columns:
+                df_chunk = df_chunk.explode(col)
+            return df_chunk
+        lengths = [df_chunk[col].str.len().fillna(1).to_numpy() for col in columns]
+        if any((length != lengths[0]).any() for length in lengths[1:]):
+            raise ValueError("展开的各列取值个数不一致，请设置zipped=False")
+        return df_chunk.explode(columns)
+
+    if chunksize:
+        return (explode(df.iloc[start: start + chunksize]) for start in range(0, len(df), chunksize))
+    return explode(df)
+
+
+def year_month_to_date(df, year='年', month='月'):
+    """
+    将年和月两列合并成datetime.date类型的日期（格式为yyyy-mm-dd）
+    :param df: DataFrame, 数据表
+    :param year: str, 年份所在的列名
+    :param month: str, 月份所在的列名
+    :return: Series
+    """
+    date = df[year].astype(str) + df[month].apply(lambda x: str(x).rjust(2, '0'))
+    return date.apply(lambda x: dt.datetime.strptime(x, "%Y%m").date())
+
+
+def year_week_to_date(df, year='年', week='周'):
+    """
+    将年和周两列合并成datetime.date类型的日期（格式为yyyy-mm-dd）
+    :param df: DataFrame
+    :param year: str, df表中的年份字段名
+    :param week: str, df表中的周序字段名，定义方法为每年的1月1日起，每7天为一周
+    :return: Series
+    """
+    return df[[year, week]].apply(lambda x:  dt.date(int(x[year]), 1, 1) + dt.timedelta(7*(int(x[week]) - 1)), 1)
+
+
+def _brand_select(df, brand_range, left_on, right_on, date_in, date_out, date='日期'):
+    """
+    按品牌对应关键字表中的纳入、剔除日期筛选流水
+    :param df: DataFrame, 原始流水统计表
+    :param brand_range:  DataFrame, 品牌对应关键字表
+    :param left_on: list, 左表（df)连接键
+    :param right_on: list, 右表(brand_range)连接键
+    :param date_in: str, 纳入日期字段名，日期数据类型为yyyymmdd整型
+    :param date_out: str, 剔除日期字段名，日期数据类型为yyyymmdd整型
+    :param date: str, df表中的日期字段名，数据类型为datetime.date
+    :return: DataFrame, 纳入日期（含）至剔除日期（不含）之间的流水
+    """
+    # 表格合并
+    tmp = df.merge(
+        brand_range[right_on + [date_in, date_out]],
+        how='left',
+        left_on=left_on,
+        right_on=right_on)
+    # 品牌日期范围筛选
+    tmp[date_in].fillna(value=0, inplace=True)
+    tmp[date_out].fillna(value=29999999, inplace=True)
+
+    tmp['date_int'] = tmp[date].apply(lambda x: x.year * 10000 + x.month * 100 + x.day)  # 日期转成整型表示
+    return tmp[(tmp['date_int'] >= tmp[date_in]) & (tmp['date_int'] < tmp[date_out])]
+
+
+@_quiet
+def statistic_monthly(df, brand_range, left_on, right_on, statistic, date_in, date_out, date='日期', keep=True):
+    """
+    交易流水筛选汇总：月度-->月度
+    :param df: DataFrame, 原始流水统计表
+    :param brand_range:  DataFrame, 品牌对应关键字表
+    :param left_on: list, 左表（df)连接键
+    :param right_on: list, 右表(brand_range)连接键
+    :param statistic: list, 需要进行统计处理的指标
+    :param date_in: str, 纳入日期字段名，日期数据类型为yyyymmdd整型
+    :param date_out: str, 剔除日期字段名，日期数据类型为yyyymmdd整型
+    :param date: str, df表中的日期字段名，数据类型为datetime.date
+    :param keep: bool, 是否输出合并前及剔除后的品牌数据
+    :return: [DataFrame, DataFrame] 品牌层面及公司层面的流水统计表
+    """
+    df.sort_values(left_on + [date], inplace=True)
+    df_select = _brand_select(df, brand_range, left_on, right_on, date_in, date_out, date=date)
+    # 品牌汇总
+    if keep:
+        brand_statistic = df[left_on + [date] + statistic]
+    else:
+        brand_statistic = df_select[left_on + [date] + statistic]
+    brand_statistic.index = range(len(brand_statistic))
+    # 公司汇总
+    company_statistic = df_select.groupby([left_on[0], date])[statistic].sum()
+    company_statistic = company_statistic.reset_index()
+    company_statistic.insert(1, left_on[1], company_statistic[left_on[0]].apply(lambda x: x + '_合并'))
+    return brand_statistic, company_statistic
+
+
+@_quiet
+def statistic_weekly(df, brand_range, left_on, right_on, statistic, date_in, date_out, year='年', week='周', keep=True):
+    """
+    交易流水筛选汇总：周度-->周度
+    :param df: DataFrame, 原始流水统计表
+    :param brand_range:  DataFrame, 品牌对应关键字表
+    :param left_on:  list, 左表（df)连接键
+    :param right_on:  list, 右表(brand_range)连接键
+    :param statistic:  list, 需要进行统计处理的指标
+    :param date_in: str, 纳入日期字段名，日期数据类型为yyyymmdd整型
+    :param date_out: str, 剔除日期字段名，日期数据类型为yyyymmdd整型
+    :param year: str, df表中的年份字段名
+    :param week: str, df表中的周序字段名，培训方法为每年的1月1日起，每7天为一周
+    :param keep: bool, 是否输出合并前的品牌数据
+    :return: DataFrame, DataFrame 品牌层面及公司层面的流水统计表
+    """
+    df2 = df.copy()
+    df2['日期'] = year_week_to_date(df, year=year, week=week)
+    brand_statistic, company_statistic = statistic_monthly(df=df2, brand_range=brand_range, left_on=left_on,
+                                                           right_on=right_on, statistic=statistic, date_in=date_in,
+                                                           date_out=date_out, keep=keep)
+    return brand_statistic, company_statistic
+
+
+def get_quarter(df, date='日期'):
+    """
+    将yyyy-mm-dd格式的日度日期转成yyyyqq格式的季度日期
+    :param df: DataFrame
+    :param date: str, 日期所在的列名，列值必须是datetime.date类型
+    :return: Series
+    """
+    return df[date].apply(lambda x: str(x.year)) + df[date].apply(lambda x: str((x.month-1)//3 + 1).rjust(2, 'Q'))
+
+
+@_quiet
+def get_period(df, df_key, company_data='公司', company_key='公司', period_start='财报周期起始月份', date='日期'):
+    """
+    根据财报周期的起始日期划分财报周期
+    :param df: DataFrame
+    :param df_key: DataFrame
+    :param company_data: str
+    :param company_key: str
+    :param period_start: int
+    :param date: date
+    :return:
+    """
+    df_key2 = df_key[[company_key, period_start]].copy()
+    company_check = [i for i in df[company_data].unique() if i not in df_key2[company_key].unique()]
+    if len(company_check) > 0:
+        print("以下公司的财报周期起始月份缺少记录\n\t%s" % company_check)
+        df_key2 = df_key2.append(pd.DataFrame({company_key: company_check, period_start: 1}))
+    df_key2 = df_key2[df_key2[company_key].isin(df[company_data].unique())].sort_values([company_key, period_start])
+    na_check = df_key2.groupby(company_key).count()
+    na_check = na_check[na_check[period_start] == 0]
+    if len(na_check) > 0:
+        print("以下公司的财报周期起始月份为空值：\n\t%s" % na_check.index.values)
+        df_key2.loc[df_key2[company_key].isin(na_check.index.values), [period_start]] = 1
+    df_key2.fillna(method='ffill', inplace=True)
+    value_check = df_key2.groupby(company_key).max().merge(df_key2.groupby(company_key).mean(), 'left', left_index=True,
+                                                           right_index=True)
+    value_check = value_check[value_check[period_start + '_x'] != value_check[period_start + '_y']]
+    if len(value_check) > 0:
+        print("以下公司有多个不同的财报周期起始月份：\n\t%s" % value_check.index.values)
+    df_period_start = df_key2.groupby(company_key).first()
+    df2 = df.merge(df_period_start, 'left', left_on=company_data, right_index=True)
+    df2[period_start] = df2[period_start].astype(int)
+
+    def period_get(x, d=date, s=period_start):
+        if x[d].month < x[s]:
+            return str(x[d].year - 1) + str((x[d].month + 12 - x[s])//3 + 1).rjust(2, 'p')
+        else:
+            return str(x[d].year) + str((x[d].month - x[s])//3 + 1).rjust(2, 'p')
+    return df2[[date, period_start]].apply(period_get, 1)
+
+
+def statistic_merge(df, statistic, group):
+    """
+    聚合统计
+    :param df: DataFrame, 数据表
+    :param statistic: list(str), 聚合统计的统计指标，默认常见的交易指标
+    :param group: list(str), 聚合统计的基础粒度，默认对公司在季度上做聚合
+    :return: DataFrame
+    """
+    df2 = df.groupby(group)[statistic].sum()
+    for i in range(len(group)):
+        df2.insert(i, group[i], df2.index.get_level_values(group[i]).values)
+    df2.index = range(len(df2))
+    return df2
+
+
+class AggregateStore(object):
+    """
+    流水聚合结果的增量存储：按（公司, 品牌, 日期）保存各指标的汇总值，每期只合并新增或变化的（公司, 日期），
+    公司、季度（get_quarter）及财报周期（get_period）汇总直接基于已存储的聚合结果计算，无需重新处理全部历史流水
+    """
+
+    def __init__(self, statistic, keys=('公司', '品牌'), date='日期', weekly=False, year='年', week='周'):
+        """
+        :param statistic: list(str), 需要汇总的指标
+        :param keys: list(str), 公司及品牌的列名
+        :param date: str, 日期列名，数据类型为datetime.date
+        :param weekly: bool, 是否为周度流水，为True时按year、week两列计算日期（同statistic_weekly）
+        :param year: str, 周度流水的年份列名
+        :param week: str, 周度流水的周序列名
+        """
+        self.statistic = list(statistic)
+        self.keys = list(keys)
+        self.date = date
+        self.weekly = weekly
+        self.year = year
+        self.week = week
+        self.data = pd.DataFrame(columns=self.keys + [date] + self.statistic)
+        self.log = list()  # [(更新时间, 新增期数, 变化期数, 未变期数)]
+
+    def _aggregate(self, df, brand_range=None, right_on=None, date_in=None, date_out=None):
+        """
+        :return: DataFrame, 按（公司, 品牌, 日期）汇总的流水，设置brand_range时先按纳入、剔除日期筛选
+        """
+        if self.weekly:
+            df = df.copy()
+            df[self.date] = year_week_to_date(df, year=self.year, week=self.week)
+        if brand_range is not None:
+            df = _brand_select(df, brand_range, self.keys, right_on or self.keys, date_in, date_out, date=self.date)
+        return df.groupby(self.keys + [self.date])[self.statistic].sum().reset_index()
+
+    def update(self, df, brand_range=None, right_on=None, date_in=None, date_out=None, show=True):
+        """
+        合并新一期（或修订）的流水：df中出现的（公司, 日期）整体替换为df的汇总结果，其余（公司, 日期）保持不变
+        :param df: DataFrame, 新增或修订的流水，只需包含相应（公司, 日期）的全部品牌数据
+        :param brand_range: DataFrame, 品牌对应关键字表，设置时按纳入、剔除日期筛选（同statistic_monthly）
+        :param right_on: list, brand_range的连接键，默认与keys相同
+        :param date_in: str, 纳入日期字段名，日期数据类型为yyyymmdd整型
+        :param date_out: str, 剔除日期字段名，日期数据类型为yyyymmdd整型
+        :param show: bool, 是否打印合并结果
+        :return: (int, int, int), 新增、变化及未变的（公司, 日期）个数
+        """
+        new = self._aggregate(df, brand_range=brand_range, right_on=right_on, date_in=date_in, date_out=date_out)
+        part = [self.keys[0], self.date]
+        idx_old = pd.MultiIndex.from_frame(self.data[part])
+        idx_new = pd.MultiIndex.from_frame(new[part])
+        # 逐（公司, 日期）比较新旧汇总，品牌集合或任一指标不同即为新增或变化
+        diff = self.data[idx_old.isin(idx_new)].merge(new, 'outer', on=self.keys + [self.date], indicator=True)
+        differ = diff['_merge'] != 'both'
+        for col in self.statistic:
+            differ |= ~np.isclose(diff[col + '_x'].astype(float), diff[col + '_y'].astype(float), equal_nan=True)
+        replace = pd.MultiIndex.from_frame(diff.loc[differ, part].drop_duplicates())
+        n_added = (~replace.isin(idx_old)).sum()
+        n_changed = len(replace) - n_added
+        n_same = len(idx_new.unique()) - len(replace)
+        if len(replace) > 0:
+            add = new[idx_new.isin(replace)]
+            self.data = pd.concat([self.data[~idx_old.isin(replace)], add]) if len(self.data) > 0 else add
+            self.data = self.data.sort_values(self.keys + [self.date]).reset_index(drop=True)
+        self.log.append((dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), n_added, n_changed, n_same))
+        if show:
+            print("合并完毕：新增%d个（公司, 日期），变化%d个，未变%d个，共存储%d条汇总记录" % (
+                n_added, n_changed, n_same, len(self.data)))
+        return n_added, n_changed, n_same
+
+    def brand(self):
+        """
+        :return: DataFrame, 品牌层面的流水统计表（按纳入、剔除日期筛选后）
+        """
+        return self.data.copy()
+
+    def company(self):
+        """
+        :return: DataFrame, 公司层面的流水统计表，品牌列为“公司_合并”，与statistic_monthly的公司汇总一致
+        """
+        company_statistic = self.data.groupby([self.keys[0], self.date])[self.statistic].sum().reset_index()
+        company_statistic.insert(1, self.keys[1], company_statistic[self.keys[0]] + '_合并')
+        return company_statistic
+
+    def rollup(self, freq='quarter', level='company', df_key=None, company_key='公司',
+               period_start='财报周期起始月份', name=None):
+        """
+        基于存储的聚合结果按季度或财报周期汇总
+        :param freq: str, 'quarter'按季度（get_quarter）汇总，'period'按财报周期（get_period）汇总，None按日期汇总
+        :param level: str, 'company'为公司层面，'brand'为品牌层面
+        :param df_key: DataFrame, 各公司财报周期起始月份表，freq='period'时必须设置
+        :param company_key: str, df_key中的公司列名
+        :param period_start: str, df_key中的财报周期起始月份列名
+        :param name: str, 汇总周期的列名，默认'季度'或'财报周期'
+        :return: DataFrame
+        """
+        df = self.company() if level == 'company' else self.brand()
+        if freq == 'quarter':
+            name = name or '季度'
+            df[name] = get_quarter(df, date=self.date)
+        elif freq == 'period':
+            name = name or '财报周期'
+            df[name] = get_period(df, df_key, company_data=self.keys[0], company_key=company_key,
+                                  period_start=period_start, date=self.date).values
+        else:
+            name = self.date
+        return statistic_merge(df, self.statistic, self.keys + [name])
+
+    def verify(self, df, brand_range=None, right_on=None, date_in=None, date_out=None, rtol=1e-9):
+        """
+        与全量重算结果比较，检查增量合并的正确性
+        :param df: DataFrame, 全部历史流水
+        :param brand_range: DataFrame, 品牌对应关键字表，与update时一致
+        :param right_on: list, brand_range的连接键
+        :param date_in: str, 纳入日期字段名
+        :param date_out: str, 剔除日期字段名
+        :param rtol: float, 指标比较的相对误差
+        :return: bool, 是否一致，不一致时打印差异
+        """
+        full = self._aggregate(df, brand_range=brand_range, right_on=right_on, date_in=date_in, date_out=date_out)
+        diff = self.data.merge(full, 'outer', on=self.keys + [self.date], indicator=True)
+        differ = diff['_merge'] != 'both'
+        for col in self.statistic:
+            differ |= ~np.isclose(diff[col + '_x'].astype(float), diff[col + '_y'].astype(float), rtol=rtol,
+                                  equal_nan=True)
+        if differ.sum() > 0:
+            print("\n增量结果与全量重算不一致（_x为增量，_y为全量，left_only/right_only为仅一方存在）：")
+            print(diff[differ])
+            return False
+        print("\n检查完毕，增量结果与全量重算一致，共%d条汇总记录" % len(full))
+        return True
+
+    def save(self, file):
+        """
+        保存到本地文件（pickle）
+        :param file: str, 文件名，含路径及后缀
+        :return: None
+        """
+        with open(file, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file):
+        """
+        :param file: str, AggregateStore.save保存的文件
+        :return: AggregateStore
+        """
+        with open(file, 'rb') as f:
+            return pickle.load(f)
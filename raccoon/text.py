@@ -0,0 +1,1422 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Date     : 2019/6/10
+# @Author   : Deyong ZHAN
+# @Version  : v3.0.0
+"""
+大文本文件的分块处理：行数统计、抽样、境内外拆分、商户清洗、排序、分片、脱敏及解码
+"""
+
+import codecs
+import csv
+import datetime as dt
+import heapq
+import io
+import locale
+import os
+import random
+import shutil
+import tempfile
+import time
+import traceback
+import zlib
+
+from ._common import (np, pd, _MASKING_SUFFIX, _mask_values, _COMPRESSION_SUFFIX, _open_input, _open_output,
+                     _output_suffix, _iter_read, _iter_lines, _MatchCache, _append_fields, _str_contains,
+                     _merchant_labels, _rule_plan, RuleSet, _ChunkSizer, _background_iter, _ChunkWriter, _quiet,
+                     _input_error)
+
+
+def count_line(file, encoding='utf-8', m=10, show=True):
+    """
+    计算文件有多少行数据。直接统计原始字节中的换行符，不解码、不依赖pandas，支持gzip/bz2/xz压缩文件；
+    UTF-16、UTF-32等换行符不是单字节的编码按解码后的文本统计
+    :param file: str, 待抽样的文件名，含路径及后缀
+    :param encoding: str, 编码方式
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param show: bool, 是否打印中间过程
+    :return: int, 行数，统计结果
+    """
+    count = 0
+    if codecs.lookup(encoding or 'utf-8').name.startswith(('utf-16', 'utf-32')):
+        for chunk in _iter_read(file, encoding=encoding, m=m):
+            count += chunk.count('\n')
+    else:
+        with _open_input(file) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024 * m), b''):  # 每次读入m M
+                count += chunk.count(b'\n')
+    if show:
+        print("# 该文件共有%d行 #" % count)
+    return count
+
+
+def _line_field(lines, loc, encoding):
+    """
+    提取各行指定位置的字段（按逗号分隔），字段不存在时取空字符串；bytes行的字段解码成字符串
+    :param lines: list, 行列表，取值为str或bytes
+    :param loc: int, 字段所在的位置，从0开始
+    :param encoding: str, bytes行的编码方式
+    :return: Series
+    """
+    values = list()
+    for line in lines:
+        fields = line.split(b',' if isinstance(line, bytes) else ',', loc + 1)
+        values.append(fields[loc] if len(fields) > loc else '')
+    values = [v.decode(encoding) if isinstance(v, bytes) else v for v in values]
+    return pd.Series(values, dtype=object)
+
+
+def _sample_strata(chunks, stratify=None, weight=None, quota=None, fraction=None, encoding=None, random_state=None):
+    """
+    单次遍历的分层/加权抽样。按数量抽样时每一层维护一个蓄水池：每行赋予随机得分（指数分布，加权时除以权重），
+    各层保留得分最小的quota行，等价于层内不放回的等概率（或与权重成比例的）抽样；按比例抽样时逐行做伯努利抽样。
+    内存占用约为 各层抽样数之和 + 一个数据块
+    :param chunks: iterable, 各数据块的行列表，如_iter_lines的结果
+    :param stratify: int, 分层字段的位置，从0开始，默认不分层（全部数据视为一层）
+    :param weight: int, 权重字段的位置，从0开始，权重非正或非数值的行不会被抽中
+    :param quota: int or dict, 各层的抽样数量，dict时为{层取值: 抽样数量}，未列出的层不抽样
+    :param fraction: float or dict, 各层的抽样比例，dict时为{层取值: 抽样比例}，未列出的层不抽样，不支持与weight同时使用
+    :param encoding: str, bytes行的编码方式
+    :param random_state: int, 随机数种子
+    :return: (DataFrame, DataFrame), 抽样结果（行号、层、行）及各层的总行数与抽样行数
+    """
+    rng = np.random.RandomState(random_state)
+    population = pd.Series(dtype='int64')  # 各层总行数
+    samples = list()  # 按比例抽样的结果
+    reservoir = pd.DataFrame(columns=['line_no', 'stratum', 'line', 'score'])  # 按数量抽样的蓄水池
+    j = 0  # 行数计数
+    for lines in chunks:
+        df = pd.DataFrame({'line_no': np.arange(j, j + len(lines)), 'line': lines})
+        j += len(lines)
+        if stratify is None:
+            df['stratum'] = ''
+        else:
+            df['stratum'] = _line_field(lines, stratify, encoding).values
+        population = population.add(df['stratum'].value_counts(), fill_value=0)
+        u = rng.random_sample(len(df))
+        if fraction is not None:
+            if isinstance(fraction, dict):
+                limit = df['stratum'].map(fraction).fillna(0).values
+            else:
+                limit = fraction
+            samples.append(df[u < limit])
+            continue
+        df['score'] = -np.log(1 - u)
+        if weight is not None:
+            w = pd.to_numeric(_line_field(lines, weight, encoding), errors='coerce').values
+            df['score'] = df['score'] / w
+            df = df[w > 0]
+        reservoir = pd.concat([reservoir, df], ignore_index=True).sort_values('score', kind='mergesort')
+        rank = reservoir.groupby('stratum', sort=False).cumcount()
+        if isinstance(quota, dict):
+            limit = reservoir['stratum'].map(quota).fillna(0)
+        else:
+            limit = quota
+        reservoir = reservoir[rank < limit]
+    if fraction is not None:
+        df_sample = pd.concat(samples, ignore_index=True) if samples else reservoir.drop(columns='score')
+    else:
+        df_sample = reservoir.drop(columns='score')
+    df_sample = df_sample.sort_values('line_no')
+
+    # 各层总行数及抽样行数
+    df_summary = pd.DataFrame({'population': population.astype('int64')})
+    df_summary['sample'] = df_sample['stratum'].value_counts().reindex(df_summary.index).fillna(0).astype('int64')
+    df_summary['fraction'] = df_summary['sample'] / df_summary['population']
+    df_summary.index.name = 'stratum'
+    df_summary = df_summary.sort_index().reset_index()
+    return df_sample, df_summary
+
+
+def _line_at(f, offset, size, window=256, limit=None):
+    """
+    读取包含字节位置offset的整行
+    :param f: 以二进制方式打开的未压缩文件
+    :param offset: int, 字节位置
+    :param size: int, 文件大小
+    :param window: int, 每次向前、向后读取的字节数，行较长时逐次加倍
+    :param limit: float, 行长（含换行符）上限，已读取的部分表明行长超过上限时不再读取，默认不限
+    :return: (int, bytes, int), 行的起始位置、行内容（不含换行符）及读取的字节数，超过上限时行的起始位置及内容为None
+    """
+    lo, hi = max(0, offset - window), min(size, offset + window)
+    f.seek(lo)
+    buf = f.read(hi - lo)
+    read = len(buf)
+    i = buf.rfind(b'\n', 0, offset - lo)
+    while i < 0 and lo > 0:  # 向前找到上一行的换行符
+        if limit is not None and offset - lo + 1 > limit:
+            return None, None, read
+        window *= 2
+        new_lo = max(0, lo - window)
+        f.seek(new_lo)
+        buf = f.read(lo - new_lo) + buf
+        read += lo - new_lo
+        lo = new_lo
+        i = buf.rfind(b'\n', 0, offset - lo)
+    start = lo + i + 1
+    j = buf.find(b'\n', offset - lo)
+    while j < 0 and hi < size:  # 向后找到本行的换行符
+        if limit is not None and hi - start + 1 > limit:
+            return None, None, read
+        window *= 2
+        f.seek(hi)
+        more = f.read(min(size, hi + window) - hi)
+        read += len(more)
+        buf += more
+        hi += len(more)
+        j = buf.find(b'\n', offset - lo)
+    return start, buf[i + 1:j if j >= 0 else len(buf)], read
+
+
+def _seek_sample(file, n, random_state=None, quantile=0.01, max_read=None, pilot=1000):
+    """
+    基于随机定位的近似行抽样：随机抽取字节位置并读取其所在的行，只读取抽中位置附近的数据。
+    行被抽中的概率与其长度（含换行符）成正比，按 min(1, L0 / 行长) 的概率接受以校正长度偏差（拒绝抽样），
+    接受的各次抽取相互独立且在各行上等概率（短于L0的行仍有轻微偏差），同一行被重复抽中时重复保留（有放回抽样）。
+    前pilot次抽取完整读取行，L0取其行长的quantile分位数；之后的抽取先确定可接受的行长上限 L0 / u（u为接受判定的随机数），
+    已读取的部分超过上限即判为拒绝，长行无需读完
+    :param file: str, 未压缩的文件名，含路径及后缀
+    :param n: int, 抽样数量
+    :param random_state: int, 随机数种子
+    :param quantile: float, 拒绝抽样参考长度L0所取的试抽行长分位数
+    :param max_read: int, 读取字节数上限，默认为 n × 1K 且不少于4M；达到上限时停止抽样，抽中的行数可能少于n
+    :param pilot: int, 完整读取行的试抽次数上限（不少于100次且不超过n时取n）
+    :return: (list(bytes), DataFrame), 抽中的行（按在文件中的位置排列），及偏差报告
+    """
+    rng = np.random.RandomState(random_state)
+    size = os.path.getsize(file)
+    max_read = max_read or max(4 * 1024 * 1024, n * 1024)
+    n_pilot = min(max(n, 100), pilot)
+    trial = list()  # 试抽：[(行起始位置, 行, 接受判定的随机数)]
+    chosen = list()  # 接受的抽取：[(行起始位置, 行)]
+    n_draws = 0
+    read = 0
+    read_pilot = 0
+    ref = None
+    window = 256
+
+    def settle():  # 试抽结束：确定参考长度及读取窗口（估计的平均行长），并对试抽的行执行接受判定
+        lengths = np.array([len(line) + 1 for _, line, _ in trial], dtype=float)
+        length_ref = np.quantile(lengths, quantile)
+        chosen.extend((start, line) for start, line, u in trial if u * (len(line) + 1) < length_ref)
+        return length_ref, int(min(max(len(lengths) / (1 / lengths).sum(), 64), 4096)), lengths
+
+    with open(file, 'rb') as f:
+        while len(chosen) < n and n_draws < 50 * n and read < max_read:
+            offset = rng.randint(0, size, dtype=np.int64)  # 默认整型在Windows（numpy<2）上为32位，大于2G的文件会溢出
+            u = rng.random_sample()
+            n_draws += 1
+            if ref is None:
+                start, line, nread = _line_at(f, offset, size, window=window)
+                read += nread
+                trial.append((start, line, u))
+                if len(trial) >= n_pilot:
+                    read_pilot = read
+                    ref, window, lengths = settle()
+                continue
+            # 可接受的行长上限较小时只需读取上限范围内的数据即可判定
+            limit = ref / u if u > 0 else None
+            start, line, nread = _line_at(f, offset, size, window=int(min(window, limit or window)) + 1, limit=limit)
+            read += nread
+            if start is not None and u * (len(line) + 1) < ref:
+                chosen.append((start, line))
+    if ref is None:  # 试抽阶段即达到读取上限
+        read_pilot = read
+        ref, window, lengths = settle()
+    if len(chosen) > n:
+        keep = rng.choice(len(chosen), n, replace=False)
+        chosen = [chosen[k] for k in keep]
+    chosen.sort(key=lambda record: record[0])
+    sample_lengths = np.array([len(line) + 1 for _, line in chosen], dtype=float)
+
+    # 偏差报告：总体的行长分布由试抽的行按 1 / 行长 加权估计，比较校正前后的样本与总体的差异
+    weights = 1 / lengths
+    population_mean = 1 / weights.mean()
+
+    order = np.argsort(lengths, kind='stable')
+    grid = np.unique(lengths)
+    pop_cdf = np.cumsum(weights[order])[np.searchsorted(lengths[order], grid, side='right') - 1] / weights.sum()
+
+    def ks(values):  # 与总体估计的行长分布之间的KS距离
+        cdf = np.searchsorted(np.sort(values), grid, side='right') / max(len(values), 1)
+        return float(np.abs(cdf - pop_cdf).max())
+    report = pd.DataFrame({
+        'sample': ['试抽（长度加权）', '拒绝抽样后（校正）', '总体（估计）'],
+        'rows': [len(lengths), len(chosen), int(round(size / population_mean))],
+        'draws': [len(trial), n_draws, np.nan],
+        'mean_length': [lengths.mean(), sample_lengths.mean() if len(chosen) else np.nan, population_mean],
+        'ks_distance': [ks(lengths), ks(sample_lengths), 0.0]})
+    report['bytes_read'] = [read_pilot, read, size]
+    return [line for _, line in chosen], report
+
+
+@_quiet
+def line_sample(file, encoding=None, m=20, n=5000, parallel_io=False, queue_size=2, byte_mode=False, stratify=None,
+                quota=None, fraction=None, weight=None, random_state=None, seek=False, max_read=None):
+    """
+    行抽样
+    :param file: str, 待抽样的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param encoding: str, 编码方式
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param n: int, 抽样数量
+    :param parallel_io: bool, 是否在后台线程中读取文件，使读入与数据处理重叠进行
+    :param queue_size: int, 后台读取队列深度，内存占用约为 queue_size × m 兆
+    :param byte_mode: bool, 是否以字节方式处理，行数统计及行切分直接在bytes上执行，仅解码被抽中的行
+    :param stratify: int, 分层字段所在的位置，从0开始，如city_cd、mcc所在的列；设置后单次遍历文件进行分层抽样，
+                     并另外输出各层总行数及抽样行数的汇总文件
+    :param quota: int or dict, 分层抽样时各层的抽样数量，dict时为{层取值: 抽样数量}，未列出的层不抽样；
+                  quota及fraction均未设置时各层抽取n行
+    :param fraction: float or dict, 分层抽样时各层的抽样比例，dict时为{层取值: 抽样比例}，未列出的层不抽样
+    :param weight: int, 权重字段所在的位置，从0开始；设置后按与权重成比例的概率进行不放回抽样，不能与fraction同时使用
+    :param random_state: int, 随机数种子，用于复现抽样结果
+    :param seek: bool, 是否基于随机定位进行近似抽样：只读取n个随机字节位置所在的行并校正行长偏差，不遍历文件，
+                 另外输出偏差报告（与等概率抽样比较）；仅支持未压缩文件，不支持分层及加权抽样
+    :param max_read: int, 随机定位抽样的读取上限，单位为兆，默认为 n × 1K 且不少于4M；达到上限时抽样行数可能少于n
+    :return: 抽样结果，本地文件
+    """
+    # 提取文件路径及文件名
+    file_name = str(os.path.basename(file).split('.')[0])
+    file_path = os.path.dirname(file) + '/'
+    encoding = encoding or locale.getpreferredencoding(False)
+
+    # 随机定位的近似抽样：只读取抽中位置附近的数据
+    if seek:
+        if stratify is not None or weight is not None or quota is not None or fraction is not None:
+            _input_error("\n%s: 随机定位抽样不支持分层及加权抽样" % file_name)
+            return
+        with _open_input(file) as f:
+            compressed = not isinstance(f, io.BufferedReader)
+        if os.path.getsize(file) == 0:
+            print("\n%s: 文件为空，无需抽样" % file_name)
+            return
+        if compressed:
+            print("\n%s: 压缩文件无法随机定位，改用遍历文件抽样" % file_name)
+        else:
+            print("\n%s: 约%.1fM，开始随机定位抽样..." % (file_name, os.path.getsize(file) / 1024 / 1024))
+            lines, df_report = _seek_sample(file, n, random_state=random_state,
+                                            max_read=int(max_read * 1024 * 1024) if max_read else None)
+            pd.DataFrame([line.decode(encoding).split(',') for line in lines]).to_csv(
+                file_path + 'sample_' + file_name + '.txt', index=False, header=False)
+            df_report.to_csv(file_path + 'sample_' + file_name + '_bias.txt', index=False)
+            print(df_report)
+            if len(lines) < n:
+                print("\n%s: 达到读取上限，抽样%d行少于%d行，可增大max_read" % (file_name, len(lines), n))
+            print("======%s\t%s处理完毕，读取%.1fM，原文件约%d行，成功抽样%d行======" % (
+                dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, df_report['bytes_read'].iloc[1] / 1024 / 1024,
+                df_report['rows'].iloc[2], len(lines)))
+            return
+
+    # 分层或加权抽样：单次遍历文件
+    if stratify is not None or weight is not None or quota is not None or fraction is not None:
+        if weight is not None and fraction is not None:
+            _input_error("\n%s: 加权抽样仅支持按数量抽样，请设置quota而非fraction" % file_name)
+            return
+        if quota is None and fraction is None:
+            quota = n
+        print("\n%s: 约%.1fM，开始%s抽样..." % (file_name, os.path.getsize(file) / 1024 / 1024,
+                                             '加权' if stratify is None else '分层'))
+        chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, decode=not byte_mode))
+        if parallel_io:
+            chunks = _background_iter(chunks, queue_size=queue_size)
+        df_sample, df_summary = _sample_strata(chunks, stratify=stratify, weight=weight, quota=quota,
+                                               fraction=fraction, encoding=encoding, random_state=random_state)
+        lines = [line.decode(encoding) if isinstance(line, bytes) else line for line in df_sample['line']]
+        pd.DataFrame([line.split(',') for line in lines]).to_csv(file_path + 'sample_' + file_name + '.txt',
+                                                                  index=False, header=False)
+        df_summary.to_csv(file_path + 'sample_' + file_name + '_summary.txt', index=False)
+        print(df_summary)
+        print("======%s\t%s处理完毕，原文件共有%d行，成功抽样%d行======" % (
+            dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, df_summary['population'].sum(),
+            len(df_sample)))
+        return
+
+    # 计算文件的总行数
+    count = 0
+    chunks = _iter_read(file, encoding=encoding, m=m, decode=not byte_mode)
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    for chunk in chunks:
+        count += chunk.count(b'\n' if byte_mode else '\n')
+
+    # 情况一：样本总数不多于抽样个数时，直接返回全部样本
+    if count <= n:
+        print("\n%s: 抽样数%d ≥ 总行数%d，无需抽样" % (file_name, n, count))
+        return
+    else:
+        print("\n%s: 共有%d行，约%.1fM，开始抽样..." % (file_name, count, os.path.getsize(file)/1024/1024))
+    # 情况二：样本总数超过抽样个数时，基于随机序号进行抽样
+    int_range = [i for i in range(count)]  # 产生序号
+    random.Random(random_state).shuffle(int_range)  # 打散序号
+    sample_range = sorted(int_range[:n])  # 抽取前n个随机样本序号
+
+    # 遍历文件，每次读取一部分，基于随机样本序号进行抽样
+    j = 0  # 行数计数
+    df_sample = pd.DataFrame()  # 用于存放抽样结果
+    chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, decode=not byte_mode))
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    for i, lines in enumerate(chunks, 1):
+        if j >= count:
+            break
+        print("%s\t处理%s第%d部分" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, i))
+        chunk_len = len(lines)
+        # 当前样本序号范围包含抽样序号则抽样，否则跳过
+        sample_id = sorted(set(range(j, j + chunk_len)) & set(sample_range))  # 序号交集
+        if byte_mode:
+            # 字节模式下仅解码被抽中的行
+            if len(sample_id) > 0:
+                df_sample = df_sample.append(
+                    pd.DataFrame([lines[k - j].decode(encoding).split(',') for k in sample_id], index=sample_id))
+        else:
+            df_chunk = pd.DataFrame(lines)[0].str.split(',', expand=True)
+            df_chunk.index = range(j, j + chunk_len)
+            if len(sample_id) > 0:
+                df_sample = df_sample.append(df_chunk.loc[sample_id])
+        j += chunk_len
+    # 抽样结果输出保存
+    if len(df_sample) > 0:
+        try:
+            df_sample.to_csv(file_path + 'sample_' + file_name + '.txt', index=False, header=False)
+            print("======%s\t%s处理完毕，原文件共有%d行，成功抽样%d行======" % (
+                dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, count, len(df_sample)))
+        except Exception:
+            print(traceback.print_exc())
+    else:
+        print("======%s\t%s处理完毕，原文件共有%d行，抽取样本0行======" % (
+        dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, count))
+
+
+def merchant_split(file, encoding=None, m=20, city_cd_loc=4, in_rule='^[1-9]|0156|000[01]',
+                   out_rule='^0(?!00[01]|156)', parallel_io=False, queue_size=2, compression=None,
+                   compresslevel=None, output_format='csv', columns=None, byte_mode=False, match_cache=None,
+                   memory_limit=None, regex_backend='re'):
+    """
+    商户按地区拆分境内外
+    :param file: str, 待抽样的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param encoding: str, 编码方式
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param city_cd_loc: int, 城市代码字段所在的位置，从0开始，例如在第五列，则输入4
+    :param in_rule: str, 城市代码为境内的正则表达式
+    :param out_rule: str, 城市代码为境外的正则表达式
+    :param parallel_io: bool, 是否在后台线程中读写文件，使读写与数据处理重叠进行
+    :param queue_size: int, 后台读写队列深度，内存占用约为 queue_size × m 兆
+    :param compression: str, 输出文件的压缩格式，csv可选'gzip'、'bz2'、'xz'，默认不压缩；parquet默认snappy
+    :param compresslevel: int, 输出文件的压缩级别，默认gzip及bz2取6，xz取lzma默认预设
+    :param output_format: str, 输出格式，'csv'为无表头的逗号分隔文本，'parquet'为列式存储的Parquet文件（需安装pyarrow）
+    :param columns: list, 文件列名，parquet格式输出时作为列名，默认以列序号命名
+    :param byte_mode: bool, 是否以字节方式处理，行切分、字段切分及城市代码匹配直接在bytes上执行，不解码，
+                      原始行按原文件编码直接输出，仅支持csv格式
+    :param match_cache: int, 跨数据块缓存城市代码匹配结果的取值个数上限，默认仅在各数据块的去重取值上匹配
+    :param memory_limit: int, 内存预算，单位为兆，设置时根据前几个数据块测得的内存膨胀倍数及处理速度自动调整每次读入的数据量，
+                         m作为初始值
+    :param regex_backend: str, 正则引擎，可选're'（默认）、'regex'、're2'（线性时间，需安装google-re2），未安装或不支持的正则改用re
+    :return: 拆分结果，本地文件
+    """
+    suffix = _output_suffix(output_format=output_format, compression=compression)
+    if not suffix:
+        return
+    if byte_mode and output_format != 'csv':
+        _input_error("\n字节模式仅支持csv格式输出")
+        return
+    encoding = encoding or locale.getpreferredencoding(False)
+    # 提取文件路径及文件名
+    file_name = str(os.path.basename(file).split('.')[0])
+    file_path = os.path.dirname(file) + '/'
+
+    # 初始化输出对象
+    file_in = file_path + file_name + '_domestic' + suffix
+    file_out = file_path + file_name + '_international' + suffix
+    file_remain = file_path + file_name + '_remained' + suffix
+    for output in [file_in, file_out, file_remain]:
+        if os.path.exists(output):
+            os.remove(output)
+    print("\n%s: 约%.1fM，开始处理..." % (file_name, os.path.getsize(file) / 1024 / 1024))
+    # 遍历文件，每次读取一部分数据，基于city_code进行地区划分
+    count = 0  # 总行数
+    count_in = 0  # 境内数据行数
+    count_out = 0  # 境外数据行数
+    count_remain = 0  # 无法判断境内外数据行数
+    sizer = _ChunkSizer(memory_limit, m=m, in_flight=2 * queue_size if parallel_io else 0) if memory_limit else None
+    chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, decode=not byte_mode, sizer=sizer))
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    writer = _ChunkWriter(background=parallel_io, queue_size=queue_size, compression=compression,
+                          compresslevel=compresslevel, output_format=output_format)
+    cache = _MatchCache(maxsize=match_cache) if match_cache else None
+    for i, lines in enumerate(chunks, 1):
+        print("%s\t处理%s第%d部分" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, i))
+        if byte_mode:
+            s_lines = pd.Series(lines)
+            df_chunk = pd.DataFrame([line.split(b',') for line in lines])
+        else:
+            df_chunk = pd.DataFrame(lines)[0].str.split(',', expand=True)
+        if columns:
+            df_chunk.columns = columns
+        count += len(df_chunk)
+        # 划分境内外地区
+        city_cd = df_chunk[df_chunk.columns[city_cd_loc]]
+        s_in = _str_contains(city_cd, in_rule, byte_mode=byte_mode, encoding=encoding, cache=cache,
+                             backend=regex_backend)
+        s_out = _str_contains(city_cd, out_rule, byte_mode=byte_mode, encoding=encoding, cache=cache,
+                             backend=regex_backend)
+        s_remain = ~(s_in | s_out)
+        count_in += s_in.sum()
+        count_out += s_out.sum()
+        count_remain += s_remain.sum()
+        for s_bool, output in [(s_in, file_in), (s_out, file_out), (s_remain, file_remain)]:
+            if s_bool.sum() > 0:
+                if byte_mode:
+                    writer.write_lines(s_lines[s_bool], output)  # 原始行直接输出
+                else:
+                    writer.write(df_chunk[s_bool], output)
+        if sizer:
+            sizer.update(lines, df_chunk)
+    writer.close()
+    print("======%s\t%s处理完毕，共有%d行，其中domestic:international:remained =  %.1f%% : %.1f%% : %.1f%% = %d : %d : %d"
+          % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, count, (100 * count_in / (count + 0.001)),
+             (100 * count_out / (count + 0.001)), (100 * count_remain / (count + 0.001)), count_in, count_out, count_remain))
+
+
+def _reason_legend(df_rule_sorted, drop_reasons):
+    """
+    industry_merchant_clean剔除原因代码的图例：代码 = 规则位置×4 + 原因代码（1为不在name_white内，2为命中name_black，
+    3为MCC不在范围内）
+    :param df_rule_sorted: DataFrame, 按地区排列的清洗规则
+    :param drop_reasons: array, 各原因代码相应的剔除原因文本
+    :return: DataFrame, 代码、规则（规则表中的索引）、地区、规则各列（加rule_前缀）及剔除原因
+    """
+    rule_pos = np.repeat(np.arange(len(df_rule_sorted)), 3)
+    status = np.tile([1, 2, 3], len(df_rule_sorted))
+    legend = pd.DataFrame({'code': rule_pos * 4 + status, 'rule': df_rule_sorted.index.values[rule_pos],
+                           'district': df_rule_sorted['district'].values[rule_pos]})
+    for col in ['citycode_white', 'name_white', 'name_black', 'mcc_white']:
+        legend['rule_' + col] = df_rule_sorted[col].values[rule_pos]
+    legend['drop_reason'] = drop_reasons[status]
+    return legend
+
+
+def industry_merchant_clean(file, columns, df_rule, encoding=None, m=20, show=True, keyword=False, parallel_io=False,
+                            queue_size=2, compression=None, compresslevel=None, output_format='csv', byte_mode=False,
+                            match_cache=None, sort_key=None, unique=False, sort_memory=100, memory_limit=None,
+                            regex_backend='re', reason_format='text', optimize=False):
+    """
+    商户清洗函数，根据规则对商户文本文件进行清洗
+    :param file: str, 待抽样的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param columns: list, 文件列名
+    :param df_rule: DataFrame or RuleSet, 清洗规则文件，或RuleSet（按file_name分组）
+    :param encoding: str, 编码方式
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param show: bool, 是否打印中间过程
+    :param keyword: bool, clean文件是否增加一列name_white
+    :param parallel_io: bool, 是否在后台线程中读写文件，使读写与数据处理重叠进行
+    :param queue_size: int, 后台读写队列深度，内存占用约为 queue_size × m 兆
+    :param compression: str, 输出文件的压缩格式，csv可选'gzip'、'bz2'、'xz'，默认不压缩；parquet默认snappy
+    :param compresslevel: int, 输出文件的压缩级别，默认gzip及bz2取6，xz取lzma默认预设
+    :param output_format: str, 输出格式，'csv'为无表头的逗号分隔文本（追加写入），'parquet'为列式存储的Parquet文件
+                          （需安装pyarrow，覆盖写入，列名取自columns，drop_reason及keywords采用字典编码）
+    :param byte_mode: bool, 是否以字节方式处理，行切分、字段切分及city_cd、mcc的规则匹配直接在bytes上执行，
+                      mchnt_name仅对通过城市白名单的行解码，原始行按原文件编码直接输出，仅支持csv格式
+    :param match_cache: int, 跨数据块缓存各规则匹配结果的取值个数上限（每个正则），默认仅在各数据块的去重取值上匹配
+    :param sort_key: list(str), 清洗完成后对各输出文件进行外部排序的键列名，如['mchnt_name', 'city_cd']，默认不排序
+    :param unique: bool, 排序时是否按键列去重（保留文件中的第一条），需同时设置sort_key
+    :param sort_memory: int, 外部排序时每个有序段读入的数据量，单位为兆
+    :param memory_limit: int, 内存预算，单位为兆，设置时根据前几个数据块测得的内存膨胀倍数及处理速度自动调整每次读入的数据量，
+                         m作为初始值
+    :param regex_backend: str, 正则引擎，可选're'（默认）、'regex'、're2'（线性时间，需安装google-re2），未安装或不支持的正则改用re
+    :param reason_format: str, 黑名单drop_reason的输出格式，'text'为剔除原因文本，'code'为整数代码（规则位置×4 + 原因），
+                          代码与规则及剔除原因的对应关系保存在black路径下的file_name_reason_legend.txt，可用expand_reason还原
+    :param optimize: bool, 是否按optimize_rules的执行计划执行规则（跳过重复的城市规则、合并锚定的城市规则、
+                     相同的名称及MCC规则只执行一次），清洗结果不变
+    :return: 清洗结果，本地文件
+    """
+    suffix = _output_suffix(output_format=output_format, compression=compression)
+    if not suffix:
+        return
+    if byte_mode and output_format != 'csv':
+        _input_error("\n字节模式仅支持csv格式输出")
+        return
+    if sort_key and output_format != 'csv':
+        _input_error("\n外部排序仅支持csv格式输出")
+        return
+    if reason_format not in ('text', 'code'):
+        _input_error("\n不支持的剔除原因格式%s，可选'text'、'code'" % reason_format)
+        return
+    encoding = encoding or locale.getpreferredencoding(False)
+    # 提取文件路径及文件名
+    file_name = str(os.path.basename(file).split('.')[0])
+    file_path = os.path.dirname(file) + '/'
+
+    # 匹配待清洗商户相应的规则，按地区顺序排列（地区内保持原有顺序）
+    rule_set = df_rule if isinstance(df_rule, RuleSet) else \
+        RuleSet(df_rule[df_rule['file_name'] == file_name], backend=regex_backend)
+    df_rule_sorted = rule_set.get(file_name)
+    if df_rule_sorted is None:
+        _input_error('\n%s: 找不到清洗规则，清洗跳过！' % file_name)
+        return
+
+    # 输出路径初始化
+    path_clean = file_path + 'white/'
+    path_black = file_path + 'black/'
+    if not os.path.exists(path_clean):
+        os.mkdir(path_clean)
+    if not os.path.exists(path_black):
+        os.mkdir(path_black)
+    if show:
+        print("\n%s: 约%.1fM，开始清洗..." % (file_name, os.path.getsize(file) / 1024 / 1024))
+    # 记录每条规则所属地区的序号
+    districts = df_rule_sorted['district'].unique()
+    rule_district = df_rule_sorted['district'].map({d: k for k, d in enumerate(districts)}).values
+    rule_keywords = df_rule_sorted['name_white'].values
+    drop_reasons = np.array([None, '不在name_white内', 'name_black', 'MCC 不在范围内'], dtype=object)
+    if reason_format == 'code':  # 剔除原因按 规则位置×4 + 原因代码 编码，并输出图例
+        _reason_legend(df_rule_sorted, drop_reasons).to_csv(path_black + file_name + '_reason_legend.txt',
+                                                            index=False)
+
+    # 遍历文件，每次读取一部分，按地区执行清洗规则
+    sizer = _ChunkSizer(memory_limit, m=m, in_flight=2 * queue_size if parallel_io else 0, show=show) \
+        if memory_limit else None
+    chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, decode=not byte_mode, sizer=sizer))
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    writer = _ChunkWriter(background=parallel_io, queue_size=queue_size, compression=compression,
+                          compresslevel=compresslevel, output_format=output_format)
+    # 各数据块输出的列保持一致，白名单：原始列 + [keywords]，黑名单：原始列 + [keywords] + drop_reason
+    white_columns = list(columns) + (['keywords'] if keyword else [])
+    black_columns = list(columns) + (['keywords', 'drop_reason'] if keyword else ['drop_reason'])
+    cache = _MatchCache(maxsize=match_cache) if match_cache else None
+    plan = _rule_plan(df_rule_sorted, optimize=optimize)
+    for i, lines in enumerate(chunks, 1):
+        print("%s\t处理%s第%d部分" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, i))
+        if byte_mode:
+            s_lines = pd.Series(lines)
+            df_chunk = pd.DataFrame([line.split(b',') for line in lines])
+        else:
+            df_chunk = pd.DataFrame(lines)[0].str.split(',', expand=True)
+        df_chunk.columns = columns
+
+        # 一次性计算每一行的标签：命中的规则、所属地区及清洗结果，未命中任何规则的行记为最后一个地区之后
+        rule_pos, status = _merchant_labels(df_chunk, df_rule_sorted, byte_mode=byte_mode, encoding=encoding,
+                                            cache=cache, backend=regex_backend, plan=plan)
+        row_district = np.where(rule_pos >= 0, rule_district[rule_pos], len(districts))
+
+        if show:
+            for k, district in enumerate(districts):
+                count_raw = (row_district >= k).sum()  # 前面的地区未命中、留待当前地区清洗的行数
+                count_clean = ((row_district == k) & (status == 0)).sum()
+                count_black = ((row_district == k) & (status > 0)).sum()
+                count_unmatch = (row_district > k).sum()
+                print("\t清洗%s，共%d行，其中white:black:unmatch = %.1f%% : %.1f%% : %.1f%% = %d : %d : %d"
+                      % (district, count_raw, (100 * count_clean / (count_raw + 0.001)),
+                         (100 * count_black / (count_raw + 0.001)),
+                         (100 * count_unmatch / (count_raw + 0.001)), count_clean, count_black, count_unmatch))
+
+        # 命中规则的行按 规则-结果-行号 排序，与逐条规则执行时的输出顺序一致，再按 地区-黑白 分组输出
+        claimed = np.flatnonzero(rule_pos >= 0)
+        claimed = claimed[np.lexsort((claimed, status[claimed], rule_pos[claimed]))]
+        if reason_format == 'code':
+            extra = dict(drop_reason=rule_pos[claimed] * 4 + status[claimed])
+        else:
+            extra = dict(drop_reason=drop_reasons[status[claimed]])
+        if keyword:  # 通过name_white的行记录相应的关键字
+            extra['keywords'] = np.where(status[claimed] == 1, None, rule_keywords[rule_pos[claimed]])
+        df_claimed = df_chunk.iloc[claimed].assign(**extra)
+        for (k, white), df_group in df_claimed.groupby([row_district[claimed], status[claimed] == 0], sort=False):
+            district = str(districts[k])
+            if white:
+                output_columns = white_columns
+                output_file = path_clean + file_name + '_' + district + '_white' + suffix
+            else:
+                output_columns = black_columns
+                output_file = path_black + file_name + '_' + district + '_black' + suffix
+            if byte_mode:  # 原始行直接输出，追加的字段按原文件编码
+                writer.write_lines(_append_fields(s_lines, df_group[output_columns[len(columns):]], encoding),
+                                   output_file)
+            else:
+                writer.write(df_group[output_columns], output_file)
+
+        # 各地区的未匹配结果为该地区及之前的地区均未命中的行
+        for k, district in enumerate(districts):
+            s_unmatch = row_district > k
+            if s_unmatch.sum() == 0:
+                break
+            output_file = path_black + file_name + '_' + str(district) + '_unmatch' + suffix
+            if byte_mode:
+                writer.write_lines(s_lines[s_unmatch], output_file)
+            else:
+                writer.write(df_chunk[s_unmatch], output_file)
+        if sizer:
+            sizer.update(lines, df_chunk)
+    writer.close()
+
+    # 对各输出文件执行外部排序及去重
+    if sort_key:
+        for output_file in writer.files:
+            sort_file(output_file, key=[list(columns).index(col) for col in sort_key], unique=unique,
+                      memory=sort_memory, compresslevel=compresslevel, show=show)
+
+
+def _wilson(k, n, z=1.96):
+    """
+    比例的Wilson置信区间，样本量较小或比例接近0、1时仍然有效
+    :param k: array, 命中数
+    :param n: array, 样本量
+    :param z: float, 正态分位数，1.96对应95%置信水平
+    :return: (array, array), 置信区间的下限及上限，样本量为0时为(0, 1)
+    """
+    k = np.asarray(k, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = k / n
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return np.where(n > 0, center - half, 0).clip(0, 1), np.where(n > 0, center + half, 1).clip(0, 1)
+
+
+def optimize_rules(df_rule, file_name=None, show=True):
+    """
+    商户清洗规则表的优化：在不改变清洗结果（包括每一行归属于哪条规则）的前提下生成执行计划，
+    跳过城市白名单与前面的规则重复的规则，合并相邻的、各分支均以^开头的城市白名单（在开头位置按规则顺序取第一个命中的规则），
+    name_white、name_black、mcc_white均相同的规则只执行一次名称及MCC匹配；打印优化前后的执行计划及减少的匹配次数。
+    industry_merchant_clean设置optimize=True时按该计划执行
+    :param df_rule: DataFrame or RuleSet, 清洗规则文件，或RuleSet（按file_name分组）
+    :param file_name: str or list(str), 需要优化的文件名，默认为规则表中的全部文件
+    :param show: bool, 是否打印执行计划
+    :return: DataFrame, 各文件优化前后的城市白名单、名称及MCC匹配次数（每个数据块）
+    """
+    rule_set = df_rule if isinstance(df_rule, RuleSet) else RuleSet(df_rule)
+    names = [key[0] for key in rule_set.groups] if file_name is None else \
+        [file_name] if isinstance(file_name, str) else list(file_name)
+    records = list()
+    for name in names:
+        df_rule_sorted = rule_set.get(name)
+        if df_rule_sorted is None:
+            print('\n%s: 找不到清洗规则，优化跳过！' % name)
+            continue
+        plan = _rule_plan(df_rule_sorted, optimize=True)
+        n_rules = len(df_rule_sorted)
+        n_city = len(plan['city'])
+        n_check = len(plan['check'])
+        skipped = n_rules - sum(len(positions) for _, positions in plan['city'])
+        merged = sum(1 for _, positions in plan['city'] if len(positions) > 1)
+        records.append(dict(file_name=name, rules=n_rules, city_before=n_rules, city_after=n_city,
+                            check_before=3 * n_rules, check_after=3 * n_check, skipped=skipped, merged=merged))
+        if show:
+            print("\n%s: 规则%d条，城市白名单匹配 %d次 → %d次（跳过重复的城市规则%d条，合并%d组），"
+                  "名称及MCC匹配 %d次 → %d次（最多，每个数据块）" % (name, n_rules, n_rules, n_city, skipped, merged,
+                                                      3 * n_rules, 3 * n_check))
+            for step, (pattern, positions) in enumerate(plan['city'], 1):
+                print("\t城市%d：规则%s\t%s" % (step, positions, pattern if len(positions) == 1 else
+                                              ' | '.join(str(df_rule_sorted['citycode_white'].iloc[k])
+                                                         for k in positions)))
+            for step, (patterns, positions) in enumerate(plan['check'], 1):
+                if len(positions) > 1:
+                    print("\t名称及MCC%d：规则%s共用%s" % (step, positions, list(patterns)))
+    df_plan = pd.DataFrame(records)
+    if show and len(df_plan) > 0:
+        print("\n优化完毕，城市白名单匹配共减少%d次，名称及MCC匹配共减少%d次（每个数据块）" % (
+            (df_plan['city_before'] - df_plan['city_after']).sum(), (df_plan['check_before'] - df_plan['check_after']).sum()))
+    return df_plan
+
+
+def merchant_rule_dry_run(file, columns, df_rule, sample=None, n=5000, encoding=None, m=20, keyword=False,
+                          total=None, z=1.96, high=0.99, regex_backend='re', random_state=None, path_output=None,
+                          show=True, optimize=False, seek=False):
+    """
+    商户清洗规则的试运行：在样本上执行industry_merchant_clean的清洗标签计算（不输出清洗结果），估计各规则及各地区的
+    white/black/unmatch比例（Wilson置信区间），并推算全量清洗的耗时及各输出文件的大小；同时标记样本中未命中任何行、
+    或几乎命中全部剩余行的规则，用于在正式清洗前检查规则表
+    :param file: str, 待清洗的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件，文件名用于匹配规则
+    :param columns: list, 文件列名
+    :param df_rule: DataFrame or RuleSet, 清洗规则文件，或RuleSet（按file_name分组）
+    :param sample: str, 样本文件，如line_sample的抽样结果，默认单次遍历file临时抽取n行（不解码、不执行规则）
+    :param n: int, 临时抽样的行数
+    :param encoding: str, file的编码方式，样本文件按line_sample的输出读取（utf-8）
+    :param m: int, 临时抽样时每次读入的数据量，单位为兆
+    :param keyword: bool, 推算输出大小时是否计入keywords列，与industry_merchant_clean一致
+    :param total: int, 全量行数，默认临时抽样时为实际行数，使用样本文件时未压缩文件按平均行长估计，压缩文件按count_line统计
+    :param z: float, 置信区间的正态分位数，默认1.96（95%）
+    :param high: float, 规则的城市白名单命中剩余行的比例、或名称白名单的通过比例不低于该值时标记为几乎命中全部
+    :param regex_backend: str, 正则引擎，可选're'（默认）、'regex'、're2'（线性时间，需安装google-re2），未安装或不支持的正则改用re
+    :param random_state: int, 临时抽样的随机数种子
+    :param path_output: str, 保存试运行报告的路径，默认不保存
+    :param show: bool, 是否打印试运行报告
+    :param optimize: bool, 是否按optimize_rules的执行计划执行规则，用于估计优化后的耗时
+    :param seek: bool, 临时抽样时是否基于随机定位近似抽样（同line_sample的seek），不遍历文件，全量行数按估计的平均行长推算；
+                 仅支持未压缩文件，压缩文件仍遍历抽样
+    :return: (DataFrame, DataFrame), 各规则及各地区（含推算的输出行数及大小）的试运行报告
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    file_name = str(os.path.basename(file).split('.')[0])
+    rule_set = df_rule if isinstance(df_rule, RuleSet) else \
+        RuleSet(df_rule[df_rule['file_name'] == file_name], backend=regex_backend)
+    df_rule_sorted = rule_set.get(file_name)
+    if df_rule_sorted is None:
+        _input_error('\n%s: 找不到清洗规则，试运行跳过！' % file_name)
+        return
+
+    # 准备样本：样本文件或单次遍历临时抽样
+    read_seconds = None
+    start = time.perf_counter()
+    if sample:
+        lines = pd.read_csv(sample, header=None, dtype=str, keep_default_na=False).apply(
+            lambda x: ','.join(x), axis=1).tolist()
+        line_bytes = np.array([len(line.encode(encoding)) + 1 for line in lines])
+        if total is None:
+            with _open_input(file) as f:
+                compressed = not isinstance(f, io.BufferedReader)
+            total = count_line(file, encoding=encoding, show=False) if compressed else \
+                int(os.path.getsize(file) / line_bytes.mean())
+    else:
+        with _open_input(file) as f:
+            compressed = not isinstance(f, io.BufferedReader)
+        if seek and not compressed and os.path.getsize(file) > 0:
+            sample_lines, df_report = _seek_sample(file, n, random_state=random_state)
+            total = total or int(df_report['rows'].iloc[2])
+        else:
+            df_sample, df_summary = _sample_strata(_iter_lines(_iter_read(file, m=m, decode=False)), quota=n,
+                                                   random_state=random_state)
+            sample_lines = df_sample['line'].tolist()
+            total = total or int(df_summary['population'].sum())
+        read_seconds = time.perf_counter() - start
+        line_bytes = np.array([len(line) + 1 for line in sample_lines])
+        lines = [line.decode(encoding) for line in sample_lines]
+    if len(lines) == 0:
+        _input_error('\n%s: 样本为空，试运行跳过！' % file_name)
+        return
+
+    # 在样本上计算清洗标签并计时
+    start = time.perf_counter()
+    df_chunk = pd.DataFrame(lines)[0].str.split(',', expand=True)
+    df_chunk.columns = columns
+    rule_pos, status = _merchant_labels(df_chunk, df_rule_sorted, encoding=encoding, backend=regex_backend,
+                                        plan=_rule_plan(df_rule_sorted, optimize=optimize))
+    label_seconds = (time.perf_counter() - start) / len(lines) * total
+    size = len(lines)
+
+    # 各规则：命中行数（占样本）、到达该规则时尚未归属的行数，及通过name_white、name_black、mcc_white的情况
+    districts = df_rule_sorted['district'].unique()
+    rule_district = df_rule_sorted['district'].map({d: k for k, d in enumerate(districts)}).values
+    claimed = np.bincount(rule_pos[rule_pos >= 0], minlength=len(df_rule_sorted))
+    reached = size - np.concatenate([[0], np.cumsum(claimed)[:-1]])
+    counts = np.zeros((len(df_rule_sorted), 4), dtype='int64')
+    np.add.at(counts, (rule_pos[rule_pos >= 0], status[rule_pos >= 0]), 1)
+    df_rules = df_rule_sorted[['district', 'citycode_white', 'name_white', 'name_black', 'mcc_white']].reset_index(
+        drop=True)
+    df_rules.insert(0, 'rule', np.arange(len(df_rules)))
+    df_rules['reached'] = reached
+    df_rules['claimed'] = claimed
+    df_rules['white'] = counts[:, 0]
+    df_rules['black'] = counts[:, 1:].sum(1)
+    for col, k in [('claim', claimed), ('white', counts[:, 0]), ('black', counts[:, 1:].sum(1))]:
+        low, up = _wilson(k, size, z)
+        df_rules[col + '_rate'] = k / size
+        df_rules[col + '_low'] = low
+        df_rules[col + '_high'] = up
+    df_rules['projected_white'] = (df_rules['white_rate'] * total).round().astype('int64')
+    df_rules['projected_black'] = (df_rules['black_rate'] * total).round().astype('int64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        name_pass = 1 - counts[:, 1] / claimed
+    flags = [[] for _ in range(len(df_rules))]
+    for k in range(len(df_rules)):
+        if claimed[k] == 0:
+            flags[k].append('未命中任何行（命中率上限%.2f%%）' % (100 * df_rules['claim_high'].iloc[k]))
+            continue
+        if claimed[k] >= high * reached[k] and k < len(df_rules) - 1:
+            flags[k].append('城市白名单几乎命中全部剩余行')
+        if name_pass[k] >= high:
+            flags[k].append('名称白名单几乎全部通过')
+        elif name_pass[k] == 0:
+            flags[k].append('名称白名单未命中任何行')
+    df_rules['flag'] = ['；'.join(flag) for flag in flags]
+
+    # 各地区：与industry_merchant_clean打印的统计口径一致，并推算各输出文件的行数及大小（未压缩的csv）
+    row_district = np.where(rule_pos >= 0, rule_district[np.maximum(rule_pos, 0)], len(districts))
+    keywords = df_rule_sorted['name_white'].astype(str).str.len().values + 1 if keyword else \
+        np.zeros(len(df_rule_sorted), dtype='int64')
+    reasons = np.array([0, len('不在name_white内'.encode(encoding)), len(b'name_black'),
+                        len('MCC 不在范围内'.encode(encoding))]) + 1
+    white_bytes = line_bytes + np.where(status == 0, keywords[np.maximum(rule_pos, 0)], 0)
+    black_bytes = line_bytes + reasons[status] + np.where(status == 1, 1 if keyword else 0,
+                                                          keywords[np.maximum(rule_pos, 0)])
+    records = list()
+    for k, district in enumerate(districts):
+        s_raw = row_district >= k
+        s_white = (row_district == k) & (status == 0)
+        s_black = (row_district == k) & (status > 0)
+        s_unmatch = row_district > k
+        record = dict(district=district, reached=s_raw.sum())
+        for col, s_bool, row_bytes in [('white', s_white, white_bytes), ('black', s_black, black_bytes),
+                                       ('unmatch', s_unmatch, line_bytes)]:
+            low, up = _wilson(s_bool.sum(), s_raw.sum(), z)
+            record.update({col: s_bool.sum(), col + '_rate': s_bool.sum() / max(s_raw.sum(), 1),
+                           col + '_low': float(low), col + '_high': float(up),
+                           col + '_rows': int(round(s_bool.sum() / size * total)),
+                           col + '_mb': row_bytes[s_bool].sum() / size * total / 1024 / 1024})
+        records.append(record)
+    df_districts = pd.DataFrame(records)
+
+    if path_output:
+        if not os.path.exists(path_output):
+            os.makedirs(path_output)
+        df_rules.to_csv(os.path.join(path_output, 'dryrun_%s_rules.txt' % file_name), index=False)
+        df_districts.to_csv(os.path.join(path_output, 'dryrun_%s_districts.txt' % file_name), index=False)
+    if show:
+        print("\n%s: 样本%d行，全量约%d行，推算清洗耗时约%.1f秒（不含读写%s）" % (
+            file_name, size, total, label_seconds,
+            '，临时抽样耗时%.1f秒' % read_seconds if read_seconds is not None else ''))
+        for _, row in df_districts.iterrows():
+            print("\t%s：white:black:unmatch = %.1f%% [%.1f%%, %.1f%%] : %.1f%% [%.1f%%, %.1f%%] : "
+                  "%.1f%% [%.1f%%, %.1f%%]，推算输出约%.1fM : %.1fM : %.1fM" % tuple(
+                      [row['district']] + [100 * row[col + suffix] for col in ['white', 'black', 'unmatch']
+                                           for suffix in ['_rate', '_low', '_high']] +
+                      [row[col + '_mb'] for col in ['white', 'black', 'unmatch']]))
+        df_flag = df_rules[df_rules['flag'] != '']
+        if len(df_flag) > 0:
+            print("\n下列规则需要检查:\n")
+            print(df_flag[['rule', 'district', 'citycode_white', 'name_white', 'claimed', 'reached', 'flag']])
+        else:
+            print("\n检查完毕，没有发现未命中或几乎命中全部的规则")
+    return df_rules, df_districts
+
+
+def _merge_runs(runs, handle, sort_key, unique=False):
+    """
+    多路归并各有序段并写入输出文件，键相同的行保持原有的先后顺序
+    :param runs: list(str), 有序段文件名，按原文件中的先后顺序排列
+    :param handle: 二进制输出文件对象
+    :param sort_key: function, 由行计算排序键的函数
+    :param unique: bool, 是否按键去重，保留第一条
+    :return: int, 输出行数
+    """
+    files = [open(run, 'rb') for run in runs]
+    count = 0
+    last = None
+    try:
+        for line in heapq.merge(*[(line.rstrip(b'\n') for line in f) for f in files], key=sort_key):
+            if unique:
+                key = sort_key(line)
+                if key == last:
+                    continue
+                last = key
+            handle.write(line + b'\n')
+            count += 1
+    finally:
+        for f in files:
+            f.close()
+    return count
+
+
+def sort_file(file, key, output=None, unique=False, memory=100, fan_in=64, compresslevel=None, path_tmp=None,
+              show=True):
+    """
+    外部归并排序：在有限内存下按指定的键列对无表头的逗号分隔文本文件进行排序，并可按键列去重。
+    分段读入约memory兆数据，段内排序后写入临时文件（有序段），再多路归并；排序及比较均在bytes上进行，
+    与文件编码无关，键列按字节序比较
+    :param file: str, 待排序的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param key: list(int), 键列所在的位置，从0开始，例如按第一列及第五列排序，则输入[0, 4]
+    :param output: str, 输出文件名，默认覆盖原文件；文件后缀为.gz/.bz2/.xz时压缩输出
+    :param unique: bool, 是否按键列去重，键相同的行保留原文件中的第一条
+    :param memory: int, 每个有序段读入的数据量，单位为兆，排序时的内存占用约为其数倍
+    :param fan_in: int, 每次归并的有序段个数上限，超过时分多轮归并
+    :param compresslevel: int, 压缩输出时的压缩级别
+    :param path_tmp: str, 存放有序段临时文件的路径，默认为输出文件所在路径
+    :param show: bool, 是否打印中间过程
+    :return: 排序结果，本地文件
+    """
+    output = output or file
+    compression = None
+    for name, suffix in _COMPRESSION_SUFFIX.items():
+        if output.endswith(suffix):
+            compression = name
+
+    def sort_key(line):
+        fields = line.split(b',')
+        return tuple(fields[k] if k < len(fields) else b'' for k in key)
+
+    path_tmp = tempfile.mkdtemp(dir=path_tmp or os.path.dirname(os.path.abspath(output)))
+    try:
+        # 第一步：分段读入，段内排序（及去重）后写入有序段
+        runs = list()
+        count = 0
+        for lines in _iter_lines(_iter_read(file, m=memory, decode=False)):
+            count += len(lines)
+            lines.sort(key=sort_key)  # 稳定排序，键相同的行保持原有顺序
+            if unique:
+                keys = [sort_key(line) for line in lines]
+                lines = [line for j, line in enumerate(lines) if j == 0 or keys[j] != keys[j - 1]]
+            run = os.path.join(path_tmp, 'run_%d' % len(runs))
+            with open(run, 'wb') as f:
+                f.write(b'\n'.join(lines) + b'\n')
+            runs.append(run)
+        count_run = len(runs)
+
+        # 第二步：有序段过多时分批归并，直至不超过fan_in个
+        while len(runs) > fan_in:
+            merged = list()
+            for j in range(0, len(runs), fan_in):
+                run = os.path.join(path_tmp, 'merge_%d_%d' % (len(runs), j))
+                with open(run, 'wb') as f:
+                    _merge_runs(runs[j:j + fan_in], f, sort_key, unique=unique)
+                for run_merged in runs[j:j + fan_in]:
+                    os.remove(run_merged)
+                merged.append(run)
+            runs = merged
+
+        # 第三步：最终归并，写入临时文件后替换输出文件
+        file_tmp = os.path.join(path_tmp, 'output')
+        handle = _open_output(file_tmp, compression=compression, compresslevel=compresslevel, binary=True)
+        try:
+            count_output = _merge_runs(runs, handle, sort_key, unique=unique)
+        finally:
+            handle.close()
+        os.replace(file_tmp, output)
+    finally:
+        shutil.rmtree(path_tmp, ignore_errors=True)
+    if show:
+        print("\t%s排序完毕，共%d行，有序段%d个，输出%d行" % (os.path.basename(output), count, count_run, count_output))
+
+
+def _partition_range(file, start, end, key_col, n_shards, outputs, m=20):
+    """
+    将文件中一段字节范围内的行按键列的哈希值写入各分片，每个分片保持一个带缓冲的输出文件
+    :param file: str, 待分片的文件名，含路径及后缀
+    :param start: int, 字节范围的起点（行首），为None时读取整个文件（可为压缩文件）
+    :param end: int, 字节范围的终点（行首，不含）
+    :param key_col: int, 键列所在的位置，从0开始
+    :param n_shards: int, 分片个数
+    :param outputs: list(str), 各分片的输出文件名
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :return: list(int), 各分片的行数
+    """
+    def read_range():
+        with open(file, 'rb') as f:
+            f.seek(start)
+            remain = end - start
+            while remain > 0:
+                read = f.read(min(1024 * 1024 * m, remain))
+                if not read:
+                    break
+                remain -= len(read)
+                yield read
+
+    chunks = _iter_read(file, m=m, decode=False) if start is None else read_range()
+    counts = [0] * n_shards
+    handles = [open(output, 'wb', buffering=1024 * 1024) for output in outputs]
+    try:
+        for lines in _iter_lines(chunks):
+            shards = [list() for _ in range(n_shards)]
+            for line in lines:
+                fields = line.split(b',', key_col + 1)
+                key = fields[key_col] if len(fields) > key_col else b''
+                shards[zlib.crc32(key) % n_shards].append(line)  # crc32为稳定哈希，不同运行及进程间结果一致
+            for k, shard in enumerate(shards):
+                if shard:
+                    handles[k].write(b'\n'.join(shard) + b'\n')
+                    counts[k] += len(shard)
+    finally:
+        for handle in handles:
+            handle.close()
+    return counts
+
+
+def partition_file(file, key_col, n_shards, path_output=None, workers=1, m=20, show=True):
+    """
+    按键列的哈希值将商户文件拆分成n_shards个分片，同一键值的所有行都在同一个分片中。
+    采用稳定哈希（crc32），不同运行之间的分片结果一致；workers大于1时将文件按行首对齐的字节范围切分，
+    多进程并行处理，各进程的结果按原文件顺序合并。行原样输出，不做解码
+    :param file: str, 待分片的文件名，含路径及后缀，压缩文件只能单进程处理
+    :param key_col: int, 键列所在的位置，从0开始，例如商户编号在第一列，则输入0
+    :param n_shards: int, 分片个数
+    :param path_output: str, 分片的输出路径，默认为文件所在路径下的shard文件夹
+    :param workers: int, 并行处理的进程数
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param show: bool, 是否打印中间过程
+    :return: DataFrame, 分片清单（各分片的文件名、行数及大小），同时保存为本地文件
+    """
+    # 提取文件路径及文件名
+    file_name = str(os.path.basename(file).split('.')[0])
+    file_path = os.path.dirname(file) + '/'
+    if not path_output:
+        path_output = file_path + 'shard/'
+    if not os.path.exists(path_output):
+        os.mkdir(path_output)
+    outputs = [path_output + file_name + '_shard' + str(k).rjust(len(str(n_shards - 1)), '0') + '.txt'
+               for k in range(n_shards)]
+    size = os.path.getsize(file)
+    if show:
+        print("\n%s: 约%.1fM，开始拆分成%d个分片..." % (file_name, size / 1024 / 1024, n_shards))
+
+    with _open_input(file) as f:
+        compressed = not isinstance(f, io.BufferedReader)
+    if workers <= 1 or compressed:
+        counts = _partition_range(file, None, None, key_col, n_shards, outputs, m=m)
+    else:
+        # 按字节数均分文件，各分界点对齐到下一行的行首
+        bounds = [0]
+        with open(file, 'rb') as f:
+            for j in range(1, workers):
+                f.seek(max(size * j // workers - 1, bounds[-1]))
+                f.readline()
+                bounds.append(min(f.tell(), size))
+        bounds.append(size)
+        parts = [[output + '.part' + str(j) for output in outputs] for j in range(workers)]
+        import concurrent.futures  # 仅多进程时导入，避免拖慢纯字节功能的启动
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_partition_range, file, bounds[j], bounds[j + 1], key_col, n_shards, parts[j],
+                                       m) for j in range(workers)]
+            results = [future.result() for future in futures]
+        counts = [sum(result[k] for result in results) for k in range(n_shards)]
+        # 各分片按原文件顺序合并各进程的结果
+        for k, output in enumerate(outputs):
+            with open(output, 'wb') as f_out:
+                for j in range(workers):
+                    with open(parts[j][k], 'rb') as f_part:
+                        shutil.copyfileobj(f_part, f_out, 1024 * 1024 * m)
+                    os.remove(parts[j][k])
+
+    # 分片清单
+    df_manifest = pd.DataFrame({'shard': range(n_shards), 'file': outputs, 'rows': counts,
+                                'bytes': [os.path.getsize(output) for output in outputs]})
+    df_manifest.to_csv(path_output + file_name + '_manifest.txt', index=False)
+    if show:
+        print(df_manifest)
+        mean_rows = df_manifest['rows'].mean()
+        print("======%s\t%s处理完毕，共%d行，各分片行数最大值/平均值 = %.3f======" % (
+            dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, df_manifest['rows'].sum(),
+            df_manifest['rows'].max() / mean_rows if mean_rows > 0 else 0))
+    return df_manifest
+
+
+def _mask_quoted(lines, sep, n_columns, locs, levels):
+    """
+    按csv规则（双引号包裹的字段可含分隔符及引号）解析行并脱敏，脱敏后按同样的规则重新拼接
+    :param lines: list(str), 待脱敏的行
+    :param sep: str, 字段分隔符，须为单个字符
+    :param n_columns: int, 文件列数
+    :param locs: list, 脱敏列的位置
+    :param levels: list, 脱敏列相应的脱敏数量级
+    :return: (list, list), 脱敏后的行及字段数与列数不一致的行在lines中的位置
+    """
+    rows = [next(csv.reader([line], delimiter=sep), []) for line in lines]
+    bad = [i for i, row in enumerate(rows) if len(row) != n_columns]
+    good = [i for i, row in enumerate(rows) if len(row) == n_columns]
+    out = []
+    if good:
+        df_values = pd.DataFrame([[rows[i][loc] for loc in locs] for i in good], dtype=object)
+        # 引号内的数值可能带千分位逗号，去掉后再转换
+        values = df_values.apply(lambda s: pd.to_numeric(s.str.replace(',', '', regex=False), errors='coerce'))
+        masked = _mask_values(values.to_numpy(dtype=float), levels)
+        valid = np.isfinite(masked)
+        text = np.nan_to_num(masked).astype(np.int64).astype(str)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=sep, lineterminator='\n')
+        for k, i in enumerate(good):
+            row = rows[i]
+            for j, loc in enumerate(locs):
+                if valid[k, j]:
+                    row[loc] = text[k, j]
+            writer.writerow(row)
+        out = buffer.getvalue().split('\n')[:-1]
+    return out, bad
+
+
+def text_masking(file, masking, encoding=None, sep=',', columns=None, m=20, path_output=None, compression=None,
+                 compresslevel=None, parallel_io=False, queue_size=2, show=True, memory_limit=None):
+    """
+    分块读取文本文件，对指定列进行相应数量级的数据脱敏，逐块追加写入，列的顺序及其余字段保持不变。
+    输出文件与原文件同名、同编码，脱敏列的列名加上脱敏数量级后缀，空值及非数值的字段原样输出。
+    含双引号的行按csv规则解析（引号内可含分隔符），字段数与列数仍不一致的行无法定位脱敏列，不写入输出文件，
+    统计行数并打印前几行的行号，确保输出文件中没有未脱敏的原始行
+    :param file: str, 待脱敏的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param masking: dic(str: int), {待脱敏的列名: 相应的脱颖数量级}
+    :param encoding: str, 编码方式
+    :param sep: str, 字段分隔符
+    :param columns: list, 文件列名，默认为None，表示文件首行为表头
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param path_output: str, 脱敏数据输出保存路径，默认为文件所在路径下的output文件夹
+    :param compression: str, 输出文件的压缩格式，可选'gzip'、'bz2'、'xz'，默认不压缩
+    :param compresslevel: int, 压缩级别
+    :param parallel_io: bool, 是否在后台线程中预读数据块及写入结果
+    :param queue_size: int, 后台预读及写入的队列深度
+    :param show: bool, 是否打印中间过程
+    :param memory_limit: int, 内存预算，单位为兆，设置时根据前几个数据块测得的内存膨胀倍数及处理速度自动调整每次读入的数据量，
+                         m作为初始值
+    :return: str, 输出文件名
+    """
+    if compression and compression not in _COMPRESSION_SUFFIX:
+        _input_error("\n不支持的压缩格式%s，可选%s" % (compression, list(_COMPRESSION_SUFFIX.keys())))
+        return
+    encoding = encoding or locale.getpreferredencoding(False)
+    file_name = os.path.basename(file)
+    for suffix in _COMPRESSION_SUFFIX.values():
+        if file_name.endswith(suffix):
+            file_name = file_name[:-len(suffix)]
+    if not path_output:
+        path_output = os.path.dirname(file) + '/output/'
+    if not os.path.exists(path_output):
+        os.makedirs(path_output, exist_ok=True)
+    output = path_output + file_name + _COMPRESSION_SUFFIX.get(compression, '')
+    if os.path.exists(output):
+        os.remove(output)
+    if show:
+        print("\n%s: 约%.1fM，开始脱敏..." % (file_name, os.path.getsize(file) / 1024 / 1024))
+
+    sizer = _ChunkSizer(memory_limit, m=m, in_flight=2 * queue_size if parallel_io else 0, show=show) \
+        if memory_limit else None
+    chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, sizer=sizer))
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    writer = _ChunkWriter(background=parallel_io, queue_size=queue_size, compression=compression,
+                          compresslevel=compresslevel)
+    count = 0
+    locs = None
+    bad_lines = []  # 字段数与列数不一致、未写入输出文件的行号（从1开始，含表头）
+    for lines in chunks:
+        if locs is None:
+            header = columns is None
+            if header:
+                columns = lines.pop(0).split(sep)
+            missing = [col for col in masking if col not in columns]
+            if missing:
+                writer.close()
+                _input_error("\n%s: 脱敏列%s不在文件列%s中" % (file_name, missing, columns))
+                return
+            if header:  # 首行为表头，脱敏列的列名加上后缀后输出
+                writer.write_lines([sep.join([col + _MASKING_SUFFIX[masking[col]] if col in masking else col
+                                              for col in columns]).encode(encoding)], output)
+            locs = [columns.index(col) for col in masking]
+            levels = [masking[columns[loc]] for loc in locs]
+            if not lines:
+                continue
+        s_lines = pd.Series(lines, dtype=object)
+        df_chunk = s_lines.str.split(sep, expand=True, regex=False)
+        df_chunk = df_chunk.reindex(columns=range(max(df_chunk.shape[1], len(columns))))
+        # 所有脱敏列一次性转换成数值并四舍五入，无法转换的字段保留原值
+        values = df_chunk[locs].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        masked = _mask_values(values, levels)
+        valid = np.isfinite(masked)
+        text = np.where(valid, np.nan_to_num(masked).astype(np.int64).astype(str), None)
+        for j, loc in enumerate(locs):
+            df_chunk[loc] = df_chunk[loc].where(~valid[:, j], text[:, j])
+        s_joined = df_chunk[0].str.cat(df_chunk[list(range(1, len(columns)))], sep=sep) if len(columns) > 1 \
+            else df_chunk[0]
+        # 字段数与列数不一致或含引号的行，按csv规则重新解析脱敏，仍无法定位脱敏列的行不输出
+        complete = ((df_chunk.notna().sum(axis=1) == len(columns)) &
+                    ~s_lines.str.contains('"', regex=False)).to_numpy()
+        s_out = s_joined[complete]
+        if not complete.all():
+            rest = np.flatnonzero(~complete)
+            if len(sep) == 1:
+                quoted, bad = _mask_quoted([lines[i] for i in rest], sep, len(columns), locs, levels)
+            else:
+                quoted, bad = [], list(range(len(rest)))
+            keep = np.delete(rest, bad)
+            s_out = pd.concat([s_out, pd.Series(quoted, index=keep, dtype=object)]).sort_index()
+            bad_lines.extend((count + rest[bad] + 1 + header).tolist())
+        writer.write_lines([line.encode(encoding) for line in s_out], output)
+        count += len(lines)
+        if sizer:
+            sizer.update(lines, df_chunk)
+    writer.close()
+    if show:
+        print("======%s\t%s脱敏完毕，共%d行======" % (dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, count))
+    if bad_lines:
+        print("\n%s: %d行字段数与列数（%d）不一致，无法定位脱敏列，未写入输出文件，行号：%s%s" % (
+            file_name, len(bad_lines), len(columns), bad_lines[:10], '...' if len(bad_lines) > 10 else ''))
+    return output
+
+
+def _code_text(value):
+    """
+    编码-解码表的取值转成文本中的字符串形式：整数值的浮点数（如含空值的编码列读入后为1100.0）转成整数形式，空值为空字符串
+    :param value: 取值
+    :return: str
+    """
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ''
+        if float(value).is_integer():
+            return str(int(value))
+    if value is None or value is pd.NaT:
+        return ''
+    return str(value)
+
+
+def _decode_lookup(coding, decode):
+    """
+    由编码-解码表构建查找结构：编码（多列时为各列的组合）→ 行位置，一对多的编码保留第一条；
+    编码及解码取值按_code_text转成字符串
+    :param coding: DataFrame, 编码-解码表
+    :param decode: dict, 编码-解码表中的对应关系，{编码字段名：相应解码字段名}
+    :return: (Index, ndarray), 编码索引及各解码字段的取值（行位置与索引一致，最后一行为解码失败时的空值）
+    """
+    decode_key = list(decode.keys())
+    decode_value = list(decode.values())
+    coding_tmp = coding[decode_key + decode_value].applymap(_code_text).drop_duplicates()
+    duplicated = coding_tmp.duplicated(decode_key)
+    if duplicated.sum() > 0:
+        print("\n编码与解码为一对多，不满住唯一性，保留第一条，请检查:\n")
+        print(coding_tmp[coding_tmp.duplicated(decode_key, keep=False)])
+        coding_tmp = coding_tmp[~duplicated]
+    if len(decode_key) == 1:
+        index = pd.Index(coding_tmp[decode_key[0]])
+    else:
+        index = pd.MultiIndex.from_frame(coding_tmp[decode_key])
+    values = np.vstack([coding_tmp[decode_value].to_numpy(dtype=object), [[''] * len(decode_value)]])
+    return index, values
+
+
+def text_decode(file, coding, code, decode, encoding=None, sep=',', columns=None, m=20, path_output=None,
+                compression=None, compresslevel=None, parallel_io=False, queue_size=2, show=True, memory_limit=None):
+    """
+    分块读取文本文件，对指定列进行解码（同type_decode），解码结果以新的字段追加到每一行末尾，逐块写入。
+    编码-解码表只读入一次并构建成哈希索引，各数据块仅在去重后的编码上查找；编码按字符串匹配（数值编码按整数形式），
+    解码失败的字段输出为空，并在整个文件范围内汇总解码失败的编码及其行数；含引号的行按csv规则解析，
+    字段数与列数仍不一致的行无法定位解码列，解码字段输出为空，同样计入解码失败（编码记为“字段数与列数不一致”）
+    :param file: str, 待解码的文件名，含路径及后缀，支持gzip/bz2/xz压缩文件
+    :param coding: DataFrame, 编码-解码表
+    :param code: list, 需要解码的列名
+    :param decode: dict, 编码-解码表中的对应关系，{编码字段名：相应解码字段名}，与code按顺序对应
+    :param encoding: str, 编码方式
+    :param sep: str, 字段分隔符
+    :param columns: list, 文件列名，默认为None，表示文件首行为表头（输出时表头追加解码字段名）
+    :param m: int, 每次读入处理的数据量，单位为兆
+    :param path_output: str, 解码结果输出保存路径，默认为文件所在路径下的output文件夹
+    :param compression: str, 输出文件的压缩格式，可选'gzip'、'bz2'、'xz'，默认不压缩
+    :param compresslevel: int, 压缩级别
+    :param parallel_io: bool, 是否在后台线程中预读数据块及写入结果
+    :param queue_size: int, 后台预读及写入的队列深度
+    :param show: bool, 是否打印中间过程
+    :param memory_limit: int, 内存预算，单位为兆，设置时根据前几个数据块测得的内存膨胀倍数及处理速度自动调整每次读入的数据量，
+                         m作为初始值
+    :return: (str, DataFrame), 输出文件名，及解码失败的编码（code各列）及相应的行数
+    """
+    if len(code) != len(decode):
+        _input_error("\n编码与解码字段个数不匹配，请重新输入\n")
+        return
+    if compression and compression not in _COMPRESSION_SUFFIX:
+        _input_error("\n不支持的压缩格式%s，可选%s" % (compression, list(_COMPRESSION_SUFFIX.keys())))
+        return
+    encoding = encoding or locale.getpreferredencoding(False)
+    file_name = os.path.basename(file)
+    for suffix in _COMPRESSION_SUFFIX.values():
+        if file_name.endswith(suffix):
+            file_name = file_name[:-len(suffix)]
+    if not path_output:
+        path_output = os.path.dirname(file) + '/output/'
+    if not os.path.exists(path_output):
+        os.makedirs(path_output, exist_ok=True)
+    output = path_output + file_name + _COMPRESSION_SUFFIX.get(compression, '')
+    if os.path.exists(output):
+        os.remove(output)
+    index, values = _decode_lookup(coding, decode)
+    if show:
+        print("\n%s: 约%.1fM，编码表%d条，开始解码..." % (file_name, os.path.getsize(file) / 1024 / 1024, len(index)))
+
+    sizer = _ChunkSizer(memory_limit, m=m, in_flight=2 * queue_size if parallel_io else 0, show=show) \
+        if memory_limit else None
+    chunks = _iter_lines(_iter_read(file, encoding=encoding, m=m, sizer=sizer))
+    if parallel_io:
+        chunks = _background_iter(chunks, queue_size=queue_size)
+    writer = _ChunkWriter(background=parallel_io, queue_size=queue_size, compression=compression,
+                          compresslevel=compresslevel)
+    count = 0
+    locs = None
+    failed = pd.Series(dtype='int64')  # 解码失败的编码 → 行数
+    ragged = '字段数与列数不一致' if len(code) == 1 else ('字段数与列数不一致',) * len(code)
+    for lines in chunks:
+        if locs is None:
+            header = columns is None
+            if header:
+                columns = lines.pop(0).split(sep)
+            missing = [col for col in code if col not in columns]
+            if missing:
+                writer.close()
+                _input_error("\n%s: 解码列%s不在文件列%s中" % (file_name, missing, columns))
+                return
+            if header:
+                writer.write_lines([sep.join(columns + list(decode.values())).encode(encoding)], output)
+            locs = [columns.index(col) for col in code]
+            if not lines:
+                continue
+        s_lines = pd.Series(lines, dtype=object)
+        df_chunk = s_lines.str.split(sep, expand=True, regex=False)
+        df_chunk = df_chunk.reindex(columns=range(max(df_chunk.shape[1], len(columns))))
+        # 字段数与列数不一致或含引号的行按csv规则重新解析（引号内可含分隔符），仍不一致的行无法定位解码列，解码字段输出为空
+        complete = ((df_chunk.notna().sum(axis=1) == len(columns)) &
+                    ~s_lines.str.contains('"', regex=False)).to_numpy()
+        if not complete.all():
+            rest = np.flatnonzero(~complete)
+            rows = [next(csv.reader([lines[i]], delimiter=sep), []) if len(sep) == 1 else lines[i].split(sep)
+                    for i in rest]
+            parsed = np.array([len(row) == len(columns) for row in rows])
+            if parsed.any():
+                df_chunk.loc[rest[parsed], locs] = [[row[loc] for loc in locs] for row, ok in zip(rows, parsed) if ok]
+                complete[rest[parsed]] = True
+        if len(locs) == 1:
+            codes, uniques = pd.factorize(df_chunk[locs[0]].fillna(''))
+            pos = index.get_indexer(uniques)[codes]
+        else:
+            keys = pd.MultiIndex.from_frame(df_chunk[locs].fillna(''))
+            pos = index.get_indexer(keys)
+        pos = np.where(complete, pos, -1)
+        s_fail = (pos == -1) & complete
+        if s_fail.sum() > 0:
+            key = df_chunk.loc[s_fail, locs[0]] if len(locs) == 1 else \
+                pd.Series(list(zip(*[df_chunk.loc[s_fail, loc] for loc in locs])), dtype=object)
+            failed = failed.add(key.value_counts(), fill_value=0)
+        n_ragged = len(complete) - complete.sum()
+        if n_ragged > 0:
+            failed = failed.add(pd.Series([n_ragged], index=pd.Index([ragged], tupleize_cols=False)), fill_value=0)
+        decoded = values[pos]  # 解码失败时pos为-1，取最后一行的空值
+        s_out = s_lines.str.cat([pd.Series(decoded[:, j], index=s_lines.index) for j in range(decoded.shape[1])],
+                                sep=sep)
+        writer.write_lines([line.encode(encoding) for line in s_out], output)
+        count += len(lines)
+        if sizer:
+            sizer.update(lines, df_chunk)
+    writer.close()
+
+    df_failed = failed.astype('int64').sort_values(ascending=False).rename('count').reset_index()
+    if len(code) == 1:
+        df_failed.columns = code + ['count']
+    else:
+        df_failed = pd.concat([pd.DataFrame(df_failed['index'].tolist(), columns=code), df_failed[['count']]], axis=1)
+    if show:
+        if len(df_failed) > 0:
+            print("\n注意，存在解码失败，请检查：\n")
+            print(df_failed)
+        print("======%s\t%s解码完毕，共%d行，其中解码失败%d行======" % (
+            dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), file_name, count, df_failed['count'].sum()))
+    return output, df_failed
+
+
+def texts_masking(path, masking, workers=1, suffix=('.txt', '.csv'), path_output=None, **kwargs):
+    """
+    将路径中所有文本文件的指定列进行相应数量级的数据脱敏，多个文件之间多进程并行处理
+    :param path: str, 文件所在路径，如d:/folder_name/
+    :param masking: dic(str: int), {待脱敏的列名: 相应的脱颖数量级}
+    :param workers: int, 并行处理的进程数
+    :param suffix: tuple(str), 待脱敏的文件后缀，压缩文件按去掉压缩后缀后的文件名判断
+    :param path_output: str, 脱敏数据输出保存路径，默认为path下的output文件夹
+    :param kwargs: text_masking的其余参数，如encoding、sep、m、compression等
+    :return: list(str), 输出文件名
+    """
+    if not path_output:
+        path_output = path + 'output/'
+    files = []
+    for f in sorted(os.listdir(path)):
+        name = f
+        for compression_suffix in _COMPRESSION_SUFFIX.values():
+            if name.endswith(compression_suffix):
+                name = name[:-len(compression_suffix)]
+        if os.path.isfile(os.path.join(path, f)) and name.endswith(tuple(suffix)):
+            files.append(path + f)
+    if workers <= 1:
+        return [text_masking(file, masking, path_output=path_output, **kwargs) for file in files]
+    # 大文件优先提交，减少并行处理的尾部等待
+    files.sort(key=os.path.getsize, reverse=True)
+    import concurrent.futures  # 仅多进程时导入，避免拖慢纯字节功能的启动
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(text_masking, file, masking, path_output=path_output, **kwargs) for file in files]
+        return [future.result() for future in futures]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+excel模块的回归测试：sheet内的清洗规则按规则表顺序执行，不受district列影响
+"""
+
+import pandas as pd
+
+import raccoon
+from raccoon import _common, jobs
+
+
+def _rule_table():
+    # district交错出现：若按地区重排，第三条规则会先于第二条执行，"apple shop"被判为黑名单
+    return pd.DataFrame({'excel': ['co'] * 3, 'sheet': ['s1'] * 3, 'district': ['A', 'B', 'A'],
+                         'name_white': ['zzz', 'shop', 'banana'], 'name_black': ['zzz', 'zzz', 'apple']})
+
+
+def _write_sample(path):
+    with pd.ExcelWriter(str(path / 'co.xlsx')) as writer:
+        pd.DataFrame({'id': [1, 2, 3], 'name': ['apple shop', 'banana', 'pear']}).to_excel(
+            writer, sheet_name='s1', index=False)
+
+
+def _read_result(path):
+    white = pd.read_excel(str(path / 'white' / 'co_white.xlsx'), sheet_name='s1')
+    black = pd.read_excel(str(path / 'black' / 'co_black.xlsx'), sheet_name='s1')
+    return sorted(white['name']), sorted(black['name'])
+
+
+def _check(path):
+    white, black = _read_result(path)
+    assert white == ['apple shop', 'banana']
+    assert black == ['pear']
+
+
+def test_clean_excel_sample_keeps_rule_order(tmp_path):
+    _write_sample(tmp_path)
+    raccoon.clean_excel_sample(_rule_table(), str(tmp_path) + '/', {'excel': 'excel', 'sheet': 'sheet'},
+                               white={'name': 'name_white'}, black={'name': 'name_black'}, default=False, show=False)
+    _check(tmp_path)
+
+
+def test_job_runner_keeps_rule_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(_common, '_STRICT', False)  # _run_job在当前进程中执行，测试结束后恢复
+    _write_sample(tmp_path)
+    _rule_table().to_csv(str(tmp_path / 'rule.csv'), index=False)
+    job = dict(function='clean_excel_sample', input=str(tmp_path) + '/', rule=str(tmp_path / 'rule.csv'),
+               rule_param='df', params=dict(primary={'excel': 'excel', 'sheet': 'sheet'},
+                                            white={'name': 'name_white'}, black={'name': 'name_black'},
+                                            default=False, show=False))
+    success, error = jobs._run_job(job, str(tmp_path / 'job.log'))
+    assert success, error
+    _check(tmp_path)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+stats模块的回归测试：增量聚合存储与全量重算结果一致
+"""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+import raccoon
+
+STATISTIC = ['金额', '笔数']
+KEYS = ['公司', '品牌', '日期']
+
+
+def _monthly_flow(seed=0):
+    rng = np.random.default_rng(seed)
+    months = [dt.date(y, m, 1) for y in range(2018, 2021) for m in range(1, 13)]
+    df = pd.DataFrame([(c, c + str(b), d) for c in 'ABC' for b in range(4) for d in months], columns=KEYS)
+    df['金额'] = rng.random(len(df)) * 100
+    df['笔数'] = rng.integers(1, 50, len(df))
+    return df, months
+
+
+def _brand_range():
+    return pd.DataFrame({'公司': ['A', 'B'], '品牌': ['A1', 'B2'], '纳入': [20180301, 0], '剔除': [29999999, 20190101]})
+
+
+def _assert_same(left, right, keys):
+    left = left.sort_values(keys).reset_index(drop=True)
+    right = right.sort_values(keys).reset_index(drop=True)
+    assert (left[keys].astype(str).values == right[keys].astype(str).values).all()
+    assert np.allclose(left[STATISTIC].astype(float).values, right[STATISTIC].astype(float).values)
+
+
+def test_aggregate_store_matches_full_recompute():
+    df, months = _monthly_flow()
+    kwargs = dict(brand_range=_brand_range(), date_in='纳入', date_out='剔除')
+    store = raccoon.AggregateStore(STATISTIC)
+    for month in months:
+        store.update(df[df['日期'] == month], show=False, **kwargs)
+    # 重复提交未变的期数
+    assert store.update(df[df['日期'] >= months[-3]], show=False, **kwargs) == (0, 0, 9)
+    # 修订某期某公司的流水，以及某期少了一个品牌
+    revised = df[(df['日期'] == months[5]) & (df['公司'] == 'B')].copy()
+    revised.loc[revised.index[0], '金额'] += 1
+    assert store.update(revised, show=False, **kwargs) == (0, 1, 0)
+    df.loc[revised.index] = revised
+    dropped = (df['日期'] == months[7]) & (df['公司'] == 'C') & (df['品牌'] == 'C3')
+    assert store.update(df[(df['日期'] == months[7]) & (df['公司'] == 'C') & ~dropped], show=False,
+                        **kwargs) == (0, 1, 0)
+    df = df[~dropped]
+
+    assert store.verify(df, **kwargs)
+    brand, company = raccoon.statistic_monthly(df.copy(), _brand_range(), ['公司', '品牌'], ['公司', '品牌'], STATISTIC,
+                                               '纳入', '剔除', keep=False)
+    _assert_same(store.brand(), brand, KEYS)
+    _assert_same(store.company(), company, KEYS)
+    company['季度'] = raccoon.get_quarter(company)
+    _assert_same(store.rollup('quarter'), raccoon.statistic_merge(company, STATISTIC, ['公司', '品牌', '季度']),
+                 ['公司', '品牌', '季度'])
+
+
+def test_aggregate_store_detects_divergence():
+    df, months = _monthly_flow()
+    store = raccoon.AggregateStore(STATISTIC)
+    store.update(df, show=False)
+    assert store.verify(df)
+    assert not store.verify(df.assign(金额=df['金额'] * (df['公司'] != 'A')))
+
+
+def test_aggregate_store_save_load(tmp_path):
+    df, months = _monthly_flow()
+    store = raccoon.AggregateStore(STATISTIC)
+    store.update(df[df['日期'] < months[12]], show=False)
+    store.save(str(tmp_path / 'store.pkl'))
+    loaded = raccoon.AggregateStore.load(str(tmp_path / 'store.pkl'))
+    loaded.update(df[df['日期'] >= months[12]], show=False)
+    assert loaded.verify(df)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+text模块的回归测试：商户清洗结果与逐行、逐条规则执行的参考实现一致
+"""
+
+import os
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import raccoon
+from raccoon import text
+
+COLUMNS = ['id', 'mchnt_name', 'mcc', 'amt', 'city_cd']
+DROP_REASONS = [None, '不在name_white内', 'name_black', 'MCC 不在范围内']
+
+
+def _rule_table():
+    """
+    清洗规则表：城市白名单既有相互重叠、重复及以^锚定的正则，也有未锚定的正则，地区交错出现
+    """
+    return pd.DataFrame({
+        'file_name': ['shop'] * 9,
+        'district': ['dom', 'int', 'dom', 'int', 'dom', 'x', 'int', 'dom', 'x'],
+        'citycode_white': ['^10', '^0[38]', '^1', '^03|^08', '^10', '2', '^0156|^01', '^1|^2', '9$'],
+        'name_white': ['星巴克|麦当劳', 'starbucks|超市', '肯德基|星巴克', '.', '咖啡', '.', '加油', '便利', '.'],
+        'name_black': ['咖啡0', '超市3', 'zzz', '站1', '^$', '1$', '站2', 'zzz', '^x'],
+        'mcc_white': ['58', '54', '5', '5411', '58', '5', '5', '5', '^5'],
+    })
+
+
+def _merchant_lines(n=3000, seed=0):
+    rng = random.Random(seed)
+    names = ['星巴克', '麦当劳', '肯德基', 'STARBUCKS', '超市', '咖啡', '加油站', '便利店', 'x店']
+    cities = ['1000', '1023', '1100', '0344', '0856', '0156', '0123', '2019', '3999', '2000', '0000']
+    mccs = ['5812', '5411', '5541', '5999', '4111']
+    return ['%d,%s%d,%s,%d,%s' % (i, rng.choice(names), rng.randint(0, 4), rng.choice(mccs), rng.randint(1, 999),
+                                   rng.choice(cities)) for i in range(n)]
+
+
+def _reference_clean(lines, df_rule):
+    """
+    参考实现：按地区排列规则后，每一行依次检查各条规则，第一条城市白名单命中的规则决定该行的清洗结果
+    :return: dict, {输出文件的相对路径: 行列表}
+    """
+    codes = pd.factorize(df_rule['district'])[0]
+    rules = df_rule.iloc[sorted(range(len(df_rule)), key=lambda k: codes[k])].reset_index(drop=True)
+    districts = list(pd.unique(rules['district']))
+    labels = []
+    for row, line in enumerate(lines):
+        fields = line.split(',')
+        name, mcc, city = fields[1], fields[2], fields[4]
+        label = None
+        for k, rule in rules.iterrows():
+            if not re.search(rule['citycode_white'], city, re.IGNORECASE):
+                continue
+            if not re.search(rule['name_white'], name, re.IGNORECASE):
+                status = 1
+            elif re.search(rule['name_black'], name, re.IGNORECASE):
+                status = 2
+            elif not re.search(rule['mcc_white'], mcc, re.IGNORECASE):
+                status = 3
+            else:
+                status = 0
+            label = (k, status, row, districts.index(rule['district']))
+            break
+        labels.append(label)
+    expected = dict()
+    for k, status, row, d in sorted(label for label in labels if label is not None):
+        if status == 0:
+            expected.setdefault(os.path.join('white', 'shop_%s_white.txt' % districts[d]), []).append(lines[row])
+        else:
+            expected.setdefault(os.path.join('black', 'shop_%s_black.txt' % districts[d]), []).append(
+                lines[row] + ',' + DROP_REASONS[status])
+    for d, district in enumerate(districts):
+        unmatch = [lines[row] for row, label in enumerate(labels) if label is None or label[3] > d]
+        if unmatch:
+            expected[os.path.join('black', 'shop_%s_unmatch.txt' % district)] = unmatch
+    return expected
+
+
+def _run_clean(tmp_path, lines, df_rule, encoding='utf-8', **kwargs):
+    """
+    在临时目录中执行industry_merchant_clean
+    :return: dict, {输出文件的相对路径: 文件内容(bytes)}
+    """
+    path = tmp_path / ('run%d' % len(list(tmp_path.iterdir())))
+    path.mkdir()
+    with open(path / 'shop.txt', 'w', encoding=encoding, newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+    raccoon.industry_merchant_clean(str(path / 'shop.txt'), COLUMNS, df_rule, encoding=encoding, show=False,
+                                    **kwargs)
+    outputs = dict()
+    for folder in ['white', 'black']:
+        for file in sorted(os.listdir(path / folder)):
+            with open(path / folder / file, 'rb') as f:
+                outputs[os.path.join(folder, file)] = f.read()
+    return outputs
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(byte_mode=True), dict(match_cache=1000)])
+def test_merchant_clean_matches_reference(tmp_path, kwargs):
+    lines = _merchant_lines()
+    outputs = _run_clean(tmp_path, lines, _rule_table(), **kwargs)
+    expected = {file: ('\n'.join(rows) + '\n').encode('utf-8') for file, rows in
+                _reference_clean(lines, _rule_table()).items()}
+    assert outputs == expected
+
+
+def _random_rule_table(seed):
+    """
+    随机规则表：城市白名单从相互重叠的锚定及未锚定正则中抽取，名称及MCC规则部分重复
+    """
+    rng = random.Random(seed)
+    cities = ['^1', '^10', '^1|^2', '^0[38]', '^03|^08', '^0156|^01', '^2', '2', '9$', '^(0|1)0', '^[0-9]{3}9']
+    names = ['星巴克|麦当劳', '超市', '.', '咖啡|加油', 'starbucks']
+    return pd.DataFrame({
+        'file_name': ['shop'] * 12,
+        'district': [rng.choice(['dom', 'int', 'x']) for _ in range(12)],
+        'citycode_white': [rng.choice(cities) for _ in range(12)],
+        'name_white': [rng.choice(names) for _ in range(12)],
+        'name_black': [rng.choice(['zzz', '0$', '^x', '站1']) for _ in range(12)],
+        'mcc_white': [rng.choice(['58', '5', '^54', '5411']) for _ in range(12)],
+    })
+
+
+@pytest.mark.parametrize('kwargs', [dict(), dict(byte_mode=True), dict(keyword=True, reason_format='code')])
+@pytest.mark.parametrize('seed', [None, 1, 2, 3, 4])
+def test_optimized_rules_keep_output(tmp_path, kwargs, seed):
+    lines = _merchant_lines(seed=seed or 0)
+    df_rule = _rule_table() if seed is None else _random_rule_table(seed)
+    plain = _run_clean(tmp_path, lines, df_rule, **kwargs)
+    optimized = _run_clean(tmp_path, lines, df_rule, optimize=True, **kwargs)
+    assert optimized == plain
+    if not kwargs:
+        expected = {file: ('\n'.join(rows) + '\n').encode('utf-8') for file, rows in
+                    _reference_clean(lines, df_rule).items()}
+        assert optimized == expected
+
+
+def test_optimize_rules_plan():
+    # 重复的^10跳过，相邻的锚定城市规则合并成一组，确保上面的一致性测试覆盖了合并及跳过
+    df_plan = raccoon.optimize_rules(_rule_table(), file_name='shop', show=False)
+    assert df_plan.loc[0, ['rules', 'city_after', 'skipped', 'merged']].tolist() == [9, 3, 1, 1]
+
+
+def test_seek_sample_large_file(tmp_path, monkeypatch):
+    # 模拟Windows上numpy<2的默认32位整型：大于2G的文件，抽取的字节位置须为64位整数
+    class RandomState(np.random.RandomState):
+        def randint(self, low, high=None, size=None, dtype=int):
+            return super().randint(low, high, size, np.int32 if dtype is int else dtype)
+
+    offsets = []
+
+    def line_at(f, offset, size, window=256, limit=None):
+        offsets.append(offset)
+        return offset, b'x' * 99, 100
+
+    file = tmp_path / 'big.txt'
+    file.write_bytes(b'x\n')
+    monkeypatch.setattr(np.random, 'RandomState', RandomState)
+    monkeypatch.setattr(text.os.path, 'getsize', lambda _: 2 ** 32 + 1000)
+    monkeypatch.setattr(text, '_line_at', line_at)
+    lines, report = text._seek_sample(str(file), 200, random_state=0)
+    assert len(lines) == 200 and max(offsets) > 2 ** 31